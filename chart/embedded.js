@@ -0,0 +1,51 @@
+// Series embedded in a single file report (gc_analyzer.py --html): inlined before the data script, not used by index.htm
+// Each chart has its series as one zlib stream of columns, inflated with DecompressionStream one chart after the other
+
+var embeddedSeries = (function () {
+    var charts = [];
+    var decoded = Promise.resolve();
+
+    function inflate(base64) {
+        var binary = atob(base64);
+        var bytes = new Uint8Array(binary.length);
+        for (var idx = 0; idx < binary.length; idx++) {
+            bytes[idx] = binary.charCodeAt(idx);
+        }
+        var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+        return new Response(stream).arrayBuffer();
+    }
+
+    function column(buffer, spec, count) {
+        // spec: [type, byte offset, scale]
+        return spec[0] === 'i4' ? new Int32Array(buffer, spec[1], count) : new Float64Array(buffer, spec[1], count);
+    }
+
+    function fill(buffer, series) {
+        series.forEach(function (serie) {
+            var deltas = column(buffer, serie.x, serie.count);
+            var values = column(buffer, serie.y, serie.count);
+            var xScale = serie.x[2];
+            var yScale = serie.y[2];
+            // the data var is filled in place: series options of the data script hold it already
+            var points = window[serie.name];
+            for (var idx = 0; idx < serie.count; idx++) {
+                points.push([(serie.start + deltas[idx]) / xScale, values[idx] / yScale]);
+            }
+        });
+    }
+
+    return {
+        add: function (chart, series, base64) {
+            decoded = decoded.then(function () {
+                return inflate(base64);
+            }).then(function (buffer) {
+                fill(buffer, series);
+            });
+            charts[chart] = decoded;
+        },
+        ready: function (chart) {
+            // resolved once the series of the chart (index in the rendering order) are decoded
+            return charts[chart] || Promise.resolve();
+        }
+    };
+})();
@@ -0,0 +1,165 @@
+// Rendering of large series: WebGL boost, charts drawn one per task, zoom level tiles loaded on demand
+
+// points of a serie above which it is drawn with WebGL, when the Highcharts boost module (modules/boost.js) is loaded
+var BOOST_THRESHOLD = 5000;
+// tiles of a level loaded at most for the current view, a coarser level is loaded beyond
+var VIEW_MAX_TILES = 2;
+
+var tileCache = {};
+var tileCallbacks = {};
+var chartQueue = [];
+
+Highcharts.setOptions({
+    boost: {
+        useGPUTranslations: true
+    },
+    plotOptions: {
+        series: {
+            boostThreshold: BOOST_THRESHOLD
+        }
+    },
+    chart: {
+        events: {
+            load: function () {
+                loadChartTiles(this);
+            }
+        }
+    },
+    xAxis: {
+        events: {
+            afterSetExtremes: function (e) {
+                // userMin/userMax are undefined when the zoom is reset
+                loadChartTiles(this.chart, e.userMin, e.userMax);
+            }
+        }
+    }
+});
+
+function deferChart(render) {
+    // one chart per task: the page is painted between charts, the first ones are not blocked by the next ones
+    chartQueue.push(render);
+    if (chartQueue.length === 1) {
+        setTimeout(renderNextChart, 0);
+    }
+}
+
+function renderNextChart() {
+    chartQueue[0]();
+    chartQueue.shift();
+    if (chartQueue.length > 0) {
+        setTimeout(renderNextChart, 0);
+    }
+}
+
+function isTiled(serieId) {
+    return typeof tiles !== 'undefined' && tiles.series[serieId] !== undefined;
+}
+
+function hasData(serieId) {
+    return (window[serieId] || []).length > 0 || isTiled(serieId);
+}
+
+// called by the tile files
+function gcTile(serieId, level, index, points) {
+    var key = serieId + '_' + level + '_' + index;
+    var callbacks = tileCallbacks[key] || [];
+    tileCache[key] = points;
+    delete tileCallbacks[key];
+    callbacks.forEach(function (callback) {
+        callback();
+    });
+}
+
+function loadTile(serieId, level, index, callback) {
+    // script elements rather than XHR, allowed for pages opened from the file system
+    var key = serieId + '_' + level + '_' + index;
+    if (tileCache[key] !== undefined) {
+        callback();
+        return;
+    }
+    if (tileCallbacks[key] === undefined) {
+        tileCallbacks[key] = [];
+        var script = document.createElement('script');
+        script.src = tiles.dir + '/' + key + '.js';
+        document.head.appendChild(script);
+    }
+    tileCallbacks[key].push(callback);
+}
+
+function firstTileIndex(starts, time) {
+    // level 0 tile containing time: the last one starting at or before it
+    var low = 0;
+    var high = starts.length - 1;
+    while (low < high) {
+        var mid = (low + high + 1) >> 1;
+        if (starts[mid] <= time) {
+            low = mid;
+        } else {
+            high = mid - 1;
+        }
+    }
+    return low;
+}
+
+function viewTiles(serie, min, max) {
+    // finest level showing [min, max] with at most VIEW_MAX_TILES tiles, the whole serie without zoom
+    var level = serie.levels;
+    var first = 0;
+    var last = 0;
+    if (min !== undefined && max !== undefined) {
+        first = firstTileIndex(serie.starts, min);
+        last = firstTileIndex(serie.starts, max);
+        for (level = 0; level < serie.levels; level++) {
+            var span = Math.pow(tiles.factor, level);
+            if (Math.floor(last / span) - Math.floor(first / span) < VIEW_MAX_TILES) {
+                break;
+            }
+        }
+        first = Math.floor(first / Math.pow(tiles.factor, level));
+        last = Math.floor(last / Math.pow(tiles.factor, level));
+    }
+    return {level: level, first: first, last: last, key: level + '_' + first + '_' + last};
+}
+
+function loadChartTiles(chart, min, max) {
+    if (typeof tiles === 'undefined') {
+        return;
+    }
+    var updates = [];
+    var pending = 1;
+
+    function tileLoaded() {
+        pending--;
+        if (pending > 0 || updates.length === 0) {
+            return;
+        }
+        updates.forEach(function (update) {
+            if (update.serie.tileView !== update.view.key) {
+                return;  // zoomed again meanwhile
+            }
+            var data = [];
+            for (var index = update.view.first; index <= update.view.last; index++) {
+                data = data.concat(tileCache[update.serie.options.id + '_' + update.view.level + '_' + index]);
+            }
+            update.serie.setData(data, false);
+        });
+        chart.redraw();
+    }
+
+    chart.series.forEach(function (serie) {
+        if (!isTiled(serie.options.id)) {
+            return;
+        }
+        var view = viewTiles(tiles.series[serie.options.id], min, max);
+        if (serie.tileView === view.key) {
+            return;
+        }
+        serie.tileView = view.key;
+        updates.push({serie: serie, view: view});
+        for (var index = view.first; index <= view.last; index++) {
+            pending++;
+            loadTile(serie.options.id, view.level, index, tileLoaded);
+        }
+    });
+    tileLoaded();
+}
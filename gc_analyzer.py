@@ -4,13 +4,40 @@ import gzip
 import re
 import math
 import argparse
+import bisect
+import calendar
+import collections
+import io
+import json
+import os
+import time
+import zlib
+try:
+    import indexed_gzip
+except ImportError:
+    indexed_gzip = None
+from gc_latency import correlate, format_report, DEFAULT_LATENCY_PATTERN, DURATION_UNITS, MAX_REQUEST_MS
+from gc_html import EmbeddedSeriesWriter, HTMLReportFile
+from gc_cpu import CpuAnalyzer, SYS_HEAVY_FRACTION, STARVED_REAL_RATIO
+from gc_anomalies import AnomalyAnalyzer, LEVEL_COLORS, LEVEL_NAMES, format_time_ms
+from gc_stats_engine import StatsEngine, ALL_PAUSES, DEFAULT_PERCENTILES
+from gc_tenuring import TenuringAnalyzer, MAX_AGE
+from gc_sizing import SizingAnalyzer, format_simulation, NO_ALLOCATION_GCS
+from gc_tiles import TileWriter, TILE_POINTS
+from gc_unified_log import split_decorators, DECORATED_LINE_START_PATTERN
+
+
+def open_output(outputfile):
+    if outputfile.endswith('gz'):
+        return gzip.open(outputfile, 'wt')
+    return open(outputfile, 'w', buffering=WRITE_BUFFER_SIZE)
 
 
 def open_file(inputfile, mode):
     if inputfile.endswith('bz2'):
-        return bz2.BZ2File(inputfile, mode)
+        return bz2.open(inputfile, mode + 't' if 'b' not in mode else mode)
     elif inputfile.endswith('gz'):
-        return gzip.open(inputfile, mode)
+        return gzip.open(inputfile, mode + 't' if 'b' not in mode else mode)
     else:
         return open(inputfile, mode)
 
@@ -20,54 +47,209 @@ CMS_GC = 1
 G1_GC = 2
 SHENANDOAH_GC = 3
 
+GC_TYPES = {'Parallel': PARALLEL_GC, 'CMS': CMS_GC, 'G1': G1_GC, 'Shenandoah': SHENANDOAH_GC}
+
 # Log format
 JDK8_FORMAT = 0
 JDK9_FORMAT = 1
 
+LOG_FORMAT_NAMES = {JDK8_FORMAT: 'JDK8', JDK9_FORMAT: 'JDK9+'}
+
+# charts page of the HTML report
+CHART_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chart')
+
 # MODE
 HTML_MODE = 0
 STATS_MODE = 1
 
+# informational messages (detection, warnings) output, None when used as a library
+info_output = None
+
+# compiled regexes shared by all parsers of the process
+regex_cache = {}
+
+# parsed GC event, time_ms is the timestamp of the event in ms since epoch (timezone ignored)
+GCEvent = collections.namedtuple('GCEvent', ['kind', 'time_ms', 'pause_ms', 'heap_after_mb'])
+
+# number of lines read at the head of a log to detect GC type & log format when seeking into it
+DETECTION_MAX_LINES = 1000
+
+# record start: JDK8 timestamp or JDK9+ time decorator
+TIMESTAMP_LINE_START_PATTERN = '\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}|' + DECORATED_LINE_START_PATTERN
+# --from/--to and record timestamps: YYYY-MM-DDTHH:MM:SS.mmm or a prefix of it, with an optional zone
+TIMESTAMP_RE = re.compile('^(\d{4})-(\d{2})-(\d{2})(?:T(\d{2})(?::(\d{2})(?::(\d{2})(?:\.(\d{1,3}))?)?)?)?(Z|[+-]\d{2}:?\d{2})?$')
+# period covered by a prefix ending with the day, hour, minute or second
+TIMESTAMP_UNITS_MS = {3: 24 * 3600 * 1000, 4: 3600 * 1000, 5: 60 * 1000, 6: 1000}
+
+# Report
+WRITE_CHUNK_POINTS = 4096  # points of a serie joined per write
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Index
+INDEX_VERSION = 2
+INDEX_INTERVAL = 1000  # records between 2 index entries
+INDEX_FINGERPRINT_SIZE = 64 * 1024  # bytes at the head of the log checksummed to detect a changed log
+ZRAN_SPACING = 4 * 1024 * 1024  # uncompressed bytes between 2 gzip inflate checkpoints
+
+# Generations of the occupancy chart (data serie keys <generation>_occupancy), metaspace not stacked on the heap
+HEAP_GENERATIONS = ['young', 'old', 'humongous']
+GENERATIONS = HEAP_GENERATIONS + ['metaspace']
+# JDK9+ gc+heap/gc+metaspace spaces summed per generation
+JDK9_SPACE_GENERATIONS = {'Eden': 'young', 'Survivor': 'young', 'PSYoungGen': 'young', 'ParNew': 'young', 'DefNew': 'young',
+                          'Old': 'old', 'ParOldGen': 'old', 'CMS': 'old', 'Tenured': 'old',
+                          'Humongous': 'humongous', 'Metaspace': 'metaspace'}
+
+# Event kinds (data serie keys of pause events)
+EVENT_KINDS = ['minorgc', 'mixed', 'initialmark', 'finalremark', 'cleanup', 'fullgc',
+               'initmark', 'finalmark', 'initupdate', 'finalupdate', 'finalevac', 'degenerated']
+
 SERIE_MS_FORMAT = '''
         {{
-            name: '{}',
+            name: '{0}',
             tooltip: {{
                 valueSuffix: 'ms'
             }},
-            data: data_serie_{},
+            id: 'data_serie_{1}',
+            data: data_serie_{1},
             yAxis: 0
         }}'''
 
+SERIE_PHASE_FORMAT = '''
+        {{
+            name: '{0}',
+            tooltip: {{
+                valueSuffix: 'ms'
+            }},
+            id: 'data_serie_{1}',
+            data: data_serie_{1}
+        }}'''
+
+SERIE_PERCENT_FORMAT = '''
+        {{
+            name: '{0}',
+            tooltip: {{
+                valueSuffix: '%'
+            }},
+            id: 'data_serie_{1}',
+            data: data_serie_{1}
+        }}'''
+
 SERIE_S_FORMAT = '''
         {{
-            name: '{}',
+            name: '{0}',
             tooltip: {{
                 valueSuffix: 's'
             }},
-            data: data_serie_{},
+            id: 'data_serie_{1}',
+            data: data_serie_{1},
             yAxis: 1
         }}'''
 
 
+SERIE_BLOCKED = '''
+        {
+            name: 'blocked by the OS',
+            tooltip: {
+                pointFormat: '{point.x:%H:%M:%S.%L} <br> blocked: <b>{point.y}</b>',
+                valueSuffix: 'ms'
+            },
+            id: 'data_serie_blocked',
+            data: data_serie_blocked,
+            color: 'rgba(220, 20, 60, 0.9)',
+            marker: {
+                symbol: 'diamond',
+                radius: 6
+            },
+            yAxis: 0
+        }'''
+
+
+def phase_serie_key(phase_name):
+    return 'phase_' + re.sub('[^a-z0-9]+', '_', phase_name.lower()).strip('_')
+
+
 class GCLineParser(object):
+    GC_NAME = None
+    # substrings one of which must be present in a record to be an event of the given kind
+    EVENT_KEYWORDS = {}
+    # substrings of records that are not events but complete the previous one (cpu times)
+    EVENT_COMPLEMENT_KEYWORDS = ()
+
     def __init__(self, log_format):
         self.log_format = log_format
         self.pause_pattern = ', (?P<PAUSE>\d+\.\d+) secs\]'
         self.jdk9_pause_pattern = '(?P<PAUSE>\d+\.\d+)ms'
         self.times_pattern = '\[Times: user=(?P<USER>\d+\.\d+) sys=(?P<SYS>\d+\.\d+), real=(?P<REAL>\d+\.\d+) secs\]'
-        self.timestamp_re = re.compile('(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})\.(\d{3})')
+        self.timestamp_re = compile_regex('(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})\.(\d{3})')
         self.data = {}
         #stats
         self.previous_usage = 0
         self.total_allocated = 0
-        self.pause_durations = []
+        self.total_promoted = None
+        self.stats = StatsEngine()
+        self.phase_names = []
+        self.phase_stats = None
+        self.phase_max_stats = None
+        self.concurrent_stats = None
+        #generations
+        self.generations_after = {}
+        self.pending_generations = []
+        self.pending_generations_gc_id = None
+        self.region_size_mb = None
+        #tenuring
+        self.tenuring = TenuringAnalyzer()
+        self.pending_ages = []
+        self.pending_age_header = None
+        self.pending_ages_gc_id = None
+        self.desired_survivor_re = compile_regex('Desired survivor size (?P<DESIRED>\d+) bytes, new threshold (?P<THRESHOLD>\d+) \(max(?: threshold)? (?P<MAX_THRESHOLD>\d+)\)')
+        self.age_re = compile_regex('- age +(?P<AGE>\d+): +(?P<BYTES>\d+) bytes')
+        self.jdk9_space_re = compile_regex('(?P<SPACE>[A-Za-z]+)(?: regions)?: (?P<BEFORE>\d+)(?P<BEFORE_UNIT>[KMG]?)(?:\(\d+[KMG]\))?->(?P<AFTER>\d+)(?P<AFTER_UNIT>[KMG]?)')
+        # JDK9+: tag set of a line => method parsing it, lines with other gc tag sets are skipped before any regex runs
+        self.tag_dispatch = {}
+        # methods tried in turn on the lines without tags, built from tag_dispatch on the first one
+        self.untagged_handlers = None
         self.event_count = 0
+        self.record_count = 0
+        self.record_chars = 0
+        #filters
+        self.event_kinds = None
+        self.min_pause_ms = None
+        self.event_keywords = None
+        self.last_event_accepted = True
+        #cpu efficiency, (kind, time_ms) of the last event waiting for its cpu times
+        self.cpu = CpuAnalyzer()
+        self.cpu_event = None
+        #anomalies
+        self.analyzer = AnomalyAnalyzer()
+        self.findings = []
+        #heap sizing what-if, a SizingAnalyzer set by configure_parser for --sizing only
+        self.sizing = None
+        self.listener = None
 
     @staticmethod
     def format_timestamp(match_timestamp, offset=0):
-        return 'Date.UTC({},{},{},{},{},{},{})+{}'.format(match_timestamp.group(1), int(match_timestamp.group(2))-1, match_timestamp.group(3),
-                                                match_timestamp.group(4), match_timestamp.group(5), match_timestamp.group(6),
-                                                match_timestamp.group(7), offset)
+        # fields as integers: javascript reads the zero padded ones (041 ms) as octal
+        return 'Date.UTC({},{},{},{},{},{},{})+{}'.format(int(match_timestamp.group(1)), int(match_timestamp.group(2))-1, int(match_timestamp.group(3)),
+                                                int(match_timestamp.group(4)), int(match_timestamp.group(5)), int(match_timestamp.group(6)),
+                                                int(match_timestamp.group(7)), offset)
+
+    @staticmethod
+    def timestamp_ms(match_timestamp, offset=0):
+        return calendar.timegm((int(match_timestamp.group(1)), int(match_timestamp.group(2)), int(match_timestamp.group(3)),
+                                int(match_timestamp.group(4)), int(match_timestamp.group(5)), int(match_timestamp.group(6)))) * 1000 + \
+               int(match_timestamp.group(7)) + offset
+
+    @staticmethod
+    def heap_occupancy_to_M(value_with_suffix):
+        value = float(value_with_suffix[:-1])
+        factor = 1
+        if value_with_suffix.endswith('G'):
+            factor = 1.0 / 1024
+        if value_with_suffix.endswith('K'):
+            factor = 1024
+        if value_with_suffix.endswith('B'):
+            factor = 1024 * 1024
+        return round(value / factor, 2)
 
     @staticmethod
     def heap_occupancy_to_G(value_with_suffix):
@@ -107,39 +289,283 @@ class GCLineParser(object):
         add_cpu_time('USER', 'user')
         add_cpu_time('SYS', 'sys')
         add_cpu_time('REAL', 'real')
+        if self.cpu is not None and self.cpu_event is not None:
+            kind, time_ms = self.cpu_event
+            self.cpu.add_times(kind, time_ms, float(match_line.group('USER')) * 1000, float(match_line.group('SYS')) * 1000,
+                               float(match_line.group('REAL')) * 1000)
+        self.cpu_event = None
 
     def add_data(self, key, value):
+        if self.data is None:
+            return
         value_list = self.data.get(key)
         if not value_list:
             value_list = []
             self.data[key] = value_list
         value_list.append(value)
 
+    def add_allocated(self, allocated_mb):
+        self.total_allocated += allocated_mb
+        if self.sizing is not None:
+            self.sizing.add_allocation(allocated_mb)
+
     def jdk8_add_total_allocated(self, before_gc_k, after_gc_k):
-        self.total_allocated += (int(before_gc_k) - self.previous_usage) / 1024
+        self.add_allocated((int(before_gc_k) - self.previous_usage) / 1024)
         self.previous_usage = int(after_gc_k)
 
     def jdk9_add_total_allocated(self, before_gc, after_gc):
-        self.total_allocated += int(before_gc[:-1]) - self.previous_usage
-        self.previous_usage = int(after_gc[:-1])
+        self.add_allocated(GCLineParser.heap_occupancy_to_M(before_gc) - self.previous_usage)
+        self.previous_usage = GCLineParser.heap_occupancy_to_M(after_gc)
+
+    def set_event_filter(self, event_kinds=None, min_pause_ms=None):
+        self.event_kinds = event_kinds
+        self.min_pause_ms = min_pause_ms
+        if event_kinds:
+            self.event_keywords = list(self.EVENT_COMPLEMENT_KEYWORDS)
+            for kind in event_kinds:
+                self.event_keywords.extend(self.EVENT_KEYWORDS.get(kind, ()))
+
+    def prefilter(self, full_line):
+        # cheap substring check done before running the field regexes
+        if self.event_keywords is None:
+            return True
+        for keyword in self.event_keywords:
+            if keyword in full_line:
+                return True
+        self.last_event_accepted = False
+        return False
+
+    def accept_event(self, key, pause_ms):
+        accepted = (self.event_kinds is None or key in self.event_kinds) and \
+                   (self.min_pause_ms is None or pause_ms >= self.min_pause_ms)
+        self.last_event_accepted = accepted
+        return accepted
+
+    def add_event(self, key, match_timestamp, pause_ms, heap_after_mb=None):
+        time_ms = GCLineParser.timestamp_ms(match_timestamp)
+        if self.stats is not None:
+            self.stats.add_event(key, time_ms, pause_ms)
+        if self.analyzer is not None:
+            self.analyzer.add_event(key, time_ms, pause_ms, heap_after_mb)
+        if self.sizing is not None:
+            self.sizing.add_event(key, time_ms, pause_ms, heap_after_mb)
+        if self.listener is not None:
+            self.listener(GCEvent(key, time_ms, pause_ms, heap_after_mb))
+        self.cpu_event = (key, time_ms)
+        if self.tenuring is not None and key == 'fullgc':
+            self.tenuring.reset()
+
+    def add_phases(self, match_timestamp, phases):
+        # phases: (name, avg_ms, max_ms) of a pause, max_ms being the slowest worker (None for serial phases)
+        time_ms = GCLineParser.timestamp_ms(match_timestamp)
+        for name, avg_ms, max_ms in phases:
+            if name not in self.phase_names:
+                self.phase_names.append(name)
+            if self.phase_stats is not None:
+                self.phase_stats.add_event(name, time_ms, avg_ms)
+                if max_ms is not None:
+                    self.phase_max_stats.add_event(name, time_ms, max_ms)
+            if self.stacked_phase(max_ms):
+                self.add_data(phase_serie_key(name), '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(avg_ms, 3)))
+
+    def stacked_phase(self, max_ms):
+        return True
+
+    def compute_stats(self, percentiles=None):
+        stats = self.stats.compute(percentiles, self.total_allocated, self.total_promoted)
+        stats['phases'] = []
+        stats['concurrent'] = []
+        stats['tenuring'] = self.tenuring.summary() if self.tenuring is not None else None
+        stats['cpu'] = self.cpu.summary() if self.cpu is not None else None
+        if self.phase_stats is not None and self.phase_stats.pauses:
+            phase_stats = self.phase_stats.compute(percentiles)['kinds']
+            phase_max_stats = self.phase_max_stats.compute(percentiles)['kinds']
+            for name in self.phase_names:
+                if name in phase_stats:
+                    stats['phases'].append((name, phase_stats[name], phase_max_stats.get(name)))
+        return stats
+
+    def add_generations(self, match_timestamp, pause_ms, generations):
+        # generations: {generation: (before_mb, after_mb)}, the others keep their last known occupancy
+        # so that every generation has a point at the same times to be stacked
+        for generation in GENERATIONS:
+            if generation in generations:
+                before_mb, after_mb = generations[generation]
+            elif generation in self.generations_after:
+                before_mb = after_mb = self.generations_after[generation]
+            else:
+                continue
+            self.generations_after[generation] = after_mb
+            serie_key = generation + '_occupancy'
+            self.add_data(serie_key, '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(before_mb / 1024, 3)))
+            self.add_data(serie_key, '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp, pause_ms), round(after_mb / 1024, 3)))
+
+    def match_record_timestamp(self, match_line, log_line=None):
+        # JDK8: TIMESTAMP group of the record regex, JDK9+: time decorator of the line
+        return self.timestamp_re.match(log_line.timestamp if log_line is not None else match_line.group('TIMESTAMP'))
+
+    def parse_record(self, full_line, log_line=None):
+        # log_line: JDK9+ line already split by the reader
+        if log_line is not None:
+            self.parse_log_line(log_line)
+        else:
+            self.parse_line(full_line)
 
-    def add_pause_duration(self, current_pause):
-        self.pause_durations.append(current_pause)
+    def jdk9_parse_line(self, full_line):
+        log_line = split_decorators(full_line)
+        if log_line is not None:
+            self.parse_log_line(log_line)
+
+    def parse_log_line(self, log_line):
+        tags = log_line.tags
+        parse_tags = self.tag_dispatch.get(tags)
+        if parse_tags is not None:
+            parse_tags(log_line)
+        elif tags is None or (tags != 'gc' and not tags.startswith('gc,')):
+            # not decorated with tags (tags is None, or the hostname decorator): each method matches its own lines
+            if self.untagged_handlers is None:
+                self.untagged_handlers = [self.tag_dispatch['gc']]
+                for handler in self.tag_dispatch.values():
+                    if handler not in self.untagged_handlers:
+                        self.untagged_handlers.append(handler)
+            for handler in self.untagged_handlers:
+                handler(log_line)
+
+    def jdk9_parse_space(self, log_line):
+        # gc+heap/gc+metaspace lines precede the pause line of the same GC(n)
+        gc_id = log_line.gc_id
+        if gc_id is None:
+            return
+        match_space = self.jdk9_space_re.match(log_line.message)
+        if not match_space:
+            return
+        generation = JDK9_SPACE_GENERATIONS.get(match_space.group('SPACE'))
+        if generation is None:
+            return
+        if gc_id != self.pending_generations_gc_id:
+            self.pending_generations = []
+            self.pending_generations_gc_id = gc_id
+        # no unit: number of G1 regions
+        self.pending_generations.append((generation, match_space.group('BEFORE') + match_space.group('BEFORE_UNIT'),
+                                         match_space.group('AFTER') + match_space.group('AFTER_UNIT')))
+
+    def take_pending_generations(self, gc_id, heap_before_mb):
+        spaces = self.pending_generations if gc_id == self.pending_generations_gc_id else []
+        self.pending_generations = []
+        self.pending_generations_gc_id = None
+        region_size_mb = self.region_size_mb
+        if region_size_mb is None:
+            # region size not logged: used regions are mostly full, closest power of 2 of heap/regions
+            regions = sum(int(before) for generation, before, after in spaces if before.isdigit())
+            if regions > 0 and heap_before_mb > 0:
+                region_size_mb = 2 ** max(0, round(math.log(heap_before_mb / regions, 2)))
+        generations = {}
+        for generation, before, after in spaces:
+            if before.isdigit():
+                if region_size_mb is None:
+                    continue
+                before_mb = int(before) * region_size_mb
+                after_mb = int(after) * region_size_mb
+            else:
+                before_mb = GCLineParser.heap_occupancy_to_M(before)
+                after_mb = GCLineParser.heap_occupancy_to_M(after)
+            previous_before_mb, previous_after_mb = generations.get(generation, (0, 0))
+            generations[generation] = (previous_before_mb + before_mb, previous_after_mb + after_mb)
+        return generations
+
+    def add_ages(self, match_timestamp, ages, threshold, max_threshold, desired_survivor_bytes):
+        rates = self.tenuring.add_table(ages, threshold, max_threshold, desired_survivor_bytes)
+        for age, rate in rates:
+            self.add_data('survival_age_{}'.format(age), '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(rate * 100, 1)))
+
+    def jdk8_add_ages(self, full_line, match_timestamp):
+        # age table of -XX:+PrintTenuringDistribution, inside the record of the young GC
+        if self.tenuring is None:
+            return
+        idx = full_line.find('Desired survivor size')
+        match_desired = self.desired_survivor_re.match(full_line, idx) if idx != -1 else None
+        if not match_desired:
+            self.tenuring.reset()
+            return
+        ages = [(int(match_age.group('AGE')), int(match_age.group('BYTES'))) for match_age in self.age_re.finditer(full_line, match_desired.end())]
+        self.add_ages(match_timestamp, ages, int(match_desired.group('THRESHOLD')), int(match_desired.group('MAX_THRESHOLD')), int(match_desired.group('DESIRED')))
+
+    def jdk9_parse_age(self, log_line):
+        # gc+age lines precede the pause line of the same GC(n)
+        gc_id = log_line.gc_id
+        if gc_id is None:
+            return
+        if gc_id != self.pending_ages_gc_id:
+            self.pending_ages = []
+            self.pending_age_header = None
+            self.pending_ages_gc_id = gc_id
+        match_age = self.age_re.search(log_line.message)
+        if match_age:
+            self.pending_ages.append((int(match_age.group('AGE')), int(match_age.group('BYTES'))))
+            return
+        match_desired = self.desired_survivor_re.search(log_line.message)
+        if match_desired:
+            self.pending_age_header = (int(match_desired.group('THRESHOLD')), int(match_desired.group('MAX_THRESHOLD')), int(match_desired.group('DESIRED')))
+
+    def take_pending_ages(self, gc_id, match_timestamp):
+        if self.tenuring is None:
+            return
+        if gc_id == self.pending_ages_gc_id and self.pending_age_header is not None:
+            threshold, max_threshold, desired_survivor_bytes = self.pending_age_header
+            self.add_ages(match_timestamp, self.pending_ages, threshold, max_threshold, desired_survivor_bytes)
+        else:
+            self.tenuring.reset()
+        self.pending_ages = []
+        self.pending_age_header = None
+        self.pending_ages_gc_id = None
+
+    def add_promoted(self, young_before_k, young_after_k, heap_before_k, heap_after_k):
+        # promoted = young gen decrease not reclaimed from the whole heap
+        promoted_k = (young_before_k - young_after_k) - (heap_before_k - heap_after_k)
+        self.total_promoted = (self.total_promoted or 0) + max(promoted_k, 0) / 1024
+
+    def finish(self):
+        if self.cpu is not None:
+            # pauses most blocked by the OS highlighted on the pause chart
+            cpu = self.cpu.summary()
+            for pause in sorted(cpu['top_blocked'] if cpu is not None else (), key=lambda pause: pause['time_ms']):
+                self.add_data('blocked', '[{},{}],\n'.format(pause['time_ms'], round(pause['blocked_ms'], 3)))
+        if self.analyzer is None:
+            return
+        self.findings = self.analyzer.finish()
+        for finding in self.findings:
+            if finding.end_ms > finding.start_ms:
+                self.add_data('annotation_bands', "{{from: {}, to: {}, color: '{}', label: {{text: '{}'}}}},\n".format(
+                    finding.start_ms, finding.end_ms, LEVEL_COLORS[finding.level], finding.title))
+            else:
+                self.add_data('annotation_lines', "{{value: {}, width: 2, color: '{}', label: {{text: '{}'}}}},\n".format(
+                    finding.start_ms, LEVEL_COLORS[finding.level].replace('0.2)', '0.8)'), finding.title))
+        for time_ms, heap_floor_mb in self.analyzer.heap_floor_trend():
+            self.add_data('heap_floor', '[{},{}],\n'.format(time_ms, round(heap_floor_mb / 1024, 2)))
 
     def create_reporter(self):
         return None
 
 
 class ParallelGCParser(GCLineParser):
+    GC_NAME = 'Parallel'
+    EVENT_KEYWORDS = {'minorgc': ('[GC ', 'Pause Young'), 'fullgc': ('[Full GC', 'Pause Full')}
+    EVENT_COMPLEMENT_KEYWORDS = ('gc,heap', 'gc,metaspace', 'gc,age')
+
     def __init__(self, log_format):
         super(ParallelGCParser, self).__init__(log_format)
         if log_format == JDK8_FORMAT:
-            self.parallel_minorgc_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[GC [^\[]+\[[^\]]+\] (?P<HEAP_BEFORE_GC>\d+)K->(?P<HEAP_AFTER_GC>\d+)K\((?P<HEAP_MAX>\d+)K\)' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
-            self.parallel_fullgc_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Full GC [^\[]+\[[^\]]+\][^\[]+\[[^\]]+\] (?P<HEAP_BEFORE_GC>\d+)K->(?P<HEAP_AFTER_GC>\d+)K\((?P<HEAP_MAX>\d+)K\),.*' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
+            self.parallel_minorgc_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[GC [^\[]+\[[^:\]]+: (?P<YOUNG_BEFORE_GC>\d+)K->(?P<YOUNG_AFTER_GC>\d+)K\(\d+K\)\] (?P<HEAP_BEFORE_GC>\d+)K->(?P<HEAP_AFTER_GC>\d+)K\((?P<HEAP_MAX>\d+)K\)' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
+            self.parallel_fullgc_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Full GC [^\[]+\[[^:\]]+: (?P<YOUNG_BEFORE_GC>\d+)K->(?P<YOUNG_AFTER_GC>\d+)K\(\d+K\)\][^\[]+\[[^:\]]+: (?P<OLD_BEFORE_GC>\d+)K->(?P<OLD_AFTER_GC>\d+)K\(\d+K\)\] (?P<HEAP_BEFORE_GC>\d+)K->(?P<HEAP_AFTER_GC>\d+)K\((?P<HEAP_MAX>\d+)K\),(?: \[Metaspace: (?P<METASPACE_BEFORE_GC>\d+)K->(?P<METASPACE_AFTER_GC>\d+)K\(\d+K\)\])?.*' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
         else:
             self.parallel_heap_occupancy_pattern = ' (?P<HEAP_BEFORE_GC>\d+[KMG])->(?P<HEAP_AFTER_GC>\d+[KMG])\((?P<HEAP_MAX>\d+[KMG])\)'
-            self.parallel_minorgc_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}\].*GC\(\d+\) Pause Young .*' + self.parallel_heap_occupancy_pattern + ' ' + self.jdk9_pause_pattern)
-            self.parallel_fullgc_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}\].*GC\(\d+\) Pause Full .*' + self.parallel_heap_occupancy_pattern + ' ' + self.jdk9_pause_pattern)
+            # matched on the message of the line, after its decorators & GC(n)
+            self.parallel_minorgc_re = compile_regex('Pause Young .*' + self.parallel_heap_occupancy_pattern + ' ' + self.jdk9_pause_pattern)
+            self.parallel_fullgc_re = compile_regex('Pause Full .*' + self.parallel_heap_occupancy_pattern + ' ' + self.jdk9_pause_pattern)
+            self.tag_dispatch = {'gc': self.jdk9_parse_pause,
+                                 'gc,heap': self.jdk9_parse_space,
+                                 'gc,metaspace': self.jdk9_parse_space,
+                                 'gc,age': self.jdk9_parse_age}
 
     def parse_line(self, full_line):
         if self.log_format == JDK8_FORMAT:
@@ -153,11 +579,20 @@ class ParallelGCParser(GCLineParser):
             timestamp = match_line.group('TIMESTAMP')
             match_timestamp = self.timestamp_re.match(timestamp)
             if match_timestamp:
+                pause_ms = round(float(match_line.group('PAUSE')) * 1000)
+                if not self.accept_event('minorgc', pause_ms):
+                    return
+                self.add_event('minorgc', match_timestamp, float(match_line.group('PAUSE')) * 1000, int(match_line.group('HEAP_AFTER_GC')) / 1024)
                 before_gc_k = match_line.group('HEAP_BEFORE_GC')
                 after_gc_k = match_line.group('HEAP_AFTER_GC')
                 self.jdk8_add_total_allocated(before_gc_k, after_gc_k)
+                young_before_k = int(match_line.group('YOUNG_BEFORE_GC'))
+                young_after_k = int(match_line.group('YOUNG_AFTER_GC'))
+                self.add_promoted(young_before_k, young_after_k, int(before_gc_k), int(after_gc_k))
+                self.jdk8_add_ages(full_line, match_timestamp)
+                self.add_generations(match_timestamp, pause_ms, {'young': (young_before_k / 1024, young_after_k / 1024),
+                                                                 'old': ((int(before_gc_k) - young_before_k) / 1024, (int(after_gc_k) - young_after_k) / 1024)})
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), GCLineParser.heap_occupancy_K_to_G(before_gc_k)))
-                pause_ms = round(float(match_line.group('PAUSE')) * 1000)
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp, pause_ms), GCLineParser.heap_occupancy_K_to_G(after_gc_k)))
                 self.add_data('max_heap', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(int(match_line.group('HEAP_MAX'))/1048576, 2)))
                 self.add_data('minorgc', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), pause_ms))
@@ -169,29 +604,41 @@ class ParallelGCParser(GCLineParser):
             timestamp = match_line.group('TIMESTAMP')
             match_timestamp = self.timestamp_re.match(timestamp)
             if match_timestamp:
+                pause_sec = float(match_line.group('PAUSE'))
+                pause_ms = round(pause_sec * 1000)
+                if not self.accept_event('fullgc', pause_ms):
+                    return
+                self.add_event('fullgc', match_timestamp, float(match_line.group('PAUSE')) * 1000, int(match_line.group('HEAP_AFTER_GC')) / 1024)
                 before_gc_k = match_line.group('HEAP_BEFORE_GC')
                 after_gc_k = match_line.group('HEAP_AFTER_GC')
                 self.jdk8_add_total_allocated(before_gc_k, after_gc_k)
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), GCLineParser.heap_occupancy_K_to_G(before_gc_k)))
-                pause_sec = float(match_line.group('PAUSE'))
-                pause_ms = round(pause_sec * 1000)
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp, pause_ms), GCLineParser.heap_occupancy_K_to_G(after_gc_k)))
                 self.add_data('max_heap', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(int(match_line.group('HEAP_MAX'))/1048576, 2)))
+                generations = {'young': (int(match_line.group('YOUNG_BEFORE_GC')) / 1024, int(match_line.group('YOUNG_AFTER_GC')) / 1024),
+                               'old': (int(match_line.group('OLD_BEFORE_GC')) / 1024, int(match_line.group('OLD_AFTER_GC')) / 1024)}
+                if match_line.group('METASPACE_BEFORE_GC'):
+                    generations['metaspace'] = (int(match_line.group('METASPACE_BEFORE_GC')) / 1024, int(match_line.group('METASPACE_AFTER_GC')) / 1024)
+                self.add_generations(match_timestamp, pause_ms, generations)
                 self.add_data('fullgc', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(pause_sec, 3)))
                 self.add_cpu_times(match_line, match_timestamp)
                 self.event_count += 1
                 return
 
-    def jdk9_parse_line(self, full_line):
-        match_line = self.parallel_minorgc_re.match(full_line)
+    def jdk9_parse_pause(self, log_line):
+        match_line = self.parallel_minorgc_re.match(log_line.message)
         if match_line:
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+            match_timestamp = self.timestamp_re.match(log_line.timestamp)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')))
+                if not self.accept_event('minorgc', current_pause_ms):
+                    return
+                self.add_event('minorgc', match_timestamp, float(match_line.group('PAUSE')), GCLineParser.heap_occupancy_to_M(match_line.group('HEAP_AFTER_GC')))
                 before_gc = match_line.group('HEAP_BEFORE_GC')
                 after_gc = match_line.group('HEAP_AFTER_GC')
                 self.jdk9_add_total_allocated(before_gc, after_gc)
+                self.add_generations(match_timestamp, current_pause_ms, self.take_pending_generations(log_line.gc_id, GCLineParser.heap_occupancy_to_M(before_gc)))
+                self.take_pending_ages(log_line.gc_id, match_timestamp)
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp),
                                                                     GCLineParser.heap_occupancy_to_G(before_gc)))
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp, current_pause_ms),
@@ -201,15 +648,18 @@ class ParallelGCParser(GCLineParser):
                 self.add_data('minorgc', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), current_pause_ms))
                 self.event_count += 1
                 return
-        match_line = self.parallel_fullgc_re.match(full_line)
+        match_line = self.parallel_fullgc_re.match(log_line.message)
         if match_line:
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+            match_timestamp = self.timestamp_re.match(log_line.timestamp)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')))
+                if not self.accept_event('fullgc', current_pause_ms):
+                    return
+                self.add_event('fullgc', match_timestamp, float(match_line.group('PAUSE')), GCLineParser.heap_occupancy_to_M(match_line.group('HEAP_AFTER_GC')))
                 before_gc = match_line.group('HEAP_BEFORE_GC')
                 after_gc = match_line.group('HEAP_AFTER_GC')
                 self.jdk9_add_total_allocated(before_gc, after_gc)
+                self.add_generations(match_timestamp, current_pause_ms, self.take_pending_generations(log_line.gc_id, GCLineParser.heap_occupancy_to_M(before_gc)))
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp),
                                                                     GCLineParser.heap_occupancy_to_G(before_gc)))
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp, current_pause_ms),
@@ -225,22 +675,53 @@ class ParallelGCParser(GCLineParser):
 
 
 class G1GCLineParser(GCLineParser):
+    GC_NAME = 'G1'
+    EVENT_KEYWORDS = {'minorgc': ('(young)', '(Normal)'),
+                      'initialmark': ('(initial-mark)', '(Concurrent Start)'),
+                      'finalremark': ('[GC remark', 'Pause Remark'),
+                      'cleanup': ('[GC cleanup', 'Pause Cleanup', '(Prepare Mixed)'),
+                      'mixed': ('(mixed)', '(Mixed)'),
+                      'fullgc': ('[Full GC', 'Pause Full')}
+    EVENT_COMPLEMENT_KEYWORDS = ('User=', 'gc,phases', 'gc,heap', 'gc,metaspace', 'gc,age')
+    # per worker timestamps/totals, not phases of the pause
+    IGNORED_PHASES = ('GC Worker Start', 'GC Worker End', 'GC Worker Total')
+
     def __init__(self, log_format):
         super(G1GCLineParser, self).__init__(log_format)
+        self.phase_stats = StatsEngine()
+        self.phase_max_stats = StatsEngine()
+        self.pending_phases = []
+        self.pending_phases_gc_id = None
+        self.worker_phase_pattern = '(?P<WORKER_PHASE>[A-Z][\w ]*) \(ms\): +Min: +(?P<MIN>\d+\.\d+), +Avg: +(?P<AVG>\d+\.\d+), +Max: +(?P<MAX>\d+\.\d+)'
         if log_format == JDK8_FORMAT:
+            # top level lines of the phases block: serial phases indented by 3, per worker phases (Min/Avg/Max)
+            self.G1_generations_re = compile_regex('\[Eden: (?P<EDEN_BEFORE_GC>\d+\.\d+[BKMG])\(\d+\.\d+[BKMG]\)->(?P<EDEN_AFTER_GC>\d+\.\d+[BKMG])\(\d+\.\d+[BKMG]\) Survivors: (?P<SURVIVOR_BEFORE_GC>\d+\.\d+[BKMG])->(?P<SURVIVOR_AFTER_GC>\d+\.\d+[BKMG]) ')
+            self.G1_metaspace_re = compile_regex('\[Metaspace: (?P<METASPACE_BEFORE_GC>\d+)K->(?P<METASPACE_AFTER_GC>\d+)K\(\d+K\)\]')
+            self.G1_phase_re = compile_regex('\n(?: {3}\[(?P<SERIAL_PHASE>[A-Z][\w ]*): (?P<TIME>\d+\.\d+) ms\]| +\[' + self.worker_phase_pattern + ')')
             self.G1_heap_occupancy_pattern = 'Heap: (?P<HEAP_BEFORE_GC>\d+\.\d+[KMG])\(\d+\.\d+[KMG]\)->(?P<HEAP_AFTER_GC>\d+\.\d+[KMG])\((?P<HEAP_MAX>\d+\.\d+[KMG])\)'
-            self.G1_minorgc_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[GC pause .* \(young\).*' + self.pause_pattern + '.*' + self.G1_heap_occupancy_pattern + '.*' + self.times_pattern, re.DOTALL)
-            self.G1_remark_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[GC remark .*' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
-            self.G1_cleanup_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[GC cleanup (?P<HEAP_BEFORE_GC>\d+[KMG])->(?P<HEAP_AFTER_GC>\d+[KMG])\((?P<HEAP_MAX>\d+[KMG])\).*' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
-            self.G1_mixed_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[GC pause .* \(mixed\).*' + self.pause_pattern + '.*' + self.G1_heap_occupancy_pattern + '.*' + self.times_pattern, re.DOTALL)
-            self.G1_fullgc_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Full GC \([^\)]+\).*' + self.pause_pattern + '.*' + self.G1_heap_occupancy_pattern + '.*' + self.times_pattern, re.DOTALL)
+            self.G1_minorgc_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[GC pause .* \(young\).*' + self.pause_pattern + '.*' + self.G1_heap_occupancy_pattern + '.*' + self.times_pattern, re.DOTALL)
+            self.G1_remark_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[GC remark .*' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
+            self.G1_cleanup_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[GC cleanup (?P<HEAP_BEFORE_GC>\d+[KMG])->(?P<HEAP_AFTER_GC>\d+[KMG])\((?P<HEAP_MAX>\d+[KMG])\).*' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
+            self.G1_mixed_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[GC pause .* \(mixed\).*' + self.pause_pattern + '.*' + self.G1_heap_occupancy_pattern + '.*' + self.times_pattern, re.DOTALL)
+            self.G1_fullgc_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Full GC \([^\)]+\).*' + self.pause_pattern + '.*' + self.G1_heap_occupancy_pattern + '.*' + self.times_pattern, re.DOTALL)
         else:
             self.G1_heap_occupancy_pattern = '(?P<HEAP_BEFORE_GC>\d+[KMG])->(?P<HEAP_AFTER_GC>\d+[KMG])\((?P<HEAP_MAX>\d+[KMG])\)'
-            self.G1_pause_young_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}\].*GC\(\d+\) Pause Young .* ' + self.G1_heap_occupancy_pattern + ' ' + self.jdk9_pause_pattern)
-            self.G1_remark_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}\].*GC\(\d+\) Pause Remark ' + self.G1_heap_occupancy_pattern + ' ' + self.jdk9_pause_pattern)
-            self.G1_cleanup_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}\].*GC\(\d+\) Pause Cleanup ' + self.G1_heap_occupancy_pattern + ' ' + self.jdk9_pause_pattern)
-            self.G1_fullgc_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}\].*GC\(\d+\) Pause Full .* ' + self.G1_heap_occupancy_pattern + ' ' + self.jdk9_pause_pattern)
-            self.G1_times_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}\].*GC\(\d+\) User=(?P<USER>\d+\.\d+)s Sys=(?P<SYS>\d+\.\d+)s Real=(?P<REAL>\d+\.\d+)s')
+            # matched on the message of the line, after its decorators & GC(n)
+            self.G1_pause_young_re = compile_regex('Pause Young .* ' + self.G1_heap_occupancy_pattern + ' ' + self.jdk9_pause_pattern)
+            self.G1_remark_re = compile_regex('Pause Remark ' + self.G1_heap_occupancy_pattern + ' ' + self.jdk9_pause_pattern)
+            self.G1_cleanup_re = compile_regex('Pause Cleanup ' + self.G1_heap_occupancy_pattern + ' ' + self.jdk9_pause_pattern)
+            self.G1_fullgc_re = compile_regex('Pause Full .* ' + self.G1_heap_occupancy_pattern + ' ' + self.jdk9_pause_pattern)
+            self.G1_times_re = compile_regex('User=(?P<USER>\d+\.\d+)s Sys=(?P<SYS>\d+\.\d+)s Real=(?P<REAL>\d+\.\d+)s')
+            # gc+phases lines: phases of the pause (info), per worker phases (debug)
+            self.G1_region_size_re = compile_regex('Heap [Rr]egion [Ss]ize: (?P<REGION_SIZE>\d+)M')
+            self.G1_phase_re = compile_regex('(?:  (?P<SERIAL_PHASE>[A-Z][\w ]*): (?P<TIME>\d+\.\d+)ms$| +' + self.worker_phase_pattern + ')')
+            self.tag_dispatch = {'gc': self.jdk9_parse_pause,
+                                 'gc,cpu': self.jdk9_parse_cpu,
+                                 'gc,phases': self.jdk9_parse_phase,
+                                 'gc,heap': self.jdk9_parse_heap,
+                                 'gc,metaspace': self.jdk9_parse_heap,
+                                 'gc,init': self.jdk9_parse_heap,
+                                 'gc,age': self.jdk9_parse_age}
 
     def parse_line(self, full_line):
         if self.log_format == JDK8_FORMAT:
@@ -248,22 +729,74 @@ class G1GCLineParser(GCLineParser):
         else:
             self.jdk9_parse_line(full_line)
 
+    def check_evacuation_failure(self, full_line, match_timestamp):
+        if self.analyzer is None:
+            return
+        if full_line.find('o-space exhausted') != -1 or full_line.find('Evacuation Failure') != -1:
+            self.analyzer.add_to_space_exhausted(GCLineParser.timestamp_ms(match_timestamp))
+
     def jdk8_add_total_allocated(self, before_gc_with_suffix, after_gc_with_suffix):
-        before_gc = int(before_gc_with_suffix[:-1])
-        after_gc = int(after_gc_with_suffix[:-1])
-        before_gc_m = 0
-        after_gc_m = 0
-        if before_gc_with_suffix.endswith('G'):
-            before_gc_m = before_gc * 1024
-            after_gc_m = after_gc * 1024
-        if before_gc_with_suffix.endswith('M'):
-            before_gc_m = before_gc
-            after_gc_m = after_gc
-        if before_gc_with_suffix.endswith('K'):
-            before_gc_m = before_gc / 1024
-            after_gc_m = after_gc / 1024
-        self.total_allocated += before_gc_m - self.previous_usage
-        self.previous_usage = after_gc_m
+        self.add_allocated(GCLineParser.heap_occupancy_to_M(before_gc_with_suffix) - self.previous_usage)
+        self.previous_usage = GCLineParser.heap_occupancy_to_M(after_gc_with_suffix)
+
+    def match_phase(self, match_phase):
+        if match_phase.group('SERIAL_PHASE'):
+            return match_phase.group('SERIAL_PHASE'), float(match_phase.group('TIME')), None
+        name = match_phase.group('WORKER_PHASE')
+        if name in G1GCLineParser.IGNORED_PHASES:
+            return None
+        return name, float(match_phase.group('AVG')), float(match_phase.group('MAX'))
+
+    def jdk8_parse_phases(self, full_line, match_line):
+        # only the phases block of the record is scanned: between the pause line & the heap sizes
+        phases = []
+        if self.phase_stats is None and self.data is None:
+            return phases
+        for match_phase in self.G1_phase_re.finditer(full_line, match_line.end('PAUSE'), match_line.start('HEAP_BEFORE_GC')):
+            phase = self.match_phase(match_phase)
+            if phase is not None:
+                phases.append(phase)
+        return phases
+
+    def jdk9_parse_phase(self, log_line):
+        # gc+phases lines precede the pause line of the same GC(n)
+        gc_id = log_line.gc_id
+        if gc_id is None:
+            return
+        match_phase = self.G1_phase_re.match(log_line.message)
+        if not match_phase:
+            return
+        if gc_id != self.pending_phases_gc_id:
+            self.pending_phases = []
+            self.pending_phases_gc_id = gc_id
+        phase = self.match_phase(match_phase)
+        if phase is not None:
+            self.pending_phases.append(phase)
+
+    def take_pending_phases(self, gc_id):
+        phases = self.pending_phases if gc_id == self.pending_phases_gc_id else []
+        self.pending_phases = []
+        self.pending_phases_gc_id = None
+        return phases
+
+    def jdk8_add_generations(self, full_line, match_line, match_timestamp, pause_ms):
+        # Eden/Survivors precede the heap sizes, Metaspace follows them (Full GC)
+        generations = {}
+        match_young = self.G1_generations_re.search(full_line, match_line.end('PAUSE'), match_line.start('HEAP_BEFORE_GC'))
+        if match_young:
+            young_before_mb = GCLineParser.heap_occupancy_to_M(match_young.group('EDEN_BEFORE_GC')) + GCLineParser.heap_occupancy_to_M(match_young.group('SURVIVOR_BEFORE_GC'))
+            young_after_mb = GCLineParser.heap_occupancy_to_M(match_young.group('EDEN_AFTER_GC')) + GCLineParser.heap_occupancy_to_M(match_young.group('SURVIVOR_AFTER_GC'))
+            generations['young'] = (young_before_mb, young_after_mb)
+            generations['old'] = (GCLineParser.heap_occupancy_to_M(match_line.group('HEAP_BEFORE_GC')) - young_before_mb,
+                                  GCLineParser.heap_occupancy_to_M(match_line.group('HEAP_AFTER_GC')) - young_after_mb)
+        match_metaspace = self.G1_metaspace_re.search(full_line, match_line.end('HEAP_MAX'))
+        if match_metaspace:
+            generations['metaspace'] = (int(match_metaspace.group('METASPACE_BEFORE_GC')) / 1024, int(match_metaspace.group('METASPACE_AFTER_GC')) / 1024)
+        self.add_generations(match_timestamp, pause_ms, generations)
+
+    def stacked_phase(self, max_ms):
+        # JDK9+ per worker phases (debug) are details of the Evacuate Collection Set phase
+        return self.log_format == JDK8_FORMAT or max_ms is None
 
     def jdk8_parse_line(self, full_line):
         match_line = self.G1_minorgc_re.match(full_line)
@@ -272,20 +805,26 @@ class G1GCLineParser(GCLineParser):
             match_timestamp = self.timestamp_re.match(timestamp)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')) * 1000)
+                if full_line.find('(initial-mark)') == -1:
+                    key = 'minorgc'
+                else:
+                    key = 'initialmark'
+                if not self.accept_event(key, current_pause_ms):
+                    return
+                self.add_event(key, match_timestamp, float(match_line.group('PAUSE')) * 1000, GCLineParser.heap_occupancy_to_M(match_line.group('HEAP_AFTER_GC')))
+                self.check_evacuation_failure(full_line, match_timestamp)
+                self.add_phases(match_timestamp, self.jdk8_parse_phases(full_line, match_line))
+                self.jdk8_add_generations(full_line, match_line, match_timestamp, current_pause_ms)
+                self.jdk8_add_ages(full_line, match_timestamp)
                 before_gc = match_line.group('HEAP_BEFORE_GC')
                 after_gc = match_line.group('HEAP_AFTER_GC')
                 self.jdk8_add_total_allocated(before_gc, after_gc)
-                self.add_pause_duration(current_pause_ms)
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), GCLineParser.heap_occupancy_to_G(
                     before_gc)))
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp, current_pause_ms),
                                                                     GCLineParser.heap_occupancy_to_G(after_gc)))
                 self.add_data('max_heap', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp),
                                                                GCLineParser.heap_max_to_G(match_line.group('HEAP_MAX'))))
-                if full_line.find('(initial-mark)') == -1:
-                    key = 'minorgc'
-                else:
-                    key = 'initialmark'
                 self.add_data(key, '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), current_pause_ms))
                 self.add_cpu_times(match_line, match_timestamp)
                 self.event_count += 1
@@ -296,7 +835,9 @@ class G1GCLineParser(GCLineParser):
             match_timestamp = self.timestamp_re.match(timestamp)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')) * 1000)
-                self.add_pause_duration(current_pause_ms)
+                if not self.accept_event('finalremark', current_pause_ms):
+                    return
+                self.add_event('finalremark', match_timestamp, float(match_line.group('PAUSE')) * 1000)
                 self.add_data('finalremark', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), current_pause_ms))
                 self.add_cpu_times(match_line, match_timestamp)
                 self.event_count += 1
@@ -307,10 +848,12 @@ class G1GCLineParser(GCLineParser):
             match_timestamp = self.timestamp_re.match(timestamp)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')) * 1000)
+                if not self.accept_event('cleanup', current_pause_ms):
+                    return
+                self.add_event('cleanup', match_timestamp, float(match_line.group('PAUSE')) * 1000)
                 before_gc = match_line.group('HEAP_BEFORE_GC')
                 after_gc = match_line.group('HEAP_AFTER_GC')
                 self.jdk8_add_total_allocated(before_gc, after_gc)
-                self.add_pause_duration(current_pause_ms)
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), GCLineParser.heap_occupancy_to_G(
                     before_gc)))
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp, current_pause_ms),
@@ -329,7 +872,13 @@ class G1GCLineParser(GCLineParser):
                 before_gc = match_line.group('HEAP_BEFORE_GC')
                 after_gc = match_line.group('HEAP_AFTER_GC')
                 current_pause_ms = round(float(match_line.group('PAUSE')) * 1000)
-                self.add_pause_duration(current_pause_ms)
+                if not self.accept_event('mixed', current_pause_ms):
+                    return
+                self.add_event('mixed', match_timestamp, float(match_line.group('PAUSE')) * 1000, GCLineParser.heap_occupancy_to_M(match_line.group('HEAP_AFTER_GC')))
+                self.check_evacuation_failure(full_line, match_timestamp)
+                self.add_phases(match_timestamp, self.jdk8_parse_phases(full_line, match_line))
+                self.jdk8_add_generations(full_line, match_line, match_timestamp, current_pause_ms)
+                self.jdk8_add_ages(full_line, match_timestamp)
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), GCLineParser.heap_occupancy_to_G(
                     before_gc)))
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp, current_pause_ms),
@@ -347,9 +896,12 @@ class G1GCLineParser(GCLineParser):
             if match_timestamp:
                 pause_sec = float(match_line.group('PAUSE'))
                 current_pause_ms = round(pause_sec * 1000)
+                if not self.accept_event('fullgc', current_pause_ms):
+                    return
+                self.add_event('fullgc', match_timestamp, float(match_line.group('PAUSE')) * 1000, GCLineParser.heap_occupancy_to_M(match_line.group('HEAP_AFTER_GC')))
+                self.jdk8_add_generations(full_line, match_line, match_timestamp, current_pause_ms)
                 before_gc = match_line.group('HEAP_BEFORE_GC')
                 after_gc = match_line.group('HEAP_AFTER_GC')
-                self.add_pause_duration(current_pause_ms)
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), GCLineParser.heap_occupancy_to_G(before_gc)))
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp, current_pause_ms),
                                                                      GCLineParser.heap_occupancy_to_G(after_gc)))
@@ -360,179 +912,235 @@ class G1GCLineParser(GCLineParser):
                 self.event_count += 1
                 return
 
-    def jdk9_parse_line(self, full_line):
-        match_line = self.G1_pause_young_re.match(full_line)
+    def jdk9_parse_heap(self, log_line):
+        # region size logged once at startup (no GC(n)), spaces of each GC
+        if log_line.gc_id is None:
+            match_region_size = self.G1_region_size_re.match(log_line.message)
+            if match_region_size:
+                self.region_size_mb = int(match_region_size.group('REGION_SIZE'))
+            return
+        self.jdk9_parse_space(log_line)
+
+    def jdk9_parse_cpu(self, log_line):
+        match_line = self.G1_times_re.match(log_line.message)
+        if match_line and self.last_event_accepted:
+            match_timestamp = self.timestamp_re.match(log_line.timestamp)
+            if match_timestamp:
+                self.add_cpu_times(match_line, match_timestamp)
+
+    def jdk9_parse_pause(self, log_line):
+        message = log_line.message
+        match_line = self.G1_pause_young_re.match(message)
         if match_line:
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+            match_timestamp = self.timestamp_re.match(log_line.timestamp)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')))
+                if message.find('(Concurrent Start)') != -1:
+                    key = 'initialmark'
+                elif message.find('(Normal)') != -1:
+                    key = 'minorgc'
+                elif message.find('(Prepare Mixed)') != -1: # == cleanup
+                    key = 'cleanup'
+                elif message.find('(Mixed)') != -1:
+                    key = 'mixed'
+                else:
+                    key = 'unknown'
+                if not self.accept_event(key, current_pause_ms):
+                    return
+                self.add_event(key, match_timestamp, float(match_line.group('PAUSE')), GCLineParser.heap_occupancy_to_M(match_line.group('HEAP_AFTER_GC')))
+                self.check_evacuation_failure(message, match_timestamp)
+                self.add_phases(match_timestamp, self.take_pending_phases(log_line.gc_id))
                 before_gc = match_line.group('HEAP_BEFORE_GC')
                 after_gc = match_line.group('HEAP_AFTER_GC')
+                self.add_generations(match_timestamp, current_pause_ms, self.take_pending_generations(log_line.gc_id, GCLineParser.heap_occupancy_to_M(before_gc)))
+                self.take_pending_ages(log_line.gc_id, match_timestamp)
                 self.jdk9_add_total_allocated(before_gc, after_gc)
-                self.add_pause_duration(current_pause_ms)
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), GCLineParser.heap_occupancy_to_G(
                     before_gc)))
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp, current_pause_ms),
                                                                     GCLineParser.heap_occupancy_to_G(after_gc)))
                 self.add_data('max_heap', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp),
                                                                GCLineParser.heap_max_to_G(match_line.group('HEAP_MAX'))))
-                if full_line.find('(Concurrent Start)') != -1:
-                    key = 'initialmark'
-                elif full_line.find('(Normal)') != -1:
-                    key = 'minorgc'
-                elif full_line.find('(Prepare Mixed)') != -1: # == cleanup
-                    key = 'cleanup'
-                elif full_line.find('(Mixed)') != -1:
-                    key = 'mixed'
-                else:
-                    key = 'unknown'
                 self.add_data(key, '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), current_pause_ms))
                 self.event_count += 1
                 return
-        match_line = self.G1_remark_re.match(full_line)
+        match_line = self.G1_remark_re.match(message)
         if match_line:
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+            match_timestamp = self.timestamp_re.match(log_line.timestamp)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')))
-                self.add_pause_duration(current_pause_ms)
+                if not self.accept_event('finalremark', current_pause_ms):
+                    return
+                self.add_event('finalremark', match_timestamp, float(match_line.group('PAUSE')))
                 self.add_data('finalremark',
                               '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), current_pause_ms))
                 self.event_count += 1
                 return
-        match_line = self.G1_cleanup_re.match(full_line)
+        match_line = self.G1_cleanup_re.match(message)
         if match_line:
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+            match_timestamp = self.timestamp_re.match(log_line.timestamp)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')))
-                self.add_pause_duration(current_pause_ms)
+                if not self.accept_event('cleanup', current_pause_ms):
+                    return
+                self.add_event('cleanup', match_timestamp, float(match_line.group('PAUSE')))
                 self.add_data('cleanup',
                               '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), current_pause_ms))
                 self.event_count += 1
                 return
-        match_line = self.G1_fullgc_re.match(full_line)
+        match_line = self.G1_fullgc_re.match(message)
         if match_line:
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+            match_timestamp = self.timestamp_re.match(log_line.timestamp)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')))
-                self.add_pause_duration(current_pause_ms)
+                if not self.accept_event('fullgc', current_pause_ms):
+                    return
+                self.add_event('fullgc', match_timestamp, float(match_line.group('PAUSE')), GCLineParser.heap_occupancy_to_M(match_line.group('HEAP_AFTER_GC')))
+                self.add_generations(match_timestamp, current_pause_ms, self.take_pending_generations(log_line.gc_id, GCLineParser.heap_occupancy_to_M(match_line.group('HEAP_BEFORE_GC'))))
                 self.add_data('fullgc',
                               '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), current_pause_ms))
                 self.event_count += 1
                 return
-        match_line = self.G1_times_re.match(full_line)
-        if match_line:
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+        if message.find('To-space exhausted') != -1:
+            match_timestamp = self.timestamp_re.match(log_line.timestamp)
             if match_timestamp:
-                self.add_cpu_times(match_line, match_timestamp)
+                self.check_evacuation_failure(message, match_timestamp)
                 return
 
     def create_reporter(self):
-        return G1JSReporter(self.data)
+        return G1JSReporter(self.data, self.phase_names)
 
 
 class ShenandoahGCLineParser(GCLineParser):
+    GC_NAME = 'Shenandoah'
+    EVENT_KEYWORDS = {'initmark': ('Pause Init Mark',),
+                      'finalmark': ('Pause Final Mark',),
+                      'initupdate': ('Pause Init Update',),
+                      'finalupdate': ('Pause Final Update',),
+                      'finalevac': ('Pause Final Evac',),
+                      'degenerated': ('Pause Degenerated GC',),
+                      'fullgc': ('Pause Full',)}
+
     def __init__(self, log_format):
         super(ShenandoahGCLineParser, self).__init__(log_format)
         self.shenandoah_heap_occupancy_pattern = '(?P<HEAP_BEFORE_GC>\d+[MG])->(?P<HEAP_AFTER_GC>\d+[MG])\((?P<HEAP_MAX>\d+[MG])\)'
         if log_format == JDK8_FORMAT:
             self.shenandoah_pause_pattern = ', (?P<PAUSE>\d+\.\d+) ms\]'
-            self.shenandoah_init_mark_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Pause Init Mark.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
-            self.shenandoah_final_mark_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Pause Final Mark.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
-            self.shenandoah_init_update_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Pause Init Update.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
-            self.shenandoah_final_update_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Pause Final Update.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
-            self.shenandoah_final_evac_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Pause Final Evac.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
-            self.shenandoah_degenerated_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Pause Degenerated GC.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
-            self.shenandoah_full_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Pause Full.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
-            self.shenandoah_heap_occupancy_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Concurrent cleanup.*' + self.shenandoah_heap_occupancy_pattern + '.*', re.DOTALL)
+            self.shenandoah_init_mark_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Pause Init Mark.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
+            self.shenandoah_final_mark_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Pause Final Mark.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
+            self.shenandoah_init_update_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Pause Init Update.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
+            self.shenandoah_final_update_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Pause Final Update.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
+            self.shenandoah_final_evac_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Pause Final Evac.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
+            self.shenandoah_degenerated_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Pause Degenerated GC.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
+            self.shenandoah_full_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Pause Full.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
+            self.shenandoah_heap_occupancy_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[Concurrent cleanup.*' + self.shenandoah_heap_occupancy_pattern + '.*', re.DOTALL)
         else:
             self.shenandoah_pause_pattern = '(?P<PAUSE>\d+\.\d+)ms'
-            self.shenandoah_init_mark_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}.* GC\(\d+\) Pause Init Mark.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
-            self.shenandoah_final_mark_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}.* GC\(\d+\) Pause Final Mark.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
-            self.shenandoah_init_update_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}.* GC\(\d+\) Pause Init Update.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
-            self.shenandoah_final_update_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}.* GC\(\d+\) Pause Final Update.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
-            self.shenandoah_final_evac_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}.* GC\(\d+\) Pause Final Evac.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
-            self.shenandoah_degenerated_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}.* GC\(\d+\) Pause Degenerated GC.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
-            self.shenandoah_full_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}.* GC\(\d+\) .*\[Pause Full.*' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
-            self.shenandoah_heap_occupancy_re = re.compile('\[(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}.* GC\(\d+\) Concurrent cleanup ' + self.shenandoah_heap_occupancy_pattern + '.*', re.DOTALL)
-
+            # matched on the message of the line, after its decorators & GC(n)
+            self.shenandoah_init_mark_re = compile_regex('Pause Init Mark.* ' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
+            self.shenandoah_final_mark_re = compile_regex('Pause Final Mark.* ' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
+            self.shenandoah_init_update_re = compile_regex('Pause Init Update.* ' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
+            self.shenandoah_final_update_re = compile_regex('Pause Final Update.* ' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
+            self.shenandoah_final_evac_re = compile_regex('Pause Final Evac.* ' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
+            self.shenandoah_degenerated_re = compile_regex('Pause Degenerated GC.* ' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
+            self.shenandoah_full_re = compile_regex('Pause Full.* ' + self.shenandoah_pause_pattern + '.*', re.DOTALL)
+            self.shenandoah_heap_occupancy_re = compile_regex('Concurrent cleanup ' + self.shenandoah_heap_occupancy_pattern + '.*', re.DOTALL)
+            self.tag_dispatch = {'gc': self.jdk9_parse_pause}
 
     def parse_line(self, full_line):
-        self.jdk8_parse_line(full_line)
+        if self.log_format == JDK8_FORMAT:
+            self.jdk8_parse_line(full_line)
+        else:
+            self.jdk9_parse_line(full_line)
 
-    def jdk8_parse_line(self, full_line):
+    def jdk9_parse_pause(self, log_line):
+        self.jdk8_parse_line(log_line.message, log_line)
+
+    def jdk8_parse_line(self, full_line, log_line=None):
+        # JDK9+: full_line is the message of log_line, timed by its decorators
         match_line = self.shenandoah_init_mark_re.match(full_line)
         if match_line:  # Shenandoah Init Mark
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+            match_timestamp = self.match_record_timestamp(match_line, log_line)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')))
+                if not self.accept_event('initmark', current_pause_ms):
+                    return
+                self.add_event('initmark', match_timestamp, float(match_line.group('PAUSE')))
                 self.add_data('initmark', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), current_pause_ms))
                 self.event_count += 1
                 return
         match_line = self.shenandoah_final_mark_re.match(full_line)
         if match_line:  # Shenandoah Final Mark
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+            match_timestamp = self.match_record_timestamp(match_line, log_line)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')))
+                if not self.accept_event('finalmark', current_pause_ms):
+                    return
+                self.add_event('finalmark', match_timestamp, float(match_line.group('PAUSE')))
                 self.add_data('finalmark', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), current_pause_ms))
                 self.event_count += 1
                 return
         match_line = self.shenandoah_init_update_re.match(full_line)
         if match_line:  # Shenandoah Init Update
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+            match_timestamp = self.match_record_timestamp(match_line, log_line)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')))
+                if not self.accept_event('initupdate', current_pause_ms):
+                    return
+                self.add_event('initupdate', match_timestamp, float(match_line.group('PAUSE')))
                 self.add_data('initupdate', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), current_pause_ms))
                 self.event_count += 1
                 return
         match_line = self.shenandoah_final_update_re.match(full_line)
         if match_line:  # Shenandoah Final Update
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+            match_timestamp = self.match_record_timestamp(match_line, log_line)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')))
+                if not self.accept_event('finalupdate', current_pause_ms):
+                    return
+                self.add_event('finalupdate', match_timestamp, float(match_line.group('PAUSE')))
                 self.add_data('finalupdate', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), current_pause_ms))
                 self.event_count += 1
                 return
         match_line = self.shenandoah_final_evac_re.match(full_line)
         if match_line:  # Shenandoah Final Evac
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+            match_timestamp = self.match_record_timestamp(match_line, log_line)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')))
+                if not self.accept_event('finalevac', current_pause_ms):
+                    return
+                self.add_event('finalevac', match_timestamp, float(match_line.group('PAUSE')))
                 self.add_data('finalevac', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), current_pause_ms))
                 self.event_count += 1
                 return
         match_line = self.shenandoah_degenerated_re.match(full_line)
         if match_line:  # Shenandoah Degenerated GC
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+            match_timestamp = self.match_record_timestamp(match_line, log_line)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')))
+                if not self.accept_event('degenerated', current_pause_ms):
+                    return
+                self.add_event('degenerated', match_timestamp, float(match_line.group('PAUSE')))
                 self.add_data('degenerated', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(current_pause_ms/1000.0,3)))
                 self.event_count += 1
                 return
         match_line = self.shenandoah_full_re.match(full_line)
         if match_line:  # Shenandoah Full GC
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+            match_timestamp = self.match_record_timestamp(match_line, log_line)
             if match_timestamp:
                 current_pause_ms = round(float(match_line.group('PAUSE')))
+                if not self.accept_event('fullgc', current_pause_ms):
+                    return
+                self.add_event('fullgc', match_timestamp, float(match_line.group('PAUSE')))
                 self.add_data('fullgc', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(current_pause_ms/1000.0, 3)))
                 self.event_count += 1
                 return
         match_line = self.shenandoah_heap_occupancy_re.match(full_line)
         if match_line:  # Shenandoah Concurrent cleanup occupancy
-            timestamp = match_line.group('TIMESTAMP')
-            match_timestamp = self.timestamp_re.match(timestamp)
+            match_timestamp = self.match_record_timestamp(match_line, log_line)
             if match_timestamp:
+                if self.analyzer is not None:
+                    self.analyzer.add_heap_after(GCLineParser.timestamp_ms(match_timestamp), GCLineParser.heap_occupancy_to_M(match_line.group('HEAP_AFTER_GC')))
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), GCLineParser.heap_occupancy_to_G(match_line.group('HEAP_BEFORE_GC'))))
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp, 10), GCLineParser.heap_occupancy_to_G(match_line.group('HEAP_AFTER_GC'))))
                 self.add_data('max_heap', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), GCLineParser.heap_max_to_G(match_line.group('HEAP_MAX'))))
@@ -543,46 +1151,163 @@ class ShenandoahGCLineParser(GCLineParser):
 
 
 class CMSGCLineParser(GCLineParser):
+    GC_NAME = 'CMS'
+    EVENT_KEYWORDS = {'minorgc': ('[ParNew',),
+                      'initialmark': ('CMS Initial Mark',),
+                      'finalremark': ('CMS Final Remark',),
+                      'fullgc': ('[CMS: ', '(concurrent mode ')}
 
     def __init__(self, log_format):
         super(CMSGCLineParser, self).__init__(log_format)
-        self.CMS_initalmark_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[GC \(CMS Initial Mark\) .*\[1 CMS-initial-mark: [^\]]+\] (?P<HEAP_BEFORE_GC>\d+)K\((?P<HEAP_MAX>\d+)K\)' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
-        self.CMS_finalremark_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[GC \(CMS Final Remark\) .*\[1 CMS-remark: [^\]]+\] (?P<HEAP_BEFORE_GC>\d+)K\((?P<HEAP_MAX>\d+)K\)' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
-        self.CMS_fullgc_re = re.compile('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[CMS: [^\]]+\] (?P<HEAP_BEFORE_GC>\d+)K->(?P<HEAP_AFTER_GC>\d+)K\((?P<HEAP_MAX>\d+)K\), \[Metaspace: [^\]]+\]' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
+        self.concurrent_names = []
+        self.concurrent_stats = StatsEngine()
+        self.cycle_start_ms = None
+        self.CMS_initalmark_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[GC \(CMS Initial Mark\) .*\[1 CMS-initial-mark: (?P<OLD_GC>\d+)K\(\d+K\)\] (?P<HEAP_BEFORE_GC>\d+)K\((?P<HEAP_MAX>\d+)K\)' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
+        self.CMS_finalremark_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[GC \(CMS Final Remark\) .*\[1 CMS-remark: (?P<OLD_GC>\d+)K\(\d+K\)\] (?P<HEAP_BEFORE_GC>\d+)K\((?P<HEAP_MAX>\d+)K\)' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
+        self.CMS_parnew_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[ParNew.*?: (?P<YOUNG_BEFORE_GC>\d+)K->(?P<YOUNG_AFTER_GC>\d+)K\(\d+K\), \d+\.\d+ secs\] (?P<HEAP_BEFORE_GC>\d+)K->(?P<HEAP_AFTER_GC>\d+)K\((?P<HEAP_MAX>\d+)K\)' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
+        # old generation collections: Full GC, promotion failed & concurrent mode failure/interrupted
+        self.CMS_fullgc_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: .*\[CMS.*?: (?P<OLD_BEFORE_GC>\d+)K->(?P<OLD_AFTER_GC>\d+)K\(\d+K\), \d+\.\d+ secs\] (?P<HEAP_BEFORE_GC>\d+)K->(?P<HEAP_AFTER_GC>\d+)K\((?P<HEAP_MAX>\d+)K\), \[Metaspace: (?P<METASPACE_BEFORE_GC>\d+)K->(?P<METASPACE_AFTER_GC>\d+)K\(\d+K\)\]' + self.pause_pattern + '.*' + self.times_pattern, re.DOTALL)
+        self.CMS_concurrent_re = compile_regex('(?P<TIMESTAMP>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: (?:\d+\.\d+: )?\[CMS-concurrent-(?P<PHASE>[a-z-]+): (?P<CPU>\d+\.\d+)/(?P<WALL>\d+\.\d+) secs\]')
+        # first keyword found in the record selects the only regex run on it
+        self.dispatch = (('CMS Initial Mark', self.parse_initial_mark),
+                         ('CMS Final Remark', self.parse_final_remark),
+                         ('[CMS: ', self.parse_fullgc),
+                         ('(concurrent mode ', self.parse_fullgc),
+                         ('[ParNew', self.parse_parnew),
+                         ('[CMS-concurrent-', self.parse_concurrent))
 
     def parse_line(self, full_line):
+        for keyword, parse_record in self.dispatch:
+            if keyword in full_line:
+                parse_record(full_line)
+                return
+
+    def parse_initial_mark(self, full_line):
         match_line = self.CMS_initalmark_re.match(full_line)
         if match_line:  # CMS initial mark
             timestamp = match_line.group('TIMESTAMP')
             match_timestamp = self.timestamp_re.match(timestamp)
             if match_timestamp:
+                self.cycle_start_ms = GCLineParser.timestamp_ms(match_timestamp)
+                pause_ms = round(float(match_line.group('PAUSE'))*1000)
+                if not self.accept_event('initialmark', pause_ms):
+                    return
+                self.add_event('initialmark', match_timestamp, float(match_line.group('PAUSE')) * 1000)
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(int(match_line.group('HEAP_BEFORE_GC'))/1048576, 2)))
-                self.add_data('initialmark', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(float(match_line.group('PAUSE'))*1000)))
+                old_mb = int(match_line.group('OLD_GC')) / 1024
+                young_mb = int(match_line.group('HEAP_BEFORE_GC')) / 1024 - old_mb
+                self.add_generations(match_timestamp, pause_ms, {'young': (young_mb, young_mb), 'old': (old_mb, old_mb)})
+                self.add_data('initialmark', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), pause_ms))
                 self.add_cpu_times(match_line, match_timestamp)
                 self.event_count += 1
-                return
+
+    def parse_final_remark(self, full_line):
         match_line = self.CMS_finalremark_re.match(full_line)
         if match_line:  # CMS final remark
             timestamp = match_line.group('TIMESTAMP')
             match_timestamp = self.timestamp_re.match(timestamp)
             if match_timestamp:
+                pause_ms = round(float(match_line.group('PAUSE'))*1000)
+                if not self.accept_event('finalremark', pause_ms):
+                    return
+                self.add_event('finalremark', match_timestamp, float(match_line.group('PAUSE')) * 1000)
                 self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(int(match_line.group('HEAP_BEFORE_GC'))/1048576, 2)))
-                self.add_data('finalremark', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(float(match_line.group('PAUSE'))*1000)))
+                old_mb = int(match_line.group('OLD_GC')) / 1024
+                young_mb = int(match_line.group('HEAP_BEFORE_GC')) / 1024 - old_mb
+                self.add_generations(match_timestamp, pause_ms, {'young': (young_mb, young_mb), 'old': (old_mb, old_mb)})
+                self.add_data('finalremark', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), pause_ms))
                 self.add_cpu_times(match_line, match_timestamp)
                 self.event_count += 1
-                return
+
+    def parse_parnew(self, full_line):
+        match_line = self.CMS_parnew_re.match(full_line)
+        if match_line:  # ParNew young GC
+            timestamp = match_line.group('TIMESTAMP')
+            match_timestamp = self.timestamp_re.match(timestamp)
+            if match_timestamp:
+                pause_ms = round(float(match_line.group('PAUSE')) * 1000)
+                if not self.accept_event('minorgc', pause_ms):
+                    return
+                self.add_event('minorgc', match_timestamp, float(match_line.group('PAUSE')) * 1000, int(match_line.group('HEAP_AFTER_GC')) / 1024)
+                young_before_k = int(match_line.group('YOUNG_BEFORE_GC'))
+                young_after_k = int(match_line.group('YOUNG_AFTER_GC'))
+                before_gc_k = int(match_line.group('HEAP_BEFORE_GC'))
+                after_gc_k = int(match_line.group('HEAP_AFTER_GC'))
+                self.jdk8_add_total_allocated(before_gc_k, after_gc_k)
+                self.add_promoted(young_before_k, young_after_k, before_gc_k, after_gc_k)
+                self.jdk8_add_ages(full_line, match_timestamp)
+                self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), GCLineParser.heap_occupancy_K_to_G(before_gc_k)))
+                self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp, pause_ms), GCLineParser.heap_occupancy_K_to_G(after_gc_k)))
+                self.add_data('max_heap', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(int(match_line.group('HEAP_MAX'))/1048576, 2)))
+                self.add_generations(match_timestamp, pause_ms, {'young': (young_before_k / 1024, young_after_k / 1024),
+                                                                 'old': ((before_gc_k - young_before_k) / 1024, (after_gc_k - young_after_k) / 1024)})
+                self.add_data('minorgc', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), pause_ms))
+                self.add_cpu_times(match_line, match_timestamp)
+                self.event_count += 1
+
+    def parse_fullgc(self, full_line):
+        if '[CMS-concurrent-' in full_line:
+            # the concurrent phase interrupted by a concurrent mode failure ends within its record
+            self.parse_concurrent(full_line)
         match_line = self.CMS_fullgc_re.match(full_line)
         if match_line:  # CMS Full GC
             timestamp = match_line.group('TIMESTAMP')
             match_timestamp = self.timestamp_re.match(timestamp)
             if match_timestamp:
-                self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(int(match_line.group('HEAP_BEFORE_GC'))/1048576, 2)))
-                self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(int(match_line.group('HEAP_AFTER_GC'))/1048576, 2)))
+                pause_sec = float(match_line.group('PAUSE'))
+                if not self.accept_event('fullgc', round(pause_sec * 1000)):
+                    return
+                self.add_event('fullgc', match_timestamp, float(match_line.group('PAUSE')) * 1000, int(match_line.group('HEAP_AFTER_GC')) / 1024)
+                self.check_failures(full_line, match_timestamp)
+                old_before_k = int(match_line.group('OLD_BEFORE_GC'))
+                old_after_k = int(match_line.group('OLD_AFTER_GC'))
+                before_gc_k = int(match_line.group('HEAP_BEFORE_GC'))
+                after_gc_k = int(match_line.group('HEAP_AFTER_GC'))
+                self.jdk8_add_total_allocated(before_gc_k, after_gc_k)
+                self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(before_gc_k/1048576, 2)))
+                self.add_data('heap_occupancy', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(after_gc_k/1048576, 2)))
                 self.add_data('max_heap', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), math.ceil(int(match_line.group('HEAP_MAX')) / 1048576)))
-                self.add_data('fullgc', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(float(match_line.group('PAUSE')), 3)))
+                self.add_generations(match_timestamp, round(pause_sec * 1000), {
+                    'young': ((before_gc_k - old_before_k) / 1024, (after_gc_k - old_after_k) / 1024),
+                    'old': (old_before_k / 1024, old_after_k / 1024),
+                    'metaspace': (int(match_line.group('METASPACE_BEFORE_GC')) / 1024, int(match_line.group('METASPACE_AFTER_GC')) / 1024)})
+                self.add_data('fullgc', '[{},{}],\n'.format(GCLineParser.format_timestamp(match_timestamp), round(pause_sec, 3)))
                 self.add_cpu_times(match_line, match_timestamp)
                 self.event_count += 1
-                return
+
+    def check_failures(self, full_line, match_timestamp):
+        if full_line.find('concurrent mode failure') != -1:
+            self.cycle_start_ms = None  # the concurrent cycle is aborted
+            if self.analyzer is not None:
+                self.analyzer.add_concurrent_mode_failure(GCLineParser.timestamp_ms(match_timestamp))
+        if full_line.find('promotion failed') != -1 and self.analyzer is not None:
+            self.analyzer.add_promotion_failed(GCLineParser.timestamp_ms(match_timestamp))
+
+    def parse_concurrent(self, full_line):
+        match_line = self.CMS_concurrent_re.search(full_line)
+        if match_line:  # end of a concurrent phase
+            match_timestamp = self.timestamp_re.match(match_line.group('TIMESTAMP'))
+            if match_timestamp:
+                phase = match_line.group('PHASE')
+                time_ms = GCLineParser.timestamp_ms(match_timestamp)
+                wall_ms = float(match_line.group('WALL')) * 1000
+                self.add_concurrent(phase, time_ms, wall_ms)
+                if phase == 'reset' and self.cycle_start_ms is not None:
+                    self.add_concurrent('cycle', time_ms, time_ms + wall_ms - self.cycle_start_ms)
+                    self.cycle_start_ms = None
+
+    def add_concurrent(self, name, time_ms, wall_ms):
+        if name not in self.concurrent_names:
+            self.concurrent_names.append(name)
+        if self.concurrent_stats is not None:
+            self.concurrent_stats.add_event(name, time_ms, wall_ms)
+
+    def compute_stats(self, percentiles=None):
+        stats = super(CMSGCLineParser, self).compute_stats(percentiles)
+        if self.concurrent_stats is not None and self.concurrent_stats.pauses:
+            concurrent_stats = self.concurrent_stats.compute(percentiles)['kinds']
+            stats['concurrent'] = [(name, concurrent_stats[name]) for name in self.concurrent_names]
+        return stats
 
     def create_reporter(self):
         return CMSJSReporter(self.data)
@@ -591,23 +1316,73 @@ class CMSGCLineParser(GCLineParser):
 class JSReporter(object):
     def __init__(self, data):
         self.data = data
-
-    def format_data_serie(self, var_format, data_name):
-        return var_format.format(''.join(self.data.get(data_name, [])))
+        # TileWriter of the series too large to be loaded at once, None to write all series in the data file
+        self.tiles = None
+        # EmbeddedSeriesWriter of the series of a single file report, None to write them in the data file
+        self.embedded = None
+
+    def write_data_serie(self, data_file, var_name, data_name, tiled=True):
+        # streamed by chunks of points, never joining the whole serie
+        values = self.data.get(data_name, [])
+        if tiled and self.tiles is not None and self.tiles.write_serie(var_name, values):
+            data_file.write('var {} = []\n'.format(var_name))
+            return
+        if tiled and self.embedded is not None and self.embedded.write_serie(var_name, values):
+            data_file.write('var {} = []\n'.format(var_name))
+            return
+        data_file.write('var {} = ['.format(var_name))
+        for idx in range(0, len(values), WRITE_CHUNK_POINTS):
+            data_file.write(''.join(values[idx:idx + WRITE_CHUNK_POINTS]))
+        data_file.write(']\n')
+
+    def has_data(self, data_name):
+        return len(self.data.get(data_name, ())) > 0
+
+    def stack_data_series(self, var_names, data_names):
+        # the stacked series of a chart are decimated at the same points when written as tiles
+        if self.tiles is not None:
+            self.tiles.stack_series(var_names, [self.data[data_name] for data_name in data_names])
 
     def write(self, data_file):
-        data_file.write(self.format_data_serie('var data_serie_heap = [{}]\n', 'heap_occupancy'))
-        data_file.write(self.format_data_serie('var data_serie_heapmax = [{}]\n', 'max_heap'))
-        data_file.write(self.format_data_serie('var data_serie_minorgc = [{}]\n', 'minorgc'))
-        data_file.write(self.format_data_serie('var data_serie_fullgc = [{}]\n', 'fullgc'))
+        self.write_data_serie(data_file, 'data_serie_heap', 'heap_occupancy')
+        self.write_data_serie(data_file, 'data_serie_heapmax', 'max_heap')
+        self.write_data_serie(data_file, 'data_serie_minorgc', 'minorgc')
+        self.write_data_serie(data_file, 'data_serie_fullgc', 'fullgc')
         # Times
-        data_file.write(self.format_data_serie('var data_serie_user = [{}]\n', 'user'))
-        data_file.write(self.format_data_serie('var data_serie_sys = [{}]\n', 'sys'))
-        data_file.write(self.format_data_serie('var data_serie_real = [{}]\n', 'real'))
+        self.write_data_serie(data_file, 'data_serie_user', 'user')
+        self.write_data_serie(data_file, 'data_serie_sys', 'sys')
+        self.write_data_serie(data_file, 'data_serie_real', 'real')
+        # Generations
+        generations = [generation for generation in HEAP_GENERATIONS if self.has_data(generation + '_occupancy')]
+        self.stack_data_series(['data_serie_' + generation for generation in generations],
+                               [generation + '_occupancy' for generation in generations])
+        for generation in GENERATIONS:
+            self.write_data_serie(data_file, 'data_serie_' + generation, generation + '_occupancy')
+        # Tenuring
+        survival_series = []
+        for age in range(1, MAX_AGE + 1):
+            serie_key = 'survival_age_{}'.format(age)
+            if self.has_data(serie_key):
+                self.write_data_serie(data_file, 'data_serie_' + serie_key, serie_key)
+                survival_series.append(SERIE_PERCENT_FORMAT.format('age {}'.format(age), serie_key))
+        data_file.write('var survival_series = [{}]\n'.format(', '.join(survival_series)))
+        # Anomalies
+        self.write_data_serie(data_file, 'data_serie_heap_floor', 'heap_floor')
+        self.write_data_serie(data_file, 'data_annotation_bands', 'annotation_bands', tiled=False)
+        self.write_data_serie(data_file, 'data_annotation_lines', 'annotation_lines', tiled=False)
+        # Cpu efficiency
+        self.write_data_serie(data_file, 'data_serie_blocked', 'blocked', tiled=False)
 
     def build_series(self):
         pass
 
+    def build_pause_series(self):
+        # series of the pause chart: the pauses of the GC, then the pauses most blocked by the OS
+        series = self.build_series()
+        if self.has_data('blocked'):
+            series = series + ', ' + SERIE_BLOCKED if series != '' else SERIE_BLOCKED
+        return series
+
 
 class ParallelJSReporter(JSReporter):
     def __init__(self, data):
@@ -615,11 +1390,9 @@ class ParallelJSReporter(JSReporter):
 
     def build_series(self):
         series = ''
-        minorgc_str = ''.join(self.data.get('minorgc', []))
-        if minorgc_str != '':
+        if self.has_data('minorgc'):
             series = series + SERIE_MS_FORMAT.format('minor GC', 'minorgc')
-        fullgc_str = ''.join(self.data.get('fullgc', []))
-        if fullgc_str != '':
+        if self.has_data('fullgc'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_S_FORMAT.format('Full GC', 'fullgc')
@@ -627,45 +1400,50 @@ class ParallelJSReporter(JSReporter):
 
 
 class G1JSReporter(JSReporter):
-    def __init__(self, data):
+    def __init__(self, data, phase_names=()):
         super(G1JSReporter, self).__init__(data)
+        self.phase_names = phase_names
 
     def write(self, data_file):
         super(G1JSReporter, self).write(data_file)
         # CMS/G1
-        data_file.write(self.format_data_serie('var data_serie_initialmark = [{}]\n', 'initialmark'))
-        data_file.write(self.format_data_serie('var data_serie_finalremark = [{}]\n', 'finalremark'))
+        self.write_data_serie(data_file, 'data_serie_initialmark', 'initialmark')
+        self.write_data_serie(data_file, 'data_serie_finalremark', 'finalremark')
         # G1
-        data_file.write(self.format_data_serie('var data_serie_cleanup = [{}]\n', 'cleanup'))
-        data_file.write(self.format_data_serie('var data_serie_mixed = [{}]\n', 'mixed'))
+        self.write_data_serie(data_file, 'data_serie_cleanup', 'cleanup')
+        self.write_data_serie(data_file, 'data_serie_mixed', 'mixed')
+        # G1 phases
+        serie_keys = [phase_serie_key(name) for name in self.phase_names if self.has_data(phase_serie_key(name))]
+        self.stack_data_series(['data_serie_' + serie_key for serie_key in serie_keys], serie_keys)
+        phase_series = []
+        for name in self.phase_names:
+            serie_key = phase_serie_key(name)
+            if self.has_data(serie_key):
+                self.write_data_serie(data_file, 'data_serie_' + serie_key, serie_key)
+                phase_series.append(SERIE_PHASE_FORMAT.format(name, serie_key))
+        data_file.write('var phase_series = [{}]\n'.format(', '.join(phase_series)))
 
     def build_series(self):
         series = ''
-        minorgc_str = ''.join(self.data.get('minorgc', []))
-        if minorgc_str != '':
+        if self.has_data('minorgc'):
             series = series + SERIE_MS_FORMAT.format('minor GC', 'minorgc')
-        mixed_str = ''.join(self.data.get('mixed', []))
-        if mixed_str != '':
+        if self.has_data('mixed'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_MS_FORMAT.format('mixed', 'mixed')
-        initialmark_str = ''.join(self.data.get('initialmark', []))
-        if initialmark_str != '':
+        if self.has_data('initialmark'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_MS_FORMAT.format('initial mark', 'initialmark')
-        finalremark_str = ''.join(self.data.get('finalremark', []))
-        if finalremark_str != '':
+        if self.has_data('finalremark'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_MS_FORMAT.format('final remark', 'finalremark')
-        cleanup_str = ''.join(self.data.get('cleanup', []))
-        if cleanup_str != '':
+        if self.has_data('cleanup'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_MS_FORMAT.format('cleanup', 'cleanup')
-        fullgc_str = ''.join(self.data.get('fullgc', []))
-        if fullgc_str != '':
+        if self.has_data('fullgc'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_S_FORMAT.format('Full GC', 'fullgc')
@@ -678,42 +1456,36 @@ class ShenandoahJSReporter(JSReporter):
 
     def write(self, data_file):
         super(ShenandoahJSReporter, self).write(data_file)
-        data_file.write(self.format_data_serie('var data_serie_init_mark = [{}]\n', 'initmark'))
-        data_file.write(self.format_data_serie('var data_serie_final_mark = [{}]\n', 'finalmark'))
-        data_file.write(self.format_data_serie('var data_serie_init_update = [{}]\n', 'initupdate'))
-        data_file.write(self.format_data_serie('var data_serie_final_update = [{}]\n', 'finalupdate'))
-        data_file.write(self.format_data_serie('var data_serie_final_evac = [{}]\n', 'finalevac'))
-        data_file.write(self.format_data_serie('var data_serie_degenerated = [{}]\n', 'degenerated'))
+        self.write_data_serie(data_file, 'data_serie_init_mark', 'initmark')
+        self.write_data_serie(data_file, 'data_serie_final_mark', 'finalmark')
+        self.write_data_serie(data_file, 'data_serie_init_update', 'initupdate')
+        self.write_data_serie(data_file, 'data_serie_final_update', 'finalupdate')
+        self.write_data_serie(data_file, 'data_serie_final_evac', 'finalevac')
+        self.write_data_serie(data_file, 'data_serie_degenerated', 'degenerated')
 
     def build_series(self):
         series = ''
-        initmark_str = ''.join(self.data.get('initmark', []))
-        if initmark_str != '':
+        if self.has_data('initmark'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_MS_FORMAT.format('Init Mark', 'init_mark')
-        finalmark_str = ''.join(self.data.get('finalmark', []))
-        if finalmark_str != '':
+        if self.has_data('finalmark'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_MS_FORMAT.format('Final Mark', 'final_mark')
-        initupdate_str = ''.join(self.data.get('initupdate', []))
-        if initupdate_str != '':
+        if self.has_data('initupdate'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_MS_FORMAT.format('Init Update', 'init_update')
-        finalupdate_str = ''.join(self.data.get('finalupdate', []))
-        if finalupdate_str != '':
+        if self.has_data('finalupdate'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_MS_FORMAT.format('Final Update', 'final_update')
-        finalevac_str = ''.join(self.data.get('finalevac', []))
-        if finalevac_str != '':
+        if self.has_data('finalevac'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_MS_FORMAT.format('Final Evac', 'final_evac')
-        degenerated_str = ''.join(self.data.get('degenerated', []))
-        if degenerated_str != '':
+        if self.has_data('degenerated'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_S_FORMAT.format('Degenerated GC', 'degenerated')
@@ -727,175 +1499,875 @@ class CMSJSReporter(JSReporter):
     def write(self, data_file):
         super(CMSJSReporter, self).write(data_file)
         # CMS/G1
-        data_file.write(self.format_data_serie('var data_serie_initialmark = [{}]\n', 'initialmark'))
-        data_file.write(self.format_data_serie('var data_serie_finalremark = [{}]\n', 'finalremark'))
+        self.write_data_serie(data_file, 'data_serie_initialmark', 'initialmark')
+        self.write_data_serie(data_file, 'data_serie_finalremark', 'finalremark')
 
     def build_series(self):
         series = ''
-        minorgc_str = ''.join(self.data.get('minorgc', []))
-        if minorgc_str != '':
+        if self.has_data('minorgc'):
             series = series + SERIE_MS_FORMAT.format('minor GC', 'minorgc')
-        initialmark_str = ''.join(self.data.get('initialmark', []))
-        if initialmark_str != '':
+        if self.has_data('initialmark'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_MS_FORMAT.format('initial mark', 'initialmark')
-        finalremark_str = ''.join(self.data.get('finalremark', []))
-        if finalremark_str != '':
+        if self.has_data('finalremark'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_MS_FORMAT.format('final remark', 'finalremark')
-        fullgc_str = ''.join(self.data.get('fullgc', []))
-        if fullgc_str != '':
+        if self.has_data('fullgc'):
             if series != '':
                 series = series + ', '
             series = series + SERIE_S_FORMAT.format('Full GC', 'fullgc')
         return series
 
 
-def parse(args, gclog_file):
-
-    def detect_gc_type(line):
-        if args.gc == "Parallel":
-            return PARALLEL_GC
-        if args.gc == "CMS":
-            return CMS_GC
-        if args.gc == "G1":
-            return G1_GC
-        if args.gc == "Shenandoah":
-            return SHENANDOAH_GC
-        idx = line.find('[PSYoungGen')
-        if  idx != -1:
-            print("Detected Parallel GC with line: " + line[:idx+len('[PSYoungGen')])
-            return PARALLEL_GC
-        idx = line.find('Using Parallel')
-        if  idx != -1:
-            print("Detected Parallel GC with line: " + line[:idx+len('[PSYoungGen')])
-            return PARALLEL_GC
-        idx = line.find('[ParNew')
-        if idx != -1:
-            print("Detected CMS GC with line: " + line[:idx+len('[ParNew')])
-            return CMS_GC
-        idx = line.find('G1 Evacuation Pause')
-        if idx != -1:
-            print("Detected G1 GC with line: " + line[:idx+len('G1 Evacuation Pause')])
-            return G1_GC
-        idx = line.find('[Pause ')
-        if idx == -1:
-            idx = line.find('Using Shenandoah')
-        if idx != -1:
-            print("Detected Shenandoah GC with line: " + line[:idx+len('Using Shenandoah')])
-            return SHENANDOAH_GC
-        return None
-
-    def detect_log_format(line):
-        jdk9_datetime_re = re.compile('^\[\d{4}-\d{2}-\d{2}T')
-        if jdk9_datetime_re.match(line):
-            print("Format: JDK9+")
-            return JDK9_FORMAT
-        jdk8_datetime_re = re.compile('^\d{4}-\d{2}-\d{2}T')
-        if jdk8_datetime_re.match(line):
-            print("Format: JDK8")
-            return JDK8_FORMAT
-        return None
-
-    def create_parser(gc_type, log_format):
-        if gc_type == PARALLEL_GC:
-            return ParallelGCParser(log_format)
-        if gc_type == CMS_GC:
-            return CMSGCLineParser(log_format)
-        if gc_type == G1_GC:
-            return G1GCLineParser(log_format)
-        if gc_type == SHENANDOAH_GC:
-            return ShenandoahGCLineParser(log_format)
-        return None
+def info(message):
+    if info_output is not None:
+        print(message, file=info_output)
+
+
+def compile_regex(pattern, flags=0):
+    # compiled once per process, when a parser for the GC type & log format is first needed
+    key = (pattern, flags)
+    regex = regex_cache.get(key)
+    if regex is None:
+        regex = re.compile(pattern, flags)
+        regex_cache[key] = regex
+    return regex
+
+
+def detect_gc_type(line, gc=None):
+    if gc is not None:
+        return GC_TYPES.get(gc)
+    idx = line.find('[PSYoungGen')
+    if  idx != -1:
+        info("Detected Parallel GC with line: " + line[:idx+len('[PSYoungGen')])
+        return PARALLEL_GC
+    idx = line.find('Using Parallel')
+    if  idx != -1:
+        info("Detected Parallel GC with line: " + line[:idx+len('[PSYoungGen')])
+        return PARALLEL_GC
+    idx = line.find('[ParNew')
+    if idx != -1:
+        info("Detected CMS GC with line: " + line[:idx+len('[ParNew')])
+        return CMS_GC
+    idx = line.find('G1 Evacuation Pause')
+    if idx != -1:
+        info("Detected G1 GC with line: " + line[:idx+len('G1 Evacuation Pause')])
+        return G1_GC
+    idx = line.find('[Pause ')
+    if idx == -1:
+        idx = line.find('Using Shenandoah')
+    if idx != -1:
+        info("Detected Shenandoah GC with line: " + line[:idx+len('Using Shenandoah')])
+        return SHENANDOAH_GC
+    return None
+
+
+def detect_log_format(line):
+    if split_decorators(line) is not None:
+        info("Format: JDK9+")
+        return JDK9_FORMAT
+    if compile_regex('^\d{4}-\d{2}-\d{2}T').match(line):
+        info("Format: JDK8")
+        return JDK8_FORMAT
+    return None
+
+
+def create_parser(gc_type, log_format):
+    if gc_type == PARALLEL_GC:
+        return ParallelGCParser(log_format)
+    if gc_type == CMS_GC:
+        return CMSGCLineParser(log_format)
+    if gc_type == G1_GC:
+        return G1GCLineParser(log_format)
+    if gc_type == SHENANDOAH_GC:
+        return ShenandoahGCLineParser(log_format)
+    return None
+
+
+def configure_parser(parser, events=None, min_pause=None, listener=None, collect=True, sizing=False):
+    parser.set_event_filter(events, min_pause)
+    parser.listener = listener
+    if sizing:
+        parser.sizing = SizingAnalyzer()
+    if not collect:
+        parser.data = None
+        parser.stats = None
+        parser.phase_stats = None
+        parser.concurrent_stats = None
+        parser.tenuring = None
+        parser.cpu = None
+        parser.analyzer = None
+
+
+def iter_parse(gclog_file, gc=None, from_time=None, to_time=None, events=None, min_pause=None, start_offset=0,
+               listener=None, collect=True, sizing=False):
+    """Parses gclog_file record by record, yielding the parser (None until GC type & log format are detected)
+
+    listener is called with each GCEvent parsed. Without collect, the parser keeps neither chart series
+    nor stats, only the events passed to the listener. With sizing, the parser records the allocation & GCs
+    replayed by parser.sizing.
+    """
+
+    def read_records():
+        # yields (record, JDK9+ line split into its decorators or None, in time window)
+        full_line = ''
+        skip = False
+        for line in gclog_file:
+            log_line = split_decorators(line)
+            if log_line is not None:
+                # JDK9+: a record per line, lines of a GC grouped by the parser on their GC(n)
+                if full_line != '':
+                    yield full_line, None, not skip
+                    full_line = ''
+                if window is not None:
+                    record_ms = window.record_ms(log_line.timestamp + (log_line.zone or ''))
+                    if window.is_past(record_ms):
+                        return
+                    skip = window.is_before(record_ms)
+                if not skip or parser is None:
+                    yield line, log_line, not skip
+            elif timestamp_line_start_re.match(line) and line.find('[SoftReference,') == -1:
+                if full_line != '':  # process the full previous line
+                    yield full_line, None, not skip
+                if window is not None:
+                    record_ms = window.record_ms(record_timestamp(line))
+                    if window.is_past(record_ms):
+                        return  # past the time window, no need to read further
+                    skip = window.is_before(record_ms)
+                # records before the time window are only kept while detecting gc type & log format
+                full_line = line if not skip or parser is None else ''
+            elif full_line != '' or not skip:  # partial line (or PrintReferenceGC) => concat with previous lines
+                full_line += line
+        if full_line != '':
+            yield full_line, None, not skip
 
-    timestamp_line_start_re = re.compile('(\d{4}|\[\d{4})-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}')
-    full_line = ''
+    timestamp_line_start_re = compile_regex(TIMESTAMP_LINE_START_PATTERN)
+    window = TimeWindow(from_time, to_time) if from_time is not None or to_time is not None else None
     gc_type = None
     log_format = None
     parser = None
-    for line in gclog_file:
-        if timestamp_line_start_re.match(line):
-            if line.find('[SoftReference,') == -1:
-                if full_line != '':  # process the full previous line
-                    if gc_type is None:
-                        gc_type = detect_gc_type(full_line)
-                    if log_format is None:
-                        log_format = detect_log_format(full_line)
-                    if parser is None:
-                        parser = create_parser(gc_type, log_format)
-                    if parser is not None:
-                        parser.parse_line(full_line)
-                        if parser.event_count > 10000:
-                            print("[WARNING] more than 10K points")
-                            parser.event_count = 0
-                full_line = line  # reset to a new line
-            else:  # PrintReferenceGC => partial line => concat with previous lines
-                full_line += line
-        else:  # partial line => concat with previous lines
-            full_line += line
-
+    if start_offset:
+        # the head of the file is skipped by the seek, detect gc type & log format (and zone of the log) first
+        for line_count, line in enumerate(gclog_file):
+            if gc_type is None:
+                gc_type = detect_gc_type(line, gc)
+            if log_format is None:
+                log_format = detect_log_format(line)
+            if window is not None and not window.resolved and timestamp_line_start_re.match(line):
+                window.resolve(record_timestamp(line))
+            if (gc_type is not None and log_format is not None and (window is None or window.resolved)) or \
+                    line_count > DETECTION_MAX_LINES:
+                break
+        gclog_file.seek(start_offset)
+    record_count = 0
+    record_chars = 0
+    for full_line, log_line, in_window in read_records():
+        record_count += 1
+        record_chars += len(full_line)
+        if gc_type is None:
+            gc_type = detect_gc_type(full_line, gc)
+        if log_format is None:
+            log_format = detect_log_format(full_line)
+        if parser is None:
+            parser = create_parser(gc_type, log_format)
+            if parser is not None:
+                configure_parser(parser, events, min_pause, listener, collect, sizing)
+        if parser is not None and in_window and parser.prefilter(full_line):
+            parser.parse_record(full_line, log_line)
+            if parser.event_count > 10000 and collect:
+                info("[WARNING] more than 10K points")
+                parser.event_count = 0
+            parser.record_count = record_count
+            parser.record_chars = record_chars
+        yield parser
+    if parser is not None:
+        parser.record_count = record_count
+        parser.record_chars = record_chars
+        parser.finish()
+
+
+class IncrementalParser(object):
+    """Parses a gc log fed line by line while it is written, e.g. by a running JVM
+
+    A JDK8 record is parsed when the next one starts, or on flush() once the writer is idle. JDK9+ records are
+    single lines parsed as soon as fed. Without collect (default), memory does not grow with the number of events.
+    """
+    def __init__(self, gc=None, events=None, min_pause=None, listener=None, collect=False):
+        self.gc = gc
+        self.events = events
+        self.min_pause = min_pause
+        self.listener = listener
+        self.collect = collect
+        self.timestamp_line_start_re = compile_regex(TIMESTAMP_LINE_START_PATTERN)
+        self.gc_type = None
+        self.log_format = None
+        self.parser = None
+        self.full_line = ''
+        self.record_count = 0
+        self.record_chars = 0
+
+    def feed(self, line):
+        log_line = split_decorators(line)
+        if log_line is not None:
+            self.flush()
+            self.parse_record(line, log_line)
+        elif self.timestamp_line_start_re.match(line) and line.find('[SoftReference,') == -1:
+            self.flush()
+            self.full_line = line
+        elif self.full_line != '':  # partial line (or PrintReferenceGC) => concat with previous lines
+            self.full_line += line
+
+    def flush(self):
+        # parses the pending record, returns the parser (None until GC type & log format are detected)
+        full_line = self.full_line
+        if full_line == '':
+            return self.parser
+        self.full_line = ''
+        return self.parse_record(full_line)
+
+    def parse_record(self, full_line, log_line=None):
+        self.record_count += 1
+        self.record_chars += len(full_line)
+        if self.gc_type is None:
+            self.gc_type = detect_gc_type(full_line, self.gc)
+        if self.log_format is None:
+            self.log_format = detect_log_format(full_line)
+        parser = self.parser
+        if parser is None:
+            parser = create_parser(self.gc_type, self.log_format)
+            if parser is None:
+                return None
+            configure_parser(parser, self.events, self.min_pause, self.listener, self.collect)
+            self.parser = parser
+        if parser.prefilter(full_line):
+            parser.parse_record(full_line, log_line)
+        parser.record_count = self.record_count
+        parser.record_chars = self.record_chars
+        return parser
+
+    def finish(self):
+        parser = self.flush()
+        if parser is not None:
+            parser.finish()
+        return parser
+
+
+def parse(gclog_file, gc=None, from_time=None, to_time=None, events=None, min_pause=None, start_offset=0):
+    parser = None
+    for parser in iter_parse(gclog_file, gc, from_time, to_time, events, min_pause, start_offset):
+        pass
     return parser
 
 
-arg_parser = argparse.ArgumentParser(prog='gc_analyzer', description='gclogs analyzer reporting HTML charts for Heap usage, GC pauses & CPU times. Reports also GC stats')
-arg_parser.add_argument('gclog_file', help='gc log file to analyze')
-arg_parser.add_argument('data_file', nargs='?', help='js data file to output used by HTML charts')
-arg_parser.add_argument('-t', '--gc', help='Force to recognize gc logs file as specific GC algorithm. Supported values: Parallel, CMS, G1, Shenandoah')
-arg_parser.add_argument('-s', '--stats', action='store_true', help='Outputs only GC stats in stdout')
-args = arg_parser.parse_args()
+def open_input(path_or_stream):
+    # returns the text stream to read and the function to call once read: the streams of the caller are left open
+    if isinstance(path_or_stream, str):
+        gclog_file = open_file(path_or_stream, 'r')
+        return gclog_file, gclog_file.close
+    if isinstance(path_or_stream, (io.RawIOBase, io.BufferedIOBase)):
+        gclog_file = io.TextIOWrapper(path_or_stream)
+        # a wrapper closes its binary stream when garbage collected, unless detached from it
+        return gclog_file, gclog_file.detach
+    return path_or_stream, lambda: None
 
-if args.stats:
-    mode = STATS_MODE
-if not args.stats and not args.data_file:
-    print('Missing data_file for HTML report mode')
-    arg_parser.print_usage()
-    sys.exit(1)
 
-gclog_filename = args.gclog_file
-gclog_file = open_file(gclog_filename, "r")
-try:
-    parser = parse(args, gclog_file)
-    if args.stats:
-        print("Total allocated: ", parser.total_allocated, "MB")
+def iter_events(path_or_stream, gc=None, from_time=None, to_time=None, events=None, min_pause=None):
+    """Lazily yields the GCEvent of a gc log file (path, text or binary stream)
+
+    gc forces the GC type (Parallel, CMS, G1, Shenandoah) instead of detecting it.
+    """
+    gclog_file, release = open_input(path_or_stream)
+    try:
+        for event in iter_file_events(gclog_file, gc, from_time, to_time, events, min_pause):
+            yield event
+    finally:
+        release()
 
-        def get_percentile(percentile, values):
-            count = len(values)
-            return values[int(count * percentile)]
 
-        pause_count = len(parser.pause_durations)
-        print("# pauses:", pause_count)
-        if pause_count == 0:
-            sys.exit(0)
-        pause_avg = sum(parser.pause_durations) / len(parser.pause_durations)
-        print("pauses avg:", pause_avg)
-        parser.pause_durations.sort()
-        print("pauses percentiles:")
-        print("10%:", get_percentile(0.1, parser.pause_durations))
-        print("20%:", get_percentile(0.2, parser.pause_durations))
-        print("30%:", get_percentile(0.3, parser.pause_durations))
-        print("40%:", get_percentile(0.4, parser.pause_durations))
-        print("50%:", get_percentile(0.5, parser.pause_durations))
-        print("60%:", get_percentile(0.6, parser.pause_durations))
-        print("70%:", get_percentile(0.7, parser.pause_durations))
-        print("80%:", get_percentile(0.8, parser.pause_durations))
-        print("90%:", get_percentile(0.9, parser.pause_durations))
-        print("95%:", get_percentile(0.95, parser.pause_durations))
-        print("99%:", get_percentile(0.99, parser.pause_durations))
-        sys.exit(0)
+def iter_file_events(gclog_file, gc=None, from_time=None, to_time=None, events=None, min_pause=None, start_offset=0):
+    # GCEvent of an opened gc log, the parser keeping neither series nor stats
+    pending_events = collections.deque()
+    for parser in iter_parse(gclog_file, gc, from_time, to_time, events, min_pause, start_offset,
+                             listener=pending_events.append, collect=False):
+        while pending_events:
+            yield pending_events.popleft()
+
+
+def analyze(path_or_stream, gc=None, from_time=None, to_time=None, events=None, min_pause=None, percentiles=None):
+    """Parses a gc log file (path, text or binary stream) and returns its stats as a dict (same as --stats-format json)
+
+    Returns None when the GC type or log format is not recognized.
+    """
+    gclog_file, release = open_input(path_or_stream)
+    try:
+        parse_start = time.time()
+        parser = parse(gclog_file, gc, from_time, to_time, events, min_pause)
+        parse_time = time.time() - parse_start
+    finally:
+        release()
     if parser is None:
-        print("ERROR: Cannot recognize file format!")
+        return None
+    stats = parser.compute_stats(percentiles)
+    name = path_or_stream if isinstance(path_or_stream, str) else getattr(path_or_stream, 'name', None)
+    return stats_to_json(name, parser, stats, parse_time)
+
+
+def record_timestamp(line):
+    # YYYY-MM-DDTHH:MM:SS.mmm timestamp of a record start line, followed by its +hhmm zone if any
+    if line[0] == '[':
+        log_line = split_decorators(line)
+        return log_line.timestamp + (log_line.zone or '')
+    if line[23:24] in ('+', '-'):
+        return line[:28]
+    return line[:23]
+
+
+def parse_timestamp(timestamp):
+    """Parses a YYYY-MM-DDTHH:MM:SS.mmm timestamp (or a prefix of it) followed by an optional zone (+hhmm, +hh:mm, Z)
+
+    Returns (start, end, offset): the wall clock period covered by the prefix as ms since the epoch, end excluded, and
+    the zone offset in ms, None without zone.
+    """
+    match = TIMESTAMP_RE.match(timestamp)
+    if match is None:
+        raise ValueError("invalid timestamp '{}'".format(timestamp))
+    groups = match.group(1, 2, 3, 4, 5, 6)
+    start = calendar.timegm([int(group) if group is not None else 0 for group in groups]) * 1000
+    millis = match.group(7)
+    if millis is not None:
+        unit = 10 ** (3 - len(millis))
+        start += int(millis) * unit
+    else:
+        unit = TIMESTAMP_UNITS_MS[len(groups) - groups.count(None)]
+    zone = match.group(8)
+    if zone is None:
+        offset = None
+    elif zone == 'Z':
+        offset = 0
+    else:
+        offset = (int(zone[1:3]) * 60 + int(zone[-2:])) * 60000
+        if zone[0] == '-':
+            offset = -offset
+    return start, start + unit, offset
+
+
+class TimeWindow(object):
+    """--from/--to bounds compared to the record timestamps as instants, whatever their zone
+
+    A bound without zone is a wall clock time in the zone of the first record of the log (the one passed to resolve),
+    --to including its whole prefix. Records without zone (uptime decorated logs) are UTC.
+    """
+    def __init__(self, from_time=None, to_time=None):
+        self.from_bound = parse_timestamp(from_time) if from_time is not None else None
+        self.to_bound = parse_timestamp(to_time) if to_time is not None else None
+        self.from_ms = None
+        self.to_ms = None
+        self.resolved = False
+
+    def resolve(self, timestamp):
+        offset = parse_timestamp(timestamp)[2] or 0
+        if self.from_bound is not None:
+            start, _, bound_offset = self.from_bound
+            self.from_ms = start - (bound_offset if bound_offset is not None else offset)
+        if self.to_bound is not None:
+            _, end, bound_offset = self.to_bound
+            self.to_ms = end - (bound_offset if bound_offset is not None else offset)
+        self.resolved = True
+
+    def record_ms(self, timestamp):
+        # instant (ms since the epoch) of a record timestamp, resolving the bounds on the first one
+        if not self.resolved:
+            self.resolve(timestamp)
+        start, _, offset = parse_timestamp(timestamp)
+        return start - (offset or 0)
+
+    def is_before(self, record_ms):
+        return self.from_ms is not None and record_ms < self.from_ms
+
+    def is_past(self, record_ms):
+        return self.to_ms is not None and record_ms >= self.to_ms
+
+
+def first_record_timestamp(binary_file):
+    # timestamp of the first record of a gc log opened in binary mode, None when it has none
+    timestamp_line_start_re = compile_regex(TIMESTAMP_LINE_START_PATTERN.encode('ascii'))
+    for line_count, line in enumerate(binary_file):
+        if timestamp_line_start_re.match(line):
+            return record_timestamp(line.decode('ascii', 'replace'))
+        if line_count > DETECTION_MAX_LINES:
+            break
+    return None
+
+
+def log_zone_offset(gclog_filename):
+    # zone offset in ms of the first record of a gc log, 0 without zone (uptime decorated logs are UTC)
+    with open_file(gclog_filename, 'rb') as f:
+        first_timestamp = first_record_timestamp(f)
+    if first_timestamp is None:
+        return 0
+    return parse_timestamp(first_timestamp)[2] or 0
+
+
+def find_record_offset(gclog_filename, from_time, block_size=64 * 1024):
+    # binary search on record timestamps, returns the offset of a record start before the first record >= from_time
+    timestamp_line_start_re = compile_regex(TIMESTAMP_LINE_START_PATTERN.encode('ascii'))
+    window = TimeWindow(from_time)
+    with open(gclog_filename, 'rb') as f:
+        first_timestamp = first_record_timestamp(f)
+        if first_timestamp is None:
+            return 0
+        window.resolve(first_timestamp)
+        f.seek(0, 2)
+        low = 0
+        high = f.tell()
+        while high - low > block_size:
+            middle = (low + high) // 2
+            f.seek(middle)
+            f.readline()  # skip partial line
+            timestamp = None
+            line = f.readline()
+            while line:
+                if timestamp_line_start_re.match(line):
+                    timestamp = record_timestamp(line.decode('ascii', 'replace'))
+                    break
+                line = f.readline()
+            if timestamp is None or not window.is_before(window.record_ms(timestamp)):
+                high = middle
+            else:
+                low = middle
+        if low == 0:
+            return 0
+        f.seek(low)
+        f.readline()
+        # JDK8 records span several lines: start on the next record, not on one of its continuation lines
+        offset = f.tell()
+        line = f.readline()
+        while line and (not timestamp_line_start_re.match(line) or line.find(b'[SoftReference,') != -1):
+            offset = f.tell()
+            line = f.readline()
+        return offset
+
+
+class GCLogIndex(object):
+    """Sparse sidecar index mapping record timestamps to (uncompressed) offsets in a gc log
+
+    Stored next to the log as <gclog_file>.idx, with for gzip logs the inflate checkpoints
+    (zran) in <gclog_file>.zidx when indexed_gzip is available. Without it, seeking into a
+    compressed log still inflates from the start but skips parsing up to the offset.
+    """
+    def __init__(self, gclog_filename):
+        self.gclog_filename = gclog_filename
+        self.index_filename = gclog_filename + '.idx'
+        self.zran_index_filename = gclog_filename + '.zidx'
+        self.timestamps = []
+        self.offsets = []
+
+    def use_zran(self):
+        return indexed_gzip is not None and self.gclog_filename.endswith('gz')
+
+    def fingerprint(self):
+        stat = os.stat(self.gclog_filename)
+        with open(self.gclog_filename, 'rb') as f:
+            head_crc = zlib.crc32(f.read(INDEX_FINGERPRINT_SIZE))
+        return '{} {} {:08x}'.format(stat.st_size, stat.st_mtime_ns, head_crc)
+
+    def load(self):
+        # returns False when the index is missing or stale (log changed since the index was built)
+        if not os.path.exists(self.index_filename):
+            return False
+        if self.use_zran() and not os.path.exists(self.zran_index_filename):
+            return False
+        with open(self.index_filename, 'r') as index_file:
+            if index_file.readline().rstrip('\n') != 'gc_analyzer index v{}'.format(INDEX_VERSION):
+                return False
+            if index_file.readline().rstrip('\n') != self.fingerprint():
+                return False
+            timestamps = []
+            offsets = []
+            for line in index_file:
+                timestamp, offset = line.split()
+                timestamps.append(timestamp)
+                offsets.append(int(offset))
+        self.timestamps = timestamps
+        self.offsets = offsets
+        return True
+
+    def open_binary(self):
+        if self.use_zran():
+            return indexed_gzip.IndexedGzipFile(self.gclog_filename, spacing=ZRAN_SPACING)
+        return open_file(self.gclog_filename, 'rb')
+
+    def build(self, interval=INDEX_INTERVAL):
+        timestamp_line_start_re = compile_regex(TIMESTAMP_LINE_START_PATTERN.encode('ascii'))
+        timestamps = []
+        offsets = []
+        record_count = 0
+        offset = 0
+        gclog_file = self.open_binary()
+        try:
+            for line in gclog_file:
+                if timestamp_line_start_re.match(line) and line.find(b'[SoftReference,') == -1:
+                    if record_count % interval == 0:
+                        timestamps.append(record_timestamp(line.decode('ascii', 'replace')))
+                        offsets.append(offset)
+                    record_count += 1
+                offset += len(line)
+            if self.use_zran():
+                gclog_file.build_full_index()
+                gclog_file.export_index(self.zran_index_filename)
+        finally:
+            gclog_file.close()
+        with open(self.index_filename, 'w') as index_file:
+            index_file.write('gc_analyzer index v{}\n'.format(INDEX_VERSION))
+            index_file.write(self.fingerprint() + '\n')
+            for timestamp, offset in zip(timestamps, offsets):
+                index_file.write('{} {}\n'.format(timestamp, offset))
+        self.timestamps = timestamps
+        self.offsets = offsets
+
+    def lookup(self, from_time):
+        # offset of the last indexed record before from_time
+        if not self.timestamps:
+            return 0
+        window = TimeWindow(from_time)
+        window.resolve(self.timestamps[0])
+        idx = bisect.bisect_left([window.record_ms(timestamp) for timestamp in self.timestamps], window.from_ms)
+        if idx == 0:
+            return 0
+        return self.offsets[idx - 1]
+
+    def open(self):
+        if self.use_zran():
+            return io.TextIOWrapper(indexed_gzip.IndexedGzipFile(self.gclog_filename, spacing=ZRAN_SPACING,
+                                                                 index_file=self.zran_index_filename))
+        return open_file(self.gclog_filename, 'r')
+
+
+def stats_to_json(gclog_filename, parser, stats, parse_time):
+    # one self contained object per log: aggregating many logs is merging counts/totals per kind
+
+    def kind_stats_to_json(kind_stats):
+        result = dict((key, kind_stats[key]) for key in ('count', 'total', 'mean', 'stddev', 'min', 'max'))
+        result['percentiles'] = dict(('p{}'.format(percentile), value) for percentile, value in kind_stats['percentiles'])
+        return result
+
+    engine = parser.stats
+    return {
+        'gclog_file': gclog_filename,
+        'gc': parser.GC_NAME,
+        'log_format': LOG_FORMAT_NAMES.get(parser.log_format),
+        'span': {
+            'start': format_time_ms(engine.first_ms) if engine.first_ms is not None else None,
+            'end': format_time_ms(engine.last_ms) if engine.last_ms is not None else None,
+            'duration_ms': stats['span_ms']
+        },
+        'event_counts': dict((kind, kind_stats['count']) for kind, kind_stats in stats['kinds'].items()),
+        'pauses': kind_stats_to_json(stats[ALL_PAUSES]) if stats[ALL_PAUSES] else None,
+        'kinds': dict((kind, kind_stats_to_json(kind_stats)) for kind, kind_stats in stats['kinds'].items()),
+        'total_allocated_mb': parser.total_allocated,
+        'total_promoted_mb': parser.total_promoted,
+        'allocation_rate_mb_s': stats['allocation_rate'],
+        'promotion_rate_mb_s': stats['promotion_rate'],
+        'throughput_percent': stats['throughput'],
+        'phases': dict((name, {'pause': kind_stats_to_json(phase_stats),
+                               'slowest_worker': kind_stats_to_json(max_stats) if max_stats else None})
+                       for name, phase_stats, max_stats in stats['phases']),
+        'concurrent': dict((name, kind_stats_to_json(concurrent_stats)) for name, concurrent_stats in stats['concurrent']),
+        'tenuring': tenuring_to_json(stats['tenuring']),
+        'cpu': cpu_to_json(stats['cpu'], kind_stats_to_json),
+        'findings': [{'level': LEVEL_NAMES[finding.level], 'start': format_time_ms(finding.start_ms),
+                      'end': format_time_ms(finding.end_ms), 'title': finding.title, 'message': finding.message}
+                     for finding in parser.findings],
+        'parse': {
+            'time_s': parse_time,
+            'records': parser.record_count,
+            'chars': parser.record_chars,
+            'records_per_s': parser.record_count / parse_time if parse_time > 0 else None,
+            'chars_per_s': parser.record_chars / parse_time if parse_time > 0 else None
+        }
+    }
+
+
+def tenuring_to_json(tenuring):
+    if tenuring is None:
+        return None
+    result = dict(tenuring)
+    result['survival_rates'] = dict((str(age), rate) for age, rate in tenuring['survival_rates'])
+    return result
+
+
+def cpu_to_json(cpu, kind_stats_to_json):
+    if cpu is None:
+        return None
+    result = dict(cpu)
+    result['parallelism'] = kind_stats_to_json(cpu['parallelism'])
+    result['top_blocked'] = []
+    for pause in cpu['top_blocked']:
+        pause = dict(pause)
+        pause['time'] = format_time_ms(pause.pop('time_ms'))
+        result['top_blocked'].append(pause)
+    return result
+
+
+def format_kind_stats(name, kind_stats):
+    return "{}: count={} total={} avg={} stddev={} max={} {}".format(
+        name, kind_stats['count'], round(kind_stats['total'], 3), round(kind_stats['mean'], 3),
+        round(kind_stats['stddev'], 3), round(kind_stats['max'], 3),
+        ' '.join('{}%={}'.format(percentile, round(value, 3)) for percentile, value in kind_stats['percentiles']))
+
+
+def timestamp_arg(value):
+    value = value.replace(' ', 'T')
+    if not TIMESTAMP_RE.match(value):
+        raise argparse.ArgumentTypeError("invalid timestamp '{}', expected YYYY-MM-DDTHH:MM:SS.mmm (or a prefix of it) with an optional zone (+hhmm)".format(value))
+    return value
+
+
+def percentiles_arg(value):
+    try:
+        percentiles = [float(percentile) for percentile in value.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid percentiles '{}'".format(value))
+    for percentile in percentiles:
+        if not 0 <= percentile <= 100:
+            raise argparse.ArgumentTypeError("invalid percentile '{}', expected between 0 and 100".format(percentile))
+    return [int(percentile) if percentile.is_integer() else percentile for percentile in percentiles]
+
+
+def size_mb(value):
+    match = re.match('^(\d+(?:\.\d+)?)([KMGkmg]?)$', value)
+    if match is None:
+        raise argparse.ArgumentTypeError("invalid size '{}', expected a number of MB or with a K, M or G suffix".format(value))
+    return float(match.group(1)) * {'K': 1.0 / 1024, 'M': 1, 'G': 1024}.get(match.group(2).upper(), 1)
+
+
+def sizes_arg(value):
+    return [size_mb(size) for size in value.split(',')]
+
+
+def young_sizes_arg(value):
+    # (sizes in MB, fractions of the heap)
+    sizes_mb = []
+    fractions = []
+    for size in value.split(','):
+        if size.endswith('%'):
+            try:
+                percent = float(size[:-1])
+            except ValueError:
+                raise argparse.ArgumentTypeError("invalid percentage '{}'".format(size))
+            if not 0 < percent < 100:
+                raise argparse.ArgumentTypeError("invalid percentage '{}', expected between 0 and 100".format(size))
+            fractions.append(percent / 100)
+        else:
+            sizes_mb.append(size_mb(size))
+    return sizes_mb, fractions
+
+
+def event_kinds_arg(value):
+    kinds = value.split(',')
+    for kind in kinds:
+        if kind not in EVENT_KINDS:
+            raise argparse.ArgumentTypeError("invalid event kind '{}', supported values: {}".format(kind, ', '.join(EVENT_KINDS)))
+    return kinds
+
+
+def main(argv=None):
+    global info_output
+
+    arg_parser = argparse.ArgumentParser(prog='gc_analyzer', description='gclogs analyzer reporting HTML charts for Heap usage, GC pauses & CPU times. Reports also GC stats')
+    arg_parser.add_argument('gclog_file', help='gc log file to analyze')
+    arg_parser.add_argument('data_file', nargs='?', help='js data file to output used by HTML charts (gzip compressed when ending with .gz)')
+    arg_parser.add_argument('-t', '--gc', help='Force to recognize gc logs file as specific GC algorithm. Supported values: Parallel, CMS, G1, Shenandoah')
+    arg_parser.add_argument('-s', '--stats', action='store_true', help='Outputs only GC stats in stdout')
+    arg_parser.add_argument('--from', dest='from_time', type=timestamp_arg, help='Only reports GC events at or after this timestamp (YYYY-MM-DDTHH:MM:SS.mmm or a prefix of it, +hhmm zone optional, the one of the log by default)')
+    arg_parser.add_argument('--to', dest='to_time', type=timestamp_arg, help='Only reports GC events up to this timestamp (YYYY-MM-DDTHH:MM:SS.mmm or a prefix of it, inclusive, +hhmm zone optional, the one of the log by default)')
+    arg_parser.add_argument('-e', '--events', type=event_kinds_arg, help='Only reports these comma separated GC event kinds. Supported values: ' + ', '.join(EVENT_KINDS))
+    arg_parser.add_argument('--min-pause', type=float, help='Only reports GC events with a pause of at least this duration in ms')
+    arg_parser.add_argument('-f', '--stats-format', choices=['text', 'json'], default='text', help='Stats output format: human readable text or a single JSON line (default: text)')
+    arg_parser.add_argument('-p', '--percentiles', type=percentiles_arg, help='Comma separated pause percentiles reported in stats mode (default: {}), request latency percentiles above which requests are slow with --latency-log (default: 99,99.9)'.format(','.join(str(percentile) for percentile in DEFAULT_PERCENTILES)))
+    arg_parser.add_argument('-i', '--index', action='store_true', help='Builds (or rebuilds when the log changed) a sparse timestamp index <gclog_file>.idx and uses it to seek to --from')
+    arg_parser.add_argument('--tiles', action='store_true', help='Writes the series of more than {} points as zoom level tiles in <data_file>_tiles/, loaded on demand by the HTML charts'.format(TILE_POINTS))
+    arg_parser.add_argument('--html', action='store_true', help='Writes data_file as a single HTML report: the charts with their scripts inlined and the series embedded compressed, opened from the file system by browsers supporting DecompressionStream')
+    arg_parser.add_argument('--latency-log', dest='latency_logs', action='append', help='Correlates the GC pauses with the requests of this access log (repeatable, each sorted by time): reports the slow requests overlapping a pause, per GC event kind, in stdout')
+    arg_parser.add_argument('--latency-pattern', default=DEFAULT_LATENCY_PATTERN, help='Regex matching an access log line, with TIME (YYYY-MM-DDTHH:MM:SS.mmm or epoch) and DURATION named groups (default: timestamp at line start, duration as last number)')
+    arg_parser.add_argument('--latency-time', choices=['end', 'start'], default='end', help='Whether the access log timestamp is the end or the start of the request (default: end)')
+    arg_parser.add_argument('--latency-unit', choices=sorted(DURATION_UNITS), default='ms', help='Unit of the access log durations (default: ms)')
+    arg_parser.add_argument('--max-request', type=float, default=MAX_REQUEST_MS, help='Requests are joined with the pauses of at most this duration in ms before their logged time (default: {})'.format(MAX_REQUEST_MS))
+    arg_parser.add_argument('--sizing', action='store_true', help='Replays the allocation, promotion & live set of the log against candidate heap x young gen sizes: reports the predicted GC frequency, pause totals and full GC risk of each in stdout')
+    arg_parser.add_argument('--sizing-heap', type=sizes_arg, help='Comma separated candidate heap sizes in MB or with a K, M, G suffix (default: 1.5 to 12 times the max live set)')
+    arg_parser.add_argument('--sizing-young', type=young_sizes_arg, default=([], []), help='Comma separated candidate young gen sizes in MB, with a K, M, G suffix or in %% of the heap (default: 10%% to 55%%)')
+    arg_parser.add_argument('--index-interval', type=int, default=INDEX_INTERVAL, help='Number of records between 2 index entries (default: {})'.format(INDEX_INTERVAL))
+    args = arg_parser.parse_args(argv)
+
+    info_output = sys.stderr if (args.stats or args.latency_logs or args.sizing) and args.stats_format == 'json' else sys.stdout
+    if not args.stats and not args.latency_logs and not args.sizing and not args.data_file:
+        print('Missing data_file for HTML report mode')
+        arg_parser.print_usage()
+        sys.exit(1)
+    if args.html and args.tiles:
+        print('--tiles writes the series next to the data file, a single HTML report embeds them')
+        arg_parser.print_usage()
         sys.exit(1)
 
-    reporter = parser.create_reporter()
-    data_file = open(args.data_file, 'w')
+    gclog_filename = args.gclog_file
+    start_offset = 0
+    if args.index:
+        index = GCLogIndex(gclog_filename)
+        if not index.load():
+            info("Building index " + index.index_filename)
+            index.build(args.index_interval)
+        if args.from_time is not None:
+            start_offset = index.lookup(args.from_time)
+        gclog_file = index.open()
+    else:
+        gclog_file = open_file(gclog_filename, "r")
     try:
-        reporter.write(data_file)
-        series = reporter.build_series()
-        data_file.write('var series = [{}]\n'.format(series))
+        if args.from_time is not None and not args.index and not gclog_filename.endswith(('bz2', 'gz')) and gclog_file.seekable():
+            start_offset = find_record_offset(gclog_filename, args.from_time)
+        if args.latency_logs:
+            latency_logs = [open_file(latency_filename, 'r') for latency_filename in args.latency_logs]
+            try:
+                pause_events = iter_file_events(gclog_file, args.gc, args.from_time, args.to_time, args.events,
+                                                args.min_pause, start_offset)
+                report = correlate(pause_events, latency_logs, args.latency_pattern, args.latency_time == 'end',
+                                   args.latency_unit, args.max_request, args.percentiles, log_zone_offset(gclog_filename))
+            finally:
+                for latency_log in latency_logs:
+                    latency_log.close()
+            if args.stats_format == 'json':
+                report['gclog_file'] = gclog_filename
+                report['latency_logs'] = args.latency_logs
+                sys.stdout.write(json.dumps(report, sort_keys=True) + '\n')
+            else:
+                print(format_report(report))
+            sys.exit(0)
+        parse_start = time.time()
+        if args.sizing:
+            # stops as soon as the GC is detected when it cannot be replayed
+            parser = None
+            for parser in iter_parse(gclog_file, args.gc, args.from_time, args.to_time, args.events, args.min_pause,
+                                     start_offset, sizing=True):
+                if parser is not None and parser.GC_NAME in NO_ALLOCATION_GCS:
+                    break
+        else:
+            parser = parse(gclog_file, args.gc, args.from_time, args.to_time, args.events, args.min_pause, start_offset)
+        parse_time = time.time() - parse_start
+        if parser is None:
+            if args.stats and args.stats_format == 'json':
+                sys.stdout.write(json.dumps({'gclog_file': gclog_filename, 'error': 'Cannot recognize file format'}) + '\n')
+            print("ERROR: Cannot recognize file format!", file=info_output)
+            sys.exit(1)
+        if args.sizing:
+            if parser.GC_NAME in NO_ALLOCATION_GCS:
+                print("ERROR: Heap sizing what-if is not supported for {}: its log records no allocation!".format(
+                    parser.GC_NAME), file=info_output)
+                sys.exit(1)
+            young_sizes_mb, young_fractions = args.sizing_young
+            report = parser.sizing.simulate(parser.GC_NAME, args.sizing_heap, young_sizes_mb, young_fractions)
+            if report is None:
+                print("ERROR: No allocation data to replay!", file=info_output)
+                sys.exit(1)
+            if args.stats_format == 'json':
+                report['gclog_file'] = gclog_filename
+                sys.stdout.write(json.dumps(report, sort_keys=True) + '\n')
+            else:
+                print(format_simulation(report))
+            sys.exit(0)
+        if args.stats:
+            stats = parser.compute_stats(args.percentiles)
+            if args.stats_format == 'json':
+                sys.stdout.write(json.dumps(stats_to_json(gclog_filename, parser, stats, parse_time), sort_keys=True) + '\n')
+                sys.stdout.flush()
+                sys.exit(0)
+            print("Total allocated: ", parser.total_allocated, "MB")
+            print("Findings:", len(parser.findings))
+            for finding in parser.findings:
+                print(finding)
+
+            if stats['allocation_rate'] is not None:
+                print("Allocation rate:", round(stats['allocation_rate'], 3), "MB/s")
+            if stats['promotion_rate'] is not None:
+                print("Promotion rate:", round(stats['promotion_rate'], 3), "MB/s")
+            if stats['throughput'] is not None:
+                print("Throughput:", round(stats['throughput'], 3), "%")
+            pause_stats = stats[ALL_PAUSES]
+            if pause_stats is None:
+                print("# pauses:", 0)
+                sys.exit(0)
+            print("# pauses:", pause_stats['count'])
+            print("pauses total:", round(pause_stats['total'], 3))
+            print("pauses avg:", round(pause_stats['mean'], 3))
+            print("pauses stddev:", round(pause_stats['stddev'], 3))
+            print("pauses max:", round(pause_stats['max'], 3))
+            print("pauses percentiles:")
+            for percentile, value in pause_stats['percentiles']:
+                print("{}%:".format(percentile), round(value, 3))
+            for kind in sorted(stats['kinds']):
+                print(format_kind_stats(kind, stats['kinds'][kind]))
+            if stats['phases']:
+                print("phases (ms per pause, average of workers):")
+                for name, phase_stats, max_stats in stats['phases']:
+                    print(format_kind_stats(name, phase_stats))
+                    if max_stats is not None:
+                        print(format_kind_stats(name + ' (slowest worker)', max_stats))
+            if stats['concurrent']:
+                print("concurrent phases (wall ms):")
+                for name, concurrent_stats in stats['concurrent']:
+                    print(format_kind_stats(name, concurrent_stats))
+            tenuring = stats['tenuring']
+            if tenuring is not None:
+                print("tenuring: tables={} threshold avg={} min={} max={} survivor overflows={}".format(
+                    tenuring['tables'], round(tenuring['threshold_avg'], 1), tenuring['threshold_min'],
+                    tenuring['max_threshold'], tenuring['survivor_overflows']))
+                for age, rate in tenuring['survival_rates']:
+                    print("age {} survival: {}%".format(age, round(rate * 100, 1)))
+                print("Recommended tenuring threshold:", tenuring['recommended_threshold'])
+            cpu = stats['cpu']
+            if cpu is not None:
+                print(format_kind_stats('GC threads parallelism ((user+sys)/real)', cpu['parallelism']))
+                print("cpu efficiency: pauses={} (shorter ones not judged: {}) sys={}% sys heavy pauses={} starved pauses={} expected parallelism: {}".format(
+                    cpu['pauses'], cpu['unjudged_pauses'], round(cpu['sys_fraction'] * 100, 1), cpu['sys_heavy_pauses'], cpu['starved_pauses'],
+                    ' '.join('{}={}'.format(kind, round(parallelism, 2)) for kind, parallelism in sorted(cpu['expected_parallelism'].items()))))
+                print("blocked by the OS: {} ms ({}% of the pauses real time)".format(
+                    round(cpu['blocked_ms'], 3), round(cpu['blocked_ms'] * 100 / cpu['real_ms'], 1)))
+                for pause in cpu['top_blocked']:
+                    flags = []
+                    if pause['sys_heavy']:
+                        flags.append('sys >= {}%'.format(int(SYS_HEAVY_FRACTION * 100)))
+                    if pause['starved']:
+                        flags.append('real >= {}x cpu'.format(STARVED_REAL_RATIO))
+                    print("  {} {}: blocked={} ms real={} user={} sys={} parallelism={} {}".format(
+                        format_time_ms(pause['time_ms']), pause['kind'], round(pause['blocked_ms'], 3), pause['real_ms'],
+                        pause['user_ms'], pause['sys_ms'], round(pause['parallelism'], 2), ', '.join(flags)).rstrip())
+            sys.exit(0)
+
+        reporter = parser.create_reporter()
+        if args.tiles:
+            reporter.tiles = TileWriter(args.data_file)
+        if args.html:
+            reporter.embedded = EmbeddedSeriesWriter()
+            # the data script streamed inline in the page
+            data_file = HTMLReportFile(open_output(args.data_file), reporter.embedded, CHART_DIR)
+        else:
+            data_file = open_output(args.data_file)
+        try:
+            if reporter.embedded is not None:
+                data_file.write_head()
+            reporter.write(data_file)
+            series = reporter.build_pause_series()
+            data_file.write('var series = [{}]\n'.format(series))
+            if reporter.tiles is not None:
+                reporter.tiles.write_index(data_file)
+            if reporter.embedded is not None:
+                data_file.write_tail()
+        finally:
+            data_file.close()
+
     finally:
-        data_file.close()
+        gclog_file.close()
+
 
-finally:
-    gclog_file.close()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
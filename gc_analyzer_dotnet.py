@@ -6,6 +6,10 @@ import math
 import time
 import datetime
 
+import gc_analyzer
+from gc_nettrace import DotnetGC, is_nettrace, iter_nettrace_gcs
+from gc_tiles import TileWriter
+
 
 def open_file(inputfile, mode):
     if inputfile.endswith('bz2'):
@@ -15,11 +19,26 @@ def open_file(inputfile, mode):
     else:
         return open(inputfile, mode)
 
-def parse(gclog_file, data_filename):
+def iter_csv_gcs(gclog_file):
+    # GCs of a PerfView GCStats CSV export, timed from now as the export only holds the time since the trace start
+    now = time.time()
+    for line in gclog_file:
+        cols = line.split(',')
+        if cols[0] == "StartRelativeMSec": # skip header
+            continue
+        elapsed = float(cols[0]) / 1000
+        yield DotnetGC(number=None, generation=int(cols[2]), gc_type=None, reason=None, start_time=now + elapsed,
+                       pause_ms=int(float(cols[7])), pause2_ms=int(float(cols[8])), heap_time=now + elapsed,
+                       gen0_before_bytes=int(cols[13]), gen0_after_bytes=int(cols[17]), gen0_bytes=int(cols[9]),
+                       gen1_bytes=int(cols[10]), gen2_bytes=int(cols[11]), loh_bytes=int(cols[12]), poh_bytes=0)
+
 
-    def format_timestamp(now, elapsed, offset = 0):
-        dt = datetime.datetime.fromtimestamp(now + elapsed)
-        return 'Date.UTC({},{},{},{},{},{},{})+{}'.format(dt.year, dt.month, dt.day,
+def parse(gcs, data_filename, tiles=False):
+
+    def format_timestamp(gc_time, offset = 0):
+        # nettrace times are UTC, javascript months are 0 based
+        dt = datetime.datetime.fromtimestamp(gc_time, tz=datetime.timezone.utc)
+        return 'Date.UTC({},{},{},{},{},{},{})+{}'.format(dt.year, dt.month - 1, dt.day,
                                                 dt.hour, dt.minute, dt.second,
                                                        int(dt.microsecond / 1000), offset)
 
@@ -119,64 +138,74 @@ def parse(gclog_file, data_filename):
         return series
 
     data = {}
-    now = time.time()
-    for line in gclog_file:
-        cols = line.split(',')
-        if cols[0] == "StartRelativeMSec": # skip header
-            continue
-        elapsed = float(cols[0]) / 1000
-        gen0 = int(cols[9])
-        gen0before = int(cols[13])
-        gen0after = int(cols[17])
-        gen1 = int(cols[10])
-        gen2 = int(cols[11])
-        loh = int(cols[12])
-        pause_ms = int(float(cols[7]))
-        #add_data(data, 'gen0_occupancy', '[{},{}],\n'.format(format_timestamp(now, elapsed), heap_occupancy_to_M(gen0)))
-        add_data(data, 'gen0_occupancy', '[{},{}],\n'.format(format_timestamp(now, elapsed), heap_occupancy_to_M(gen0before)))
-        add_data(data, 'gen0_occupancy', '[{},{}],\n'.format(format_timestamp(now, elapsed, pause_ms), heap_occupancy_to_M(gen0after)))
-        add_data(data, 'gen1_occupancy', '[{},{}],\n'.format(format_timestamp(now, elapsed), heap_occupancy_to_M(gen1)))
-        add_data(data, 'gen2_occupancy', '[{},{}],\n'.format(format_timestamp(now, elapsed), heap_occupancy_to_G(gen2)))
-        add_data(data, 'gen3_occupancy', '[{},{}],\n'.format(format_timestamp(now, elapsed), heap_occupancy_to_G(loh)))
-        total = gen0 + gen1 + gen2 + loh
-        add_data(data, 'total_heap_occupancy', '[{},{}],\n'.format(format_timestamp(now, elapsed), heap_occupancy_to_G(total)))
-        generation = int(cols[2])
-        if generation == 0:
+    for gc in gcs:
+        if gc.gen0_before_bytes is not None:
+            add_data(data, 'gen0_occupancy', '[{},{}],\n'.format(format_timestamp(gc.start_time), heap_occupancy_to_M(gc.gen0_before_bytes)))
+            add_data(data, 'gen0_occupancy', '[{},{}],\n'.format(format_timestamp(gc.start_time, gc.pause_ms), heap_occupancy_to_M(gc.gen0_after_bytes)))
+        elif gc.gen0_after_bytes is not None:
+            add_data(data, 'gen0_occupancy', '[{},{}],\n'.format(format_timestamp(gc.heap_time), heap_occupancy_to_M(gc.gen0_after_bytes)))
+        if gc.gen0_bytes is not None:
+            add_data(data, 'gen1_occupancy', '[{},{}],\n'.format(format_timestamp(gc.heap_time), heap_occupancy_to_M(gc.gen1_bytes)))
+            add_data(data, 'gen2_occupancy', '[{},{}],\n'.format(format_timestamp(gc.heap_time), heap_occupancy_to_G(gc.gen2_bytes)))
+            add_data(data, 'gen3_occupancy', '[{},{}],\n'.format(format_timestamp(gc.heap_time), heap_occupancy_to_G(gc.loh_bytes)))
+            total = gc.gen0_bytes + gc.gen1_bytes + gc.gen2_bytes + gc.loh_bytes + gc.poh_bytes
+            add_data(data, 'total_heap_occupancy', '[{},{}],\n'.format(format_timestamp(gc.heap_time), heap_occupancy_to_G(total)))
+        if gc.pause_ms is None:
+            continue  # GC started before the trace
+        if gc.generation == 0:
             add_data(data, 'pause_gen0',
-                     '[{},{}],\n'.format(format_timestamp(now, elapsed), pause_ms))
-        if generation == 1:
+                     '[{},{}],\n'.format(format_timestamp(gc.start_time), gc.pause_ms))
+        if gc.generation == 1:
             add_data(data, 'pause_gen1',
-                     '[{},{}],\n'.format(format_timestamp(now, elapsed), pause_ms))
-        if generation == 2:
+                     '[{},{}],\n'.format(format_timestamp(gc.start_time), gc.pause_ms))
+        if gc.generation == 2:
             add_data(data, 'pause_initialmark',
-                     '[{},{}],\n'.format(format_timestamp(now, elapsed), pause_ms))
-            pause2_ms = int(float(cols[8]))
-            add_data(data, 'pause_finalmark',
-                     '[{},{}],\n'.format(format_timestamp(now, elapsed), pause2_ms))
+                     '[{},{}],\n'.format(format_timestamp(gc.start_time), gc.pause_ms))
+            if gc.pause2_ms is not None:
+                add_data(data, 'pause_finalmark',
+                         '[{},{}],\n'.format(format_timestamp(gc.start_time), gc.pause2_ms))
+
 
+    def write_data_serie(data_file, var_name, values):
+        if tile_writer is not None and tile_writer.write_serie(var_name, values.splitlines(True)):
+            data_file.write('var {} = []\n'.format(var_name))
+        else:
+            data_file.write('var {} = [{}]\n'.format(var_name, values))
 
+    tile_writer = TileWriter(data_filename) if tiles else None
     data_file = open(data_filename, 'w')
     try:
-        data_file.write('var data_serie_heap_gen0 = [{}]\n'.format(data.get('gen0_occupancy', '')))
-        data_file.write('var data_serie_heap_gen1 = [{}]\n'.format(data.get('gen1_occupancy', '')))
-        data_file.write('var data_serie_heap_gen2 = [{}]\n'.format(data.get('gen2_occupancy', '')))
-        data_file.write('var data_serie_heap_gen3 = [{}]\n'.format(data.get('gen3_occupancy', '')))
-        data_file.write('var data_serie_heap_total = [{}]\n'.format(data.get('total_heap_occupancy', '')))
-        data_file.write('var data_serie_pause_gen0 = [{}]\n'.format(data.get('pause_gen0', '')))
-        data_file.write('var data_serie_pause_gen1 = [{}]\n'.format(data.get('pause_gen1', '')))
-        data_file.write('var data_serie_pause_initialmark = [{}]\n'.format(data.get('pause_initialmark', '')))
-        data_file.write('var data_serie_pause_finalmark = [{}]\n'.format(data.get('pause_finalmark', '')))
+        write_data_serie(data_file, 'data_serie_heap_gen0', data.get('gen0_occupancy', ''))
+        write_data_serie(data_file, 'data_serie_heap_gen1', data.get('gen1_occupancy', ''))
+        write_data_serie(data_file, 'data_serie_heap_gen2', data.get('gen2_occupancy', ''))
+        write_data_serie(data_file, 'data_serie_heap_gen3', data.get('gen3_occupancy', ''))
+        write_data_serie(data_file, 'data_serie_heap_total', data.get('total_heap_occupancy', ''))
+        write_data_serie(data_file, 'data_serie_pause_gen0', data.get('pause_gen0', ''))
+        write_data_serie(data_file, 'data_serie_pause_gen1', data.get('pause_gen1', ''))
+        write_data_serie(data_file, 'data_serie_pause_initialmark', data.get('pause_initialmark', ''))
+        write_data_serie(data_file, 'data_serie_pause_finalmark', data.get('pause_finalmark', ''))
         series = build_series(data.get('minorgc', ''), data.get('fullgc', ''), data.get('initialmark', ''),
                              data.get('finalremark', ''), data.get('cleanup', ''), data.get('mixed', ''))
         data_file.write('var series = [{}]\n'.format(series))
+        if tile_writer is not None:
+            tile_writer.write_index(data_file)
     finally:
         data_file.close()
 
 
 gclog_filename = sys.argv[1]
 data_filename = sys.argv[2]
-gclog_file = open_file(gclog_filename, "r")
+# --tiles: series of more than TILE_POINTS points written as zoom level tiles, loaded on demand by the charts
+tiles = '--tiles' in sys.argv[3:]
+# .nettrace: binary trace of dotnet-trace, with the GC events of the runtime provider, else PerfView GCStats CSV
+if is_nettrace(gclog_filename):
+    gc_analyzer.info_output = sys.stdout
+    gclog_file = open_file(gclog_filename, "rb")
+    gcs = iter_nettrace_gcs(gclog_file)
+else:
+    gclog_file = open_file(gclog_filename, "r")
+    gcs = iter_csv_gcs(gclog_file)
 try:
-    parse(gclog_file, data_filename)
+    parse(gcs, data_filename, tiles)
 finally:
     gclog_file.close()
\ No newline at end of file
@@ -0,0 +1,263 @@
+import collections
+import datetime
+import math
+
+# Finding levels
+INFO = 1
+WARNING = 2
+CRITICAL = 3
+
+LEVEL_NAMES = {INFO: 'INFO', WARNING: 'WARNING', CRITICAL: 'CRITICAL'}
+
+LEVEL_COLORS = {INFO: 'rgba(68, 170, 213, 0.2)', WARNING: 'rgba(255, 165, 0, 0.2)', CRITICAL: 'rgba(255, 0, 0, 0.2)'}
+
+
+def format_time_ms(time_ms):
+    dt = datetime.datetime(1970, 1, 1) + datetime.timedelta(milliseconds=time_ms)
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.') + '{:03d}'.format(dt.microsecond // 1000)
+
+
+class Finding(object):
+    def __init__(self, level, score, start_ms, end_ms, title, message):
+        self.level = level
+        self.score = score
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.title = title
+        self.message = message
+
+    def rank(self):
+        return self.level, self.score
+
+    def __str__(self):
+        return '[{}] {} {}: {}'.format(LEVEL_NAMES[self.level], format_time_ms(self.start_ms), self.title, self.message)
+
+
+class ChangePointDetector(object):
+    """Two-sided CUSUM on standardized pause durations, restarted after each detected regime change"""
+    def __init__(self, kind, warmup=30, drift=0.5, threshold=8.0, ewma_alpha=0.1):
+        self.kind = kind
+        self.warmup = warmup
+        self.drift = drift
+        self.threshold = threshold
+        self.ewma_alpha = ewma_alpha
+        self.findings = []
+        self.reset(None)
+
+    def reset(self, start_ms):
+        self.regime_start_ms = start_ms
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.cusum_high = 0.0
+        self.cusum_low = 0.0
+        self.ewma = None
+
+    def add(self, time_ms, value):
+        if self.regime_start_ms is None:
+            self.regime_start_ms = time_ms
+        self.ewma = value if self.ewma is None else self.ewma + self.ewma_alpha * (value - self.ewma)
+        if self.count >= self.warmup:
+            stddev = math.sqrt(self.m2 / (self.count - 1))
+            if stddev > 0:
+                z = (value - self.mean) / stddev
+                self.cusum_high = max(0.0, self.cusum_high + z - self.drift)
+                self.cusum_low = max(0.0, self.cusum_low - z - self.drift)
+                if self.cusum_high > self.threshold or self.cusum_low > self.threshold:
+                    self.report(time_ms)
+                    self.reset(time_ms)
+                    self.ewma = value
+        # Welford update of the current regime
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def report(self, time_ms):
+        before = self.mean
+        after = self.ewma
+        change = abs(after - before) / before if before > 0 else 0
+        level = WARNING if after > before else INFO
+        direction = 'up' if after > before else 'down'
+        self.findings.append(Finding(level, change, time_ms, time_ms, '{} pause regime change'.format(self.kind),
+                                     '{} pauses went {} from {:.1f}ms to {:.1f}ms (regime since {})'.format(
+                                         self.kind, direction, before, after, format_time_ms(self.regime_start_ms))))
+
+    def finish(self):
+        return self.findings
+
+
+class HeapFloorDetector(object):
+    """Online linear regression on the minimum heap after GC of every window of collections"""
+    def __init__(self, window=20, min_points=5, min_growth_per_hour=0.01, min_r2=0.5):
+        self.window = window
+        self.min_points = min_points
+        self.min_growth_per_hour = min_growth_per_hour
+        self.min_r2 = min_r2
+        self.window_count = 0
+        self.window_min = None
+        self.window_min_ms = None
+        self.origin_ms = None
+        self.last_ms = None
+        self.n = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xx = 0.0
+        self.sum_xy = 0.0
+        self.sum_yy = 0.0
+
+    def add(self, time_ms, heap_after_mb):
+        if self.window_min is None or heap_after_mb < self.window_min:
+            self.window_min = heap_after_mb
+            self.window_min_ms = time_ms
+        self.window_count += 1
+        if self.window_count == self.window:
+            self.add_floor(self.window_min_ms, self.window_min)
+            self.window_count = 0
+            self.window_min = None
+
+    def add_floor(self, time_ms, floor_mb):
+        if self.origin_ms is None:
+            self.origin_ms = time_ms
+        self.last_ms = time_ms
+        x = (time_ms - self.origin_ms) / 3600000.0
+        self.n += 1
+        self.sum_x += x
+        self.sum_y += floor_mb
+        self.sum_xx += x * x
+        self.sum_xy += x * floor_mb
+        self.sum_yy += floor_mb * floor_mb
+
+    def regression(self):
+        # returns slope (MB/h), intercept (MB) & r2 of the floors, None if not enough points
+        if self.n < self.min_points:
+            return None
+        sxx = self.sum_xx - self.sum_x * self.sum_x / self.n
+        sxy = self.sum_xy - self.sum_x * self.sum_y / self.n
+        syy = self.sum_yy - self.sum_y * self.sum_y / self.n
+        if sxx <= 0:
+            return None
+        slope = sxy / sxx
+        intercept = (self.sum_y - slope * self.sum_x) / self.n
+        r2 = sxy * sxy / (sxx * syy) if syy > 0 else 0
+        return slope, intercept, r2
+
+    def trend(self):
+        # start & end points of the regression line as (time_ms, MB)
+        regression = self.regression()
+        if regression is None:
+            return []
+        slope, intercept, r2 = regression
+        hours = (self.last_ms - self.origin_ms) / 3600000.0
+        return [(self.origin_ms, intercept), (self.last_ms, intercept + slope * hours)]
+
+    def finish(self):
+        regression = self.regression()
+        if regression is None:
+            return []
+        slope, intercept, r2 = regression
+        mean_floor = self.sum_y / self.n
+        if mean_floor <= 0 or slope / mean_floor < self.min_growth_per_hour or r2 < self.min_r2:
+            return []
+        growth = slope / mean_floor
+        level = CRITICAL if growth > 0.1 else WARNING
+        return [Finding(level, growth, self.origin_ms, self.last_ms, 'rising heap floor',
+                        'heap after GC floor grows by {:.1f}MB/h ({:.1f}%/h, r2={:.2f}), possible memory leak'.format(
+                            slope, growth * 100, r2))]
+
+
+class BurstDetector(object):
+    """Flags at least count events within window_ms, keeping only the last count timestamps"""
+    def __init__(self, title, count, window_ms, level=CRITICAL):
+        self.title = title
+        self.count = count
+        self.window_ms = window_ms
+        self.level = level
+        self.times = collections.deque(maxlen=count)
+        self.burst_start_ms = None
+        self.burst_end_ms = None
+        self.burst_count = 0
+        self.findings = []
+
+    def add(self, time_ms):
+        if self.burst_start_ms is not None and time_ms - self.burst_end_ms > self.window_ms:
+            self.report()
+        self.times.append(time_ms)
+        if self.burst_start_ms is not None:
+            self.burst_end_ms = time_ms
+            self.burst_count += 1
+        elif len(self.times) == self.count and time_ms - self.times[0] <= self.window_ms:
+            self.burst_start_ms = self.times[0]
+            self.burst_end_ms = time_ms
+            self.burst_count = self.count
+
+    def report(self):
+        duration_s = (self.burst_end_ms - self.burst_start_ms) / 1000.0
+        self.findings.append(Finding(self.level, self.burst_count, self.burst_start_ms, self.burst_end_ms, self.title,
+                                     '{} occurrences in {:.0f}s'.format(self.burst_count, duration_s)))
+        self.burst_start_ms = None
+        self.times.clear()
+
+    def finish(self):
+        if self.burst_start_ms is not None:
+            self.report()
+        return self.findings
+
+
+class AnomalyAnalyzer(object):
+    """Streaming pass over the parsed events, with constant memory per detector"""
+    def __init__(self):
+        self.change_points = {}
+        self.heap_floor = HeapFloorDetector()
+        self.fullgc_bursts = BurstDetector('Full GC burst', 3, 10 * 60 * 1000)
+        self.degenerated_storms = BurstDetector('degenerated GC storm', 5, 5 * 60 * 1000)
+        self.to_space_exhaustions = BurstDetector('to-space exhausted', 1, 60 * 1000)
+        self.promotion_failures = BurstDetector('promotion failed', 1, 60 * 1000)
+        self.concurrent_mode_failures = BurstDetector('concurrent mode failure', 1, 60 * 1000)
+        self.heap_floor_findings = []
+
+    def add_event(self, kind, time_ms, pause_ms, heap_after_mb=None):
+        detector = self.change_points.get(kind)
+        if detector is None:
+            detector = ChangePointDetector(kind)
+            self.change_points[kind] = detector
+        detector.add(time_ms, pause_ms)
+        if heap_after_mb is not None:
+            self.heap_floor.add(time_ms, heap_after_mb)
+        if kind == 'fullgc':
+            self.fullgc_bursts.add(time_ms)
+        elif kind == 'degenerated':
+            self.degenerated_storms.add(time_ms)
+
+    def add_heap_after(self, time_ms, heap_after_mb):
+        self.heap_floor.add(time_ms, heap_after_mb)
+
+    def add_to_space_exhausted(self, time_ms):
+        self.to_space_exhaustions.add(time_ms)
+
+    def add_promotion_failed(self, time_ms):
+        self.promotion_failures.add(time_ms)
+
+    def add_concurrent_mode_failure(self, time_ms):
+        self.concurrent_mode_failures.add(time_ms)
+
+    def finish(self):
+        # ranked findings, most severe first
+        findings = []
+        for detector in self.change_points.values():
+            findings.extend(detector.finish())
+        self.heap_floor_findings = self.heap_floor.finish()
+        findings.extend(self.heap_floor_findings)
+        findings.extend(self.fullgc_bursts.finish())
+        findings.extend(self.degenerated_storms.finish())
+        findings.extend(self.to_space_exhaustions.finish())
+        findings.extend(self.promotion_failures.finish())
+        findings.extend(self.concurrent_mode_failures.finish())
+        findings.sort(key=Finding.rank, reverse=True)
+        return findings
+
+    def heap_floor_trend(self):
+        # regression line of the heap floor, only when reported as rising
+        if not self.heap_floor_findings:
+            return []
+        return self.heap_floor.trend()
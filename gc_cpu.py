@@ -0,0 +1,227 @@
+import heapq
+import math
+
+from gc_stats_engine import percentile_indexes
+
+# cpu times of JDK8 logs have a 10ms resolution: shorter pauses are not judged
+MIN_REAL_MS = 20
+# share of sys in the GC cpu time above which a pause is sys heavy: page faults, swapping, transparent huge pages
+SYS_HEAVY_FRACTION = 0.3
+# wall time over cpu time above which the GC threads were starved: waiting for a cpu more than running
+STARVED_REAL_RATIO = 1.5
+# percentile of the parallelism of the pauses of a kind taken as the parallelism its GC threads get on the host
+EXPECTED_PARALLELISM_PERCENTILE = 90
+# pauses reported as the most blocked by the OS
+TOP_BLOCKED_PAUSES = 10
+PARALLELISM_PERCENTILES = [10, 50, 90]
+# bin width of the parallelism histograms, the precision of the parallelism percentiles
+PARALLELISM_RESOLUTION = 0.01
+# most blocked pauses kept per kind, per pause reported: their blocked time is estimated while parsing
+TOP_CANDIDATES_FACTOR = 4
+# pauses of a kind between 2 estimations of its expected parallelism, after the first ones (1, 2, 4...)
+ESTIMATION_INTERVAL = 256
+
+
+def histogram_bin(value):
+    # floor, not moved down a bin by the float division (6.0 / 0.01 = 599.99...)
+    return int(value / PARALLELISM_RESOLUTION + 1e-9)
+
+
+def histogram_percentiles(bins, count, percentiles):
+    # nearest rank (lower) percentiles of the values counted per bin as [count, min value], the min value of its bin
+    indexes = percentile_indexes(count, percentiles)
+    values = [None] * len(percentiles)
+    cumulated = 0
+    for value_bin in sorted(bins):
+        bin_count, min_value = bins[value_bin]
+        cumulated += bin_count
+        for position, index in enumerate(indexes):
+            if values[position] is None and index < cumulated:
+                values[position] = min_value
+        if None not in values:
+            break
+    return values
+
+
+def add_to_bin(bins, value_bin, count, value):
+    counted = bins.get(value_bin)
+    if counted is None:
+        bins[value_bin] = [count, value]
+    else:
+        counted[0] += count
+        counted[1] = min(counted[1], value)
+
+
+class KindCpuTimes(object):
+    """Running aggregates of the cpu times of the pauses of a kind, memory bounded by the histogram bins
+
+    parallelism_bins counts the pauses per parallelism bin, ratio_times sums [real_ms, user_ms] of the pauses per
+    user/real bin: the blocked time of the pauses with user/real below the expected parallelism E is
+    sum(real) - sum(user) / E over their bins. candidates is a heap of the most blocked pauses as (blocked_ms,
+    -time_ms, user_ms, sys_ms, real_ms), ranked with the expected parallelism estimated so far, the first pause
+    first on ties.
+    """
+    def __init__(self, max_candidates):
+        self.count = 0
+        self.parallelism_bins = {}
+        self.ratio_times = {}
+        self.expected_parallelism = None
+        self.next_estimation = 1
+        self.max_candidates = max_candidates
+        self.candidates = []
+
+    def estimate_expected_parallelism(self):
+        return histogram_percentiles(self.parallelism_bins, self.count, [EXPECTED_PARALLELISM_PERCENTILE])[0]
+
+    def blocked_ms(self, user_ms, real_ms, expected_parallelism):
+        return max(real_ms - user_ms / expected_parallelism, 0.0) if expected_parallelism > 0 else 0.0
+
+    def add(self, time_ms, user_ms, sys_ms, real_ms, parallelism):
+        self.count += 1
+        add_to_bin(self.parallelism_bins, histogram_bin(parallelism), 1, parallelism)
+        ratio_bin = histogram_bin(user_ms / real_ms)
+        times = self.ratio_times.get(ratio_bin)
+        if times is None:
+            self.ratio_times[ratio_bin] = [real_ms, user_ms]
+        else:
+            times[0] += real_ms
+            times[1] += user_ms
+        if self.count == self.next_estimation:
+            self.expected_parallelism = self.estimate_expected_parallelism()
+            self.next_estimation = min(self.count * 2, self.count + ESTIMATION_INTERVAL)
+            # ranked again with the new estimation
+            self.candidates = [(self.blocked_ms(candidate[2], candidate[4], self.expected_parallelism),) + candidate[1:]
+                               for candidate in self.candidates]
+            heapq.heapify(self.candidates)
+        candidate = (self.blocked_ms(user_ms, real_ms, self.expected_parallelism), -time_ms, user_ms, sys_ms, real_ms)
+        if len(self.candidates) < self.max_candidates:
+            heapq.heappush(self.candidates, candidate)
+        elif candidate > self.candidates[0]:
+            heapq.heapreplace(self.candidates, candidate)
+
+    def total_blocked_ms(self, expected_parallelism):
+        blocked_ms = 0.0
+        for ratio_bin, (real_ms, user_ms) in self.ratio_times.items():
+            if (ratio_bin + 0.5) * PARALLELISM_RESOLUTION < expected_parallelism:
+                blocked_ms += real_ms - user_ms / expected_parallelism
+        return blocked_ms
+
+
+class CpuAnalyzer(object):
+    """GC threads parallelism & cpu efficiency of the pauses, from their user/sys/real times
+
+    Per pause: parallelism (user+sys)/real, sys fraction sys/(user+sys), starved when real >= STARVED_REAL_RATIO x
+    (user+sys). The time a pause was blocked by the OS rather than by work is its real time minus its user time run at
+    the parallelism the GC threads usually get for this kind of pause (EXPECTED_PARALLELISM_PERCENTILE of the pauses
+    of the kind, serial phases of full GCs lowering it): sys time and time waiting for a cpu.
+
+    Pauses are not stored: running sums, parallelism histograms per kind and the top candidates of the most blocked
+    pauses only.
+    """
+    def __init__(self, top=TOP_BLOCKED_PAUSES):
+        self.top = top
+        self.kinds = {}
+        self.count = 0
+        self.user_ms = 0.0
+        self.sys_ms = 0.0
+        self.real_ms = 0.0
+        # Welford's running mean & sum of the squared deviations
+        self.parallelism_total = 0.0
+        self.parallelism_mean = 0.0
+        self.parallelism_deviations = 0.0
+        self.parallelism_min = None
+        self.parallelism_max = None
+        self.unjudged_count = 0
+        self.sys_heavy_count = 0
+        self.starved_count = 0
+
+    def add_times(self, kind, time_ms, user_ms, sys_ms, real_ms):
+        # returns (parallelism, sys fraction) of the pause, None when too short to be judged
+        cpu_ms = user_ms + sys_ms
+        if real_ms < MIN_REAL_MS or cpu_ms <= 0:
+            self.unjudged_count += 1
+            return None
+        kind_times = self.kinds.get(kind)
+        if kind_times is None:
+            kind_times = KindCpuTimes(self.top * TOP_CANDIDATES_FACTOR)
+            self.kinds[kind] = kind_times
+        parallelism = cpu_ms / real_ms
+        sys_fraction = sys_ms / cpu_ms
+        kind_times.add(time_ms, user_ms, sys_ms, real_ms, parallelism)
+        self.count += 1
+        self.user_ms += user_ms
+        self.sys_ms += sys_ms
+        self.real_ms += real_ms
+        self.parallelism_total += parallelism
+        delta = parallelism - self.parallelism_mean
+        self.parallelism_mean += delta / self.count
+        self.parallelism_deviations += delta * (parallelism - self.parallelism_mean)
+        if self.parallelism_min is None or parallelism < self.parallelism_min:
+            self.parallelism_min = parallelism
+        if self.parallelism_max is None or parallelism > self.parallelism_max:
+            self.parallelism_max = parallelism
+        if sys_fraction >= SYS_HEAVY_FRACTION:
+            self.sys_heavy_count += 1
+        if real_ms >= STARVED_REAL_RATIO * cpu_ms:
+            self.starved_count += 1
+        return parallelism, sys_fraction
+
+    def parallelism_stats(self):
+        # same content as the stats of the pause durations, percentiles from the histograms
+        bins = {}
+        for kind_times in self.kinds.values():
+            for parallelism_bin, (count, min_value) in kind_times.parallelism_bins.items():
+                add_to_bin(bins, parallelism_bin, count, min_value)
+        return {
+            'count': self.count,
+            'total': self.parallelism_total,
+            'mean': self.parallelism_mean,
+            'stddev': math.sqrt(self.parallelism_deviations / self.count),
+            'min': self.parallelism_min,
+            'max': self.parallelism_max,
+            'percentiles': list(zip(PARALLELISM_PERCENTILES,
+                                    histogram_percentiles(bins, self.count, PARALLELISM_PERCENTILES)))
+        }
+
+    def summary(self):
+        if self.count == 0:
+            return None
+        expected_parallelism = {}
+        blocked_ms = 0.0
+        candidates = []
+        for kind, kind_times in self.kinds.items():
+            expected = kind_times.estimate_expected_parallelism()
+            expected_parallelism[kind] = expected
+            blocked_ms += kind_times.total_blocked_ms(expected)
+            for blocked_estimate_ms, negated_time_ms, user_ms, sys_ms, real_ms in kind_times.candidates:
+                candidates.append((kind_times.blocked_ms(user_ms, real_ms, expected), negated_time_ms, kind, user_ms,
+                                   sys_ms, real_ms))
+        top_pauses = []
+        for pause_blocked_ms, negated_time_ms, kind, user_ms, sys_ms, real_ms in heapq.nlargest(self.top, candidates):
+            if pause_blocked_ms <= 0:
+                break
+            cpu_ms = user_ms + sys_ms
+            top_pauses.append({
+                'time_ms': -negated_time_ms,
+                'kind': kind,
+                'user_ms': user_ms,
+                'sys_ms': sys_ms,
+                'real_ms': real_ms,
+                'parallelism': cpu_ms / real_ms,
+                'sys_fraction': sys_ms / cpu_ms,
+                'blocked_ms': pause_blocked_ms,
+                'sys_heavy': sys_ms / cpu_ms >= SYS_HEAVY_FRACTION,
+                'starved': real_ms >= STARVED_REAL_RATIO * cpu_ms
+            })
+        return {
+            'pauses': self.count,
+            'unjudged_pauses': self.unjudged_count,
+            'parallelism': self.parallelism_stats(),
+            'expected_parallelism': expected_parallelism,
+            'sys_fraction': self.sys_ms / (self.user_ms + self.sys_ms),
+            'sys_heavy_pauses': self.sys_heavy_count,
+            'starved_pauses': self.starved_count,
+            'blocked_ms': blocked_ms,
+            'real_ms': self.real_ms,
+            'top_blocked': top_pauses
+        }
@@ -0,0 +1,246 @@
+import array
+import base64
+import calendar
+import json
+import os
+import re
+import sys
+import zlib
+
+# series drawn by each chart of chart/index.htm (serie name prefixes), in rendering order: a chart is drawn as soon as
+# its series are decoded. Series of no other chart are the pauses of the GC.
+CHART_SERIES = [
+    ('data_serie_heap',),
+    None,
+    ('data_serie_user', 'data_serie_sys', 'data_serie_real'),
+    ('data_serie_young', 'data_serie_old', 'data_serie_humongous', 'data_serie_metaspace'),
+    ('data_serie_survival_',),
+    ('data_serie_phase_',),
+]
+PAUSE_CHART = CHART_SERIES.index(None)
+# x of the points with a fractional ms offset are kept to the microsecond
+X_FRACTION_SCALE = 1000
+# y decimals kept as integers, raw doubles beyond
+MAX_Y_DECIMALS = 9
+INT32_MIN = -2 ** 31
+INT32_MAX = 2 ** 31 - 1
+# points of a serie converted per chunk into its columns
+COLUMN_CHUNK_POINTS = 4096
+# decoder of the embedded series, inlined before the data script
+EMBEDDED_SCRIPT = 'embedded.js'
+DATA_SCRIPT = 'data.js'
+SCRIPT_TAG_RE = re.compile('<script src="([^"]+)"></script>')
+SCRIPT_END = '</script'
+
+
+def chart_index(var_name):
+    for index, prefixes in enumerate(CHART_SERIES):
+        if prefixes is not None and var_name.startswith(prefixes):
+            return index
+    return PAUSE_CHART
+
+
+def point_columns(points):
+    # x (ms) & y text of '[x,y],\n' chart points, x being either ms or a javascript Date.UTC(...)+offset
+    minute_ms = {}
+    xs = []
+    ys = []
+    for point in points:
+        comma = point.rindex(',', 0, -3)
+        ys.append(point[1 + comma:-3])
+        if point[1] != 'D':
+            xs.append(float(point[1:comma]))
+            continue
+        close = point.index(')', 10)
+        date = point[10:close]
+        second_end = date.rindex(',')
+        minute_end = date.rindex(',', 0, second_end)
+        minute = date[:minute_end]
+        base_ms = minute_ms.get(minute)
+        if base_ms is None:
+            fields = [int(field) for field in minute.split(',')]
+            # month 0 based as in javascript, overflowing to the next year
+            base_ms = calendar.timegm((fields[0] + fields[1] // 12, fields[1] % 12 + 1, fields[2], fields[3],
+                                       fields[4], 0)) * 1000
+            minute_ms[minute] = base_ms
+        xs.append(base_ms + int(date[minute_end + 1:second_end]) * 1000 + int(date[second_end + 1:]) +
+                  float(point[close + 2:comma]))
+    return xs, ys
+
+
+def iter_chunks(values):
+    for idx in range(0, len(values), COLUMN_CHUNK_POINTS):
+        yield values[idx:idx + COLUMN_CHUNK_POINTS]
+
+
+def scaled_column(values, scale, start=0):
+    # integers of values x scale minus start, as doubles: exact below 2^53, beyond what int32 columns hold anyway
+    column = array.array('d')
+    for chunk in iter_chunks(values):
+        column.extend([round(value * scale) - start for value in chunk])
+    return column
+
+
+def encode_column(values):
+    # int32 when all integer values fit, the doubles otherwise, little endian as typed arrays of the browsers
+    if values and (min(values) < INT32_MIN or max(values) > INT32_MAX):
+        column = values
+        kind = 'f8'
+    else:
+        column = array.array('i')
+        for chunk in iter_chunks(values):
+            column.fromlist([int(value) for value in chunk])
+        kind = 'i4'
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return kind, column
+
+
+class EmbeddedSeriesWriter(object):
+    """Series of the charts as columns compressed in the single file report, one zlib stream per chart
+
+    Per serie: x as deltas from the first point (ms, or us when an offset is fractional), y as integers of its
+    decimals (doubles when not decimal), int32 when they fit. Columns are built COLUMN_CHUNK_POINTS points at a time
+    as arrays of doubles, never as lists of the whole serie. The page inflates the streams one after the other with
+    DecompressionStream into typed arrays, in the order of the charts: the first ones are drawn while the next are
+    decoded.
+    """
+    def __init__(self):
+        self.compressors = {}
+        self.blobs = {}
+        self.series = {}
+        self.sizes = {}
+
+    def write_serie(self, var_name, points):
+        # returns whether the serie has been embedded
+        if not points:
+            return False
+        xs = array.array('d')
+        ys = array.array('d')
+        decimals = 0
+        decimal = True
+        for chunk in iter_chunks(points):
+            chunk_xs, chunk_ys = point_columns(chunk)
+            xs.extend(chunk_xs)
+            for text in chunk_ys:
+                dot = text.find('.')
+                if dot != -1:
+                    decimals = max(decimals, len(text) - dot - 1)
+                if decimal and not text.lstrip('-').replace('.', '', 1).isdigit():
+                    decimal = False
+            ys.extend([float(text) for text in chunk_ys])
+        x_scale = 1 if all(x.is_integer() for x in xs) else X_FRACTION_SCALE
+        start = round(xs[0] * x_scale)
+        x_kind, x_column = encode_column(scaled_column(xs, x_scale, start))
+        del xs
+        if decimal and decimals <= MAX_Y_DECIMALS:
+            y_scale = 10 ** decimals
+            y_kind, y_column = encode_column(scaled_column(ys, y_scale))
+        else:
+            y_scale = 1
+            y_kind = 'f8'
+            y_column = ys
+            if sys.byteorder == 'big':
+                y_column.byteswap()
+        chart = chart_index(var_name)
+        if chart not in self.compressors:
+            self.compressors[chart] = zlib.compressobj(9)
+            self.blobs[chart] = []
+            self.series[chart] = []
+            self.sizes[chart] = 0
+        offset = self.sizes[chart]
+        x_size = self.compress_column(chart, x_column)
+        y_size = self.compress_column(chart, y_column)
+        self.series[chart].append({
+            'name': var_name,
+            'count': len(points),
+            'start': start,
+            'x': [x_kind, offset, x_scale],
+            'y': [y_kind, offset + x_size, y_scale]
+        })
+        self.sizes[chart] = offset + x_size + y_size
+        return True
+
+    def compress_column(self, chart, column):
+        # returns the size of the column in the stream, aligned on 8 bytes: typed arrays are views on the buffer
+        data = memoryview(column).cast('B')
+        padding = -data.nbytes % 8
+        self.blobs[chart].append(self.compressors[chart].compress(data))
+        if padding:
+            self.blobs[chart].append(self.compressors[chart].compress(b'\0' * padding))
+        return data.nbytes + padding
+
+    def write_script(self, output):
+        # one embeddedSeries.add(chart, series, base64 of the zlib stream) call per chart, in rendering order
+        for chart in sorted(self.compressors):
+            self.blobs[chart].append(self.compressors[chart].flush())
+            output.write("embeddedSeries.add({}, {}, '".format(chart, json.dumps(self.series[chart], sort_keys=True)))
+            output.write(base64.b64encode(b''.join(self.blobs[chart])).decode('ascii'))
+            output.write("');\n")
+
+
+class HTMLReportFile(object):
+    """Data file of a single file report: writes the data script inline in chart_dir/index.htm as it is written
+
+    write_head writes the page up to the data script with the scripts before it inlined, then write escapes the data
+    script as it streams: the whole script is never held in memory. write_tail ends it with the embedded series and
+    writes the rest of the page.
+    """
+    def __init__(self, output, embedded, chart_dir):
+        self.output = output
+        self.embedded = embedded
+        self.chart_dir = chart_dir
+        self.template_tail = None
+        # end of the last write that may start a '</script' split across writes
+        self.pending = ''
+
+    def write_head(self):
+        with open(os.path.join(self.chart_dir, 'index.htm')) as template_file:
+            template = template_file.read()
+        data_tag = '<script src="{}"></script>'.format(DATA_SCRIPT)
+        position = template.index(data_tag)
+        self.write_template(template[:position])
+        self.template_tail = template[position + len(data_tag):]
+        self.output.write('<script>\n')
+        self.output.write(inline_script(os.path.join(self.chart_dir, EMBEDDED_SCRIPT)))
+
+    def write(self, text):
+        # '</script' would end the inline script element
+        text = (self.pending + text).replace('</script', '<\\/script')
+        keep = 0
+        for length in range(min(len(SCRIPT_END), len(text)) - 1, 0, -1):
+            if text.endswith(SCRIPT_END[:length]):
+                keep = length
+                break
+        self.pending = text[len(text) - keep:]
+        self.output.write(text[:len(text) - keep])
+
+    def write_tail(self):
+        self.output.write(self.pending)
+        self.pending = ''
+        self.embedded.write_script(self.output)
+        self.output.write('</script>')
+        self.write_template(self.template_tail)
+
+    def write_template(self, template):
+        position = 0
+        for match in SCRIPT_TAG_RE.finditer(template):
+            self.output.write(template[position:match.start()])
+            position = match.end()
+            name = match.group(1)
+            if os.path.isfile(os.path.join(self.chart_dir, name)):
+                # optional scripts (boost.js) are only inlined when saved in chart_dir
+                self.output.write('<script>\n')
+                self.output.write(inline_script(os.path.join(self.chart_dir, name)))
+                self.output.write('</script>')
+        self.output.write(template[position:])
+
+    def close(self):
+        self.output.close()
+
+
+def inline_script(path):
+    # '</script' would end the inline script element
+    with open(path) as script_file:
+        script = script_file.read()
+    return script.replace('</script', '<\\/script') + '\n'
@@ -0,0 +1,258 @@
+import array
+import bisect
+import calendar
+import heapq
+import re
+
+# request timestamp (YYYY-MM-DD[T ]HH:MM:SS[.fraction] or epoch seconds/ms) and duration of an access log line:
+# the timestamp at the start of the line (optionally in brackets), the duration as its last number
+DEFAULT_LATENCY_PATTERN = r'^\[?(?P<TIME>\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?|\d{10}(?:\d{3})?(?:\.\d+)?)' \
+                          r'.*[^\d.](?P<DURATION>\d+(?:\.\d+)?)\s*(?:ms)?\s*$'
+DURATION_UNITS = {'s': 1000.0, 'ms': 1.0, 'us': 0.001}
+DEFAULT_SLOW_PERCENTILES = [99, 99.9]
+# requests longer than that are joined with the pauses of the last MAX_REQUEST_MS only
+MAX_REQUEST_MS = 60000
+# latency histogram: log scale buckets (about 6% wide) from 1us to 3h, upper bounds in ms
+BUCKETS_PER_DECADE = 40
+LATENCY_BUCKETS = [10 ** (exponent / float(BUCKETS_PER_DECADE))
+                   for exponent in range(-3 * BUCKETS_PER_DECADE, 7 * BUCKETS_PER_DECADE + 1)]
+
+
+def time_ms(value, zone_offset_ms=0):
+    # ms since epoch of an ISO timestamp (timezone ignored, as gc log timestamps) or an epoch in seconds or ms, the
+    # epoch being an instant: shifted by zone_offset_ms to the wall clock of the gc log read as UTC
+    if value[4] == '-':
+        fraction = value[20:]
+        return calendar.timegm((int(value[0:4]), int(value[5:7]), int(value[8:10]), int(value[11:13]),
+                                int(value[14:16]), int(value[17:19]))) * 1000 + int((fraction + '000')[:3])
+    epoch = float(value)
+    return (epoch if len(value.split('.')[0]) > 10 else epoch * 1000) + zone_offset_ms
+
+
+def iter_requests(log_file, pattern=DEFAULT_LATENCY_PATTERN, time_at_end=True, unit='ms', skipped=None,
+                  zone_offset_ms=0):
+    """Yields (time_ms, start_ms, end_ms) of the requests of an access log, time_ms being the logged timestamp
+
+    Access logs are usually written when the request completes: the timestamp is its end, else its start.
+    skipped (list of one int) counts the lines not matching the pattern. ISO timestamps are wall clock times in the
+    zone of the gc log, epoch timestamps are shifted by zone_offset_ms, the zone offset of the gc log.
+    """
+    line_re = re.compile(pattern)
+    factor = DURATION_UNITS[unit]
+    # many requests per second: the timestamp is converted once per second
+    last_second = None
+    second_ms = 0
+    for line in log_file:
+        match = line_re.search(line)
+        if match is None:
+            if skipped is not None:
+                skipped[0] += 1
+            continue
+        logged = match.group('TIME')
+        if logged[4] == '-':
+            if logged[:19] != last_second:
+                last_second = logged[:19]
+                second_ms = time_ms(last_second)
+            logged_ms = second_ms + int((logged[20:] + '000')[:3])
+        else:
+            logged_ms = time_ms(logged, zone_offset_ms)
+        duration_ms = float(match.group('DURATION')) * factor
+        if time_at_end:
+            yield logged_ms, logged_ms - duration_ms, logged_ms
+        else:
+            yield logged_ms, logged_ms, logged_ms + duration_ms
+
+
+class LatencyHistogram(object):
+    """Requests count & latency per log scale bucket, with the pause time overlapping them per GC event kind"""
+    def __init__(self):
+        self.counts = array.array('q', [0] * (len(LATENCY_BUCKETS) + 1))
+        self.latency_ms = array.array('d', [0.0] * (len(LATENCY_BUCKETS) + 1))
+        self.paused_counts = array.array('q', [0] * (len(LATENCY_BUCKETS) + 1))
+        self.kind_counts = {}
+        self.kind_ms = {}
+
+    def add(self, duration_ms, overlaps):
+        # overlaps: kind => pause ms overlapping the request
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, duration_ms)
+        self.counts[bucket] += 1
+        self.latency_ms[bucket] += duration_ms
+        if not overlaps:
+            return
+        self.paused_counts[bucket] += 1
+        for kind, overlap_ms in overlaps.items():
+            if kind not in self.kind_counts:
+                self.kind_counts[kind] = array.array('q', [0] * (len(LATENCY_BUCKETS) + 1))
+                self.kind_ms[kind] = array.array('d', [0.0] * (len(LATENCY_BUCKETS) + 1))
+            self.kind_counts[kind][bucket] += 1
+            self.kind_ms[kind][bucket] += overlap_ms
+
+    def percentile_bucket(self, percentile):
+        # first bucket of the requests at or above the percentile
+        total = sum(self.counts)
+        rank = total * percentile / 100.0
+        cumulated = 0
+        for bucket, count in enumerate(self.counts):
+            cumulated += count
+            if cumulated > rank or cumulated == total:
+                return bucket
+        return len(self.counts) - 1
+
+    def bucket_lower_bound(self, bucket):
+        return LATENCY_BUCKETS[bucket - 1] if bucket > 0 else 0.0
+
+
+class LatencyCorrelator(object):
+    """Streaming merge-join of GC pauses and requests, both sorted by time (requests may be slightly out of order)
+
+    Memory does not grow with the number of requests: pauses are kept in a window of max_request_ms around the
+    current request, and requests are only counted in the latency histogram buckets.
+    """
+    def __init__(self, pause_events, max_request_ms=MAX_REQUEST_MS):
+        self.pause_events = iter(pause_events)
+        self.next_pause = next(self.pause_events, None)
+        self.max_request_ms = max_request_ms
+        # window of pauses sorted by start, from head
+        self.starts = []
+        self.ends = []
+        self.kinds = []
+        self.head = 0
+        self.max_pause_ms = 0.0
+        self.pause_count = 0
+        self.request_count = 0
+        self.long_request_count = 0
+        self.histogram = LatencyHistogram()
+
+    def admit_pauses(self, until_ms):
+        pause = self.next_pause
+        while pause is not None and pause.time_ms < until_ms:
+            if pause.pause_ms > 0:
+                self.starts.append(pause.time_ms)
+                self.ends.append(pause.time_ms + pause.pause_ms)
+                self.kinds.append(pause.kind)
+                self.max_pause_ms = max(self.max_pause_ms, pause.pause_ms)
+                self.pause_count += 1
+            pause = next(self.pause_events, None)
+        self.next_pause = pause
+
+    def evict_pauses(self, before_ms):
+        head = self.head
+        ends = self.ends
+        while head < len(ends) and ends[head] <= before_ms:
+            head += 1
+        if head > 1024 and head * 2 > len(ends):
+            del self.starts[:head]
+            del self.ends[:head]
+            del self.kinds[:head]
+            head = 0
+        self.head = head
+
+    def add_request(self, logged_ms, start_ms, end_ms):
+        duration_ms = end_ms - start_ms
+        self.request_count += 1
+        if duration_ms > self.max_request_ms:
+            self.long_request_count += 1
+        self.admit_pauses(end_ms)
+        # requests start at most max_request_ms before their logged time, itself out of order by less than that
+        self.evict_pauses(logged_ms - 2 * self.max_request_ms)
+        overlaps = {}
+        starts = self.starts
+        # pauses starting before the end of the request, backwards while they may still end after its start
+        idx = bisect.bisect_left(starts, end_ms, self.head) - 1
+        min_start_ms = start_ms - self.max_pause_ms
+        while idx >= self.head and starts[idx] > min_start_ms:
+            overlap_ms = min(self.ends[idx], end_ms) - max(starts[idx], start_ms)
+            if overlap_ms > 0:
+                kind = self.kinds[idx]
+                overlaps[kind] = overlaps.get(kind, 0.0) + overlap_ms
+            idx -= 1
+        self.histogram.add(duration_ms, overlaps)
+
+    def run(self, requests):
+        for logged_ms, start_ms, end_ms in requests:
+            self.add_request(logged_ms, start_ms, end_ms)
+        # pauses after the last request are only counted
+        while self.next_pause is not None:
+            if self.next_pause.pause_ms > 0:
+                self.pause_count += 1
+            self.next_pause = next(self.pause_events, None)
+        return self
+
+    def report(self, percentiles=None):
+        """GC attribution of the requests at or above each latency percentile (default: p99 & p99.9) as a dict"""
+        histogram = self.histogram
+        slow = []
+        for percentile in percentiles or DEFAULT_SLOW_PERCENTILES:
+            first_bucket = histogram.percentile_bucket(percentile)
+            count = sum(histogram.counts[first_bucket:])
+            latency_ms = sum(histogram.latency_ms[first_bucket:])
+            paused = sum(histogram.paused_counts[first_bucket:])
+            kinds = {}
+            for kind in sorted(histogram.kind_counts):
+                kind_count = sum(histogram.kind_counts[kind][first_bucket:])
+                if kind_count == 0:
+                    continue
+                kind_ms = sum(histogram.kind_ms[kind][first_bucket:])
+                kinds[kind] = {
+                    'requests': kind_count,
+                    'requests_ratio': kind_count / float(count),
+                    'pause_ms': kind_ms,
+                    'latency_ratio': kind_ms / latency_ms if latency_ms > 0 else 0.0
+                }
+            paused_ms = sum(kind['pause_ms'] for kind in kinds.values())
+            slow.append({
+                'percentile': percentile,
+                'threshold_ms': histogram.bucket_lower_bound(first_bucket),
+                'requests': count,
+                'paused_requests': paused,
+                'paused_ratio': paused / float(count) if count else 0.0,
+                'pause_ms': paused_ms,
+                'latency_ratio': paused_ms / latency_ms if latency_ms > 0 else 0.0,
+                'kinds': kinds
+            })
+        total = sum(histogram.counts)
+        paused = sum(histogram.paused_counts)
+        return {
+            'pauses': self.pause_count,
+            'requests': total,
+            'paused_requests': paused,
+            'paused_ratio': paused / float(total) if total else 0.0,
+            'long_requests': self.long_request_count,
+            'slow': slow
+        }
+
+
+def correlate(pause_events, request_logs, pattern=DEFAULT_LATENCY_PATTERN, time_at_end=True, unit='ms',
+              max_request_ms=MAX_REQUEST_MS, percentiles=None, zone_offset_ms=0):
+    """Joins the GCEvent (sorted by time) with the requests of access log files (each sorted by time)
+
+    zone_offset_ms is the zone offset of the gc log, its event times being wall clock times: the epoch timestamps
+    of the access logs are shifted by it. Returns the report dict of LatencyCorrelator, with the count of unparsed
+    access log lines.
+    """
+    skipped = [0]
+    requests = heapq.merge(*[iter_requests(log_file, pattern, time_at_end, unit, skipped, zone_offset_ms)
+                             for log_file in request_logs])
+    report = LatencyCorrelator(pause_events, max_request_ms).run(requests).report(percentiles)
+    report['skipped_lines'] = skipped[0]
+    return report
+
+
+def format_report(report):
+    lines = ['pauses: {}'.format(report['pauses']),
+             'requests: {} overlapping a pause: {} ({}%)'.format(report['requests'], report['paused_requests'],
+                                                                round(report['paused_ratio'] * 100, 3))]
+    if report['long_requests']:
+        lines.append('requests longer than the join window: {}'.format(report['long_requests']))
+    if report['skipped_lines']:
+        lines.append('access log lines not matched: {}'.format(report['skipped_lines']))
+    for slow in report['slow']:
+        lines.append('p{} requests (>= {} ms): {} overlapping a pause: {} ({}%) GC share of their latency: {}%'.format(
+            slow['percentile'], round(slow['threshold_ms'], 3), slow['requests'], slow['paused_requests'],
+            round(slow['paused_ratio'] * 100, 3), round(slow['latency_ratio'] * 100, 3)))
+        for kind in sorted(slow['kinds']):
+            kind_stats = slow['kinds'][kind]
+            lines.append('  {}: requests={} ({}%) pause={} ms ({}% of latency)'.format(
+                kind, kind_stats['requests'], round(kind_stats['requests_ratio'] * 100, 3),
+                round(kind_stats['pause_ms'], 3), round(kind_stats['latency_ratio'] * 100, 3)))
+    return '\n'.join(lines)
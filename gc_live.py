@@ -0,0 +1,380 @@
+import argparse
+import asyncio
+import collections
+import json
+import os
+import socket
+import stat
+import sys
+import time
+
+import gc_analyzer
+from gc_stats_engine import python_stats
+
+QUEUE_LINES = 10000  # lines buffered per stream between its reader and its parser
+BACKPRESSURE_WINDOW_S = 1.0
+MAX_BACKPRESSURE_RATIO = 0.5  # share of a window a reader waits for room in the queue beyond which it is overloaded
+STREAM_LINE_LIMIT = 1024 * 1024  # longest line read from a stream
+IDLE_FLUSH_S = 0.2  # writer idle time after which the pending JDK8 record is parsed
+REOPEN_DELAY_S = 0.1  # wait before reopening a FIFO closed by its writer
+PARSE_BATCH_LINES = 1000  # lines handled by a task before yielding to the others
+PUBLISH_INTERVAL_S = 0.5
+ROLLING_WINDOW_MS = 60 * 1000
+ROLLING_MAX_EVENTS = 10000
+ROLLING_PERCENTILES = [50, 90, 99]
+SERIE_BUCKET_MS = 1000
+SERIE_MAX_BUCKETS = 3600
+
+
+class DownsampledSerie(object):
+    """Pauses aggregated per time bucket in a ring buffer of [bucket_ms, count, max_ms, total_ms, heap_after_mb]"""
+    def __init__(self, bucket_ms=SERIE_BUCKET_MS, max_buckets=SERIE_MAX_BUCKETS):
+        self.bucket_ms = bucket_ms
+        self.buckets = collections.deque(maxlen=max_buckets)
+        # the last bucket published may have been updated since, it is published again
+        self.published_ms = None
+
+    def add(self, time_ms, pause_ms, heap_after_mb):
+        bucket_ms = time_ms - time_ms % self.bucket_ms
+        if self.buckets and self.buckets[-1][0] == bucket_ms:
+            bucket = self.buckets[-1]
+            bucket[1] += 1
+            bucket[2] = max(bucket[2], pause_ms)
+            bucket[3] += pause_ms
+            if heap_after_mb is not None:
+                bucket[4] = heap_after_mb
+        else:
+            self.buckets.append([bucket_ms, 1, pause_ms, pause_ms, heap_after_mb])
+
+    def take_updates(self):
+        # buckets added or updated since the previous call, oldest first
+        updates = []
+        for bucket in reversed(self.buckets):
+            if self.published_ms is not None and bucket[0] < self.published_ms:
+                break
+            updates.append(list(bucket))
+        updates.reverse()
+        if updates:
+            self.published_ms = updates[-1][0]
+        return updates
+
+
+class LiveStream(object):
+    """One gc log written by a JVM: a reader queues its lines, an incremental parser consumes them
+
+    When the parser cannot keep up, the reader waits for room in the queue: backpressure on the writer through the
+    pipe or socket buffer. When it waits more than MAX_BACKPRESSURE_RATIO of the time, the stream is overloaded: lines
+    are dropped while the queue is full and only pause records are parsed, until the queue is half empty.
+    """
+    def __init__(self, name, gc=None, queue_lines=QUEUE_LINES):
+        self.name = name
+        self.queue = asyncio.Queue(maxsize=queue_lines)
+        self.incremental = gc_analyzer.IncrementalParser(gc, listener=self.add_event)
+        self.rolling = collections.deque(maxlen=ROLLING_MAX_EVENTS)
+        self.serie = DownsampledSerie()
+        self.line_count = 0
+        self.event_count = 0
+        self.dropped_lines = 0
+        self.backpressure_start = None
+        self.backpressure_s = 0
+        self.overloaded = False
+        # prefilter of the parser before the overload, restored after it
+        self.event_keywords = None
+        self.closed = False
+        self.changed = False
+
+    def add_event(self, event):
+        self.event_count += 1
+        rolling = self.rolling
+        rolling.append((event.time_ms, event.pause_ms))
+        while rolling[0][0] < event.time_ms - ROLLING_WINDOW_MS:
+            rolling.popleft()
+        self.serie.add(event.time_ms, event.pause_ms, event.heap_after_mb)
+        self.changed = True
+
+    def set_overloaded(self, overloaded):
+        self.overloaded = overloaded
+        self.changed = True
+        parser = self.incremental.parser
+        if parser is None:
+            return
+        if overloaded:
+            # sheds detail records (cpu times, phases, generations, ages): only pauses pass the prefilter,
+            # those of the configured event kinds if any
+            self.event_keywords = parser.event_keywords
+            if parser.event_keywords is not None:
+                parser.event_keywords = [keyword for keyword in parser.event_keywords
+                                         if keyword not in parser.EVENT_COMPLEMENT_KEYWORDS]
+            else:
+                parser.event_keywords = [keyword for keywords in parser.EVENT_KEYWORDS.values() for keyword in keywords]
+        else:
+            parser.event_keywords = self.event_keywords
+
+    async def put_line(self, line):
+        queue = self.queue
+        if not queue.full():
+            queue.put_nowait(line)
+            return
+        if self.overloaded:
+            self.dropped_lines += 1
+            return
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await queue.put(line)
+        now = loop.time()
+        self.backpressure_s += now - start
+        if self.backpressure_start is None:
+            self.backpressure_start = start
+        elif now - self.backpressure_start >= BACKPRESSURE_WINDOW_S:
+            if self.backpressure_s > MAX_BACKPRESSURE_RATIO * (now - self.backpressure_start):
+                self.set_overloaded(True)
+            self.backpressure_start = now
+            self.backpressure_s = 0
+
+    async def read_lines(self, reader):
+        # until the writer closes the stream
+        line_count = 0
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                # longer than STREAM_LINE_LIMIT, the rest of the line is discarded by the reader
+                self.dropped_lines += 1
+                continue
+            if not line:
+                return
+            await self.put_line(line.decode('utf-8', 'replace'))
+            line_count += 1
+            if line_count % PARSE_BATCH_LINES == 0:
+                await asyncio.sleep(0)
+
+    async def next_line(self):
+        queue = self.queue
+        if not queue.empty():
+            return queue.get_nowait()
+        get = asyncio.ensure_future(queue.get())
+        try:
+            done, pending = await asyncio.wait([get], timeout=IDLE_FLUSH_S)
+            if not done:
+                # the writer is idle, the pending JDK8 record is complete
+                self.incremental.flush()
+            return await get
+        finally:
+            get.cancel()
+
+    async def parse_lines(self):
+        # until None is queued
+        queue = self.queue
+        batch_count = 0
+        while True:
+            line = await self.next_line()
+            if line is None:
+                self.incremental.finish()
+                self.closed = True
+                self.changed = True
+                return
+            self.incremental.feed(line)
+            self.line_count += 1
+            if self.overloaded and queue.qsize() < queue.maxsize // 2:
+                self.set_overloaded(False)
+            batch_count += 1
+            if batch_count == PARSE_BATCH_LINES:
+                batch_count = 0
+                await asyncio.sleep(0)
+
+    def rolling_stats(self):
+        if not self.rolling:
+            return None
+        first_ms = self.rolling[0][0]
+        last_ms, last_pause_ms = self.rolling[-1]
+        stats = python_stats([pause_ms for time_ms, pause_ms in self.rolling], ROLLING_PERCENTILES)
+        span_ms = last_ms + last_pause_ms - first_ms
+        stats['window_ms'] = ROLLING_WINDOW_MS
+        stats['throughput'] = 100.0 * (1 - stats['total'] / span_ms) if span_ms > 0 else None
+        return stats
+
+    def snapshot(self):
+        self.changed = False
+        parser = self.incremental.parser
+        return {
+            'stream': self.name,
+            'time_ms': int(time.time() * 1000),
+            'gc': parser.GC_NAME if parser is not None else None,
+            'format': gc_analyzer.LOG_FORMAT_NAMES.get(self.incremental.log_format),
+            'lines': self.line_count,
+            'events': self.event_count,
+            'dropped_lines': self.dropped_lines,
+            'queued_lines': self.queue.qsize(),
+            'overloaded': self.overloaded,
+            'closed': self.closed,
+            'rolling': self.rolling_stats(),
+            'serie': self.serie.take_updates()
+        }
+
+
+def print_snapshot(snapshot):
+    sys.stdout.write(json.dumps(snapshot, sort_keys=True) + '\n')
+    sys.stdout.flush()
+
+
+class LiveIngestion(object):
+    """Ingests concurrently the gc logs of FIFOs and Unix domain sockets (one stream per connection)
+
+    publish is called with the snapshot of each stream that changed, every publish_interval seconds.
+    """
+    def __init__(self, fifos=(), sockets=(), gc=None, publish=print_snapshot, publish_interval=PUBLISH_INTERVAL_S,
+                 queue_lines=QUEUE_LINES):
+        self.fifos = fifos
+        self.sockets = sockets
+        self.gc = gc
+        self.publish = publish
+        self.publish_interval = publish_interval
+        self.queue_lines = queue_lines
+        self.streams = []
+        self.connection_count = 0
+
+    def add_stream(self, name):
+        stream = LiveStream(name, self.gc, self.queue_lines)
+        self.streams.append(stream)
+        return stream
+
+    async def ingest(self, stream, reader):
+        parse_task = asyncio.ensure_future(stream.parse_lines())
+        try:
+            await stream.read_lines(reader)
+            await stream.queue.put(None)
+            await parse_task
+        finally:
+            parse_task.cancel()
+
+    async def read_fifo(self, path):
+        loop = asyncio.get_running_loop()
+        if not os.path.exists(path):
+            os.mkfifo(path)
+        stream = self.add_stream(path)
+        parse_task = asyncio.ensure_future(stream.parse_lines())
+        try:
+            while True:
+                # the writer may close the FIFO (e.g. JVM restart): reopen it for the next one, same stream
+                fifo = os.fdopen(os.open(path, os.O_RDONLY | os.O_NONBLOCK), 'rb', 0)
+                reader = asyncio.StreamReader(limit=STREAM_LINE_LIMIT)
+                transport, protocol = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), fifo)
+                try:
+                    await stream.read_lines(reader)
+                finally:
+                    transport.close()
+                await asyncio.sleep(REOPEN_DELAY_S)
+        finally:
+            parse_task.cancel()
+
+    async def handle_connection(self, reader, writer):
+        self.connection_count += 1
+        stream = self.add_stream('{}#{}'.format(writer.get_extra_info('sockname'), self.connection_count))
+        try:
+            await self.ingest(stream, reader)
+        finally:
+            writer.close()
+
+    async def serve_socket(self, path):
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)  # left by a previous run
+        server = await asyncio.start_unix_server(self.handle_connection, path, limit=STREAM_LINE_LIMIT)
+        async with server:
+            await server.serve_forever()
+
+    def publish_changes(self):
+        for stream in list(self.streams):
+            if stream.changed:
+                self.publish(stream.snapshot())
+            if stream.closed:
+                self.streams.remove(stream)
+
+    async def run(self, duration=None):
+        tasks = [asyncio.ensure_future(self.read_fifo(path)) for path in self.fifos]
+        tasks.extend(asyncio.ensure_future(self.serve_socket(path)) for path in self.sockets)
+        end = time.monotonic() + duration if duration is not None else None
+        try:
+            while end is None or time.monotonic() < end:
+                await asyncio.sleep(self.publish_interval)
+                for task in tasks:
+                    if task.done():
+                        task.result()  # raises the error of a failed reader
+                self.publish_changes()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for stream in self.streams:
+                if not stream.closed:
+                    stream.incremental.finish()
+            self.publish_changes()
+
+
+def replay(gclog_filename, path, rate=None, loops=1):
+    """Fake JVM writer: writes a gc log to a FIFO or Unix domain socket, at rate lines/s when given"""
+    if stat.S_ISSOCK(os.stat(path).st_mode):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        output = sock.makefile('wb')
+    else:
+        sock = None
+        output = open(path, 'wb')
+    start = time.monotonic()
+    line_count = 0
+    try:
+        for loop in range(loops):
+            with gc_analyzer.open_file(gclog_filename, 'r') as gclog_file:
+                for line in gclog_file:
+                    output.write(line.encode('utf-8'))
+                    line_count += 1
+                    if rate:
+                        ahead_s = line_count / rate - (time.monotonic() - start)
+                        if ahead_s > 0:
+                            output.flush()
+                            time.sleep(ahead_s)
+        output.flush()
+    finally:
+        output.close()
+        if sock is not None:
+            sock.close()
+    return line_count
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='gc_live', description='Live ingestion of gc logs written to FIFOs or Unix domain sockets, publishing rolling GC stats & downsampled pause series as JSON lines')
+    sub_parsers = arg_parser.add_subparsers(dest='command')
+    ingest_parser = sub_parsers.add_parser('ingest', help='Reads gc logs concurrently and publishes a JSON line per changed stream on stdout')
+    ingest_parser.add_argument('--fifo', action='append', default=[], help='FIFO a JVM writes its gc log to (-Xloggc or -Xlog:gc*:file=), created if missing. Repeatable')
+    ingest_parser.add_argument('--socket', action='append', default=[], help='Unix domain socket path to listen on, each connection being a gc log stream. Repeatable')
+    ingest_parser.add_argument('-t', '--gc', help='Force to recognize gc logs as specific GC algorithm. Supported values: Parallel, CMS, G1, Shenandoah')
+    ingest_parser.add_argument('--publish-interval', type=float, default=PUBLISH_INTERVAL_S, help='Seconds between 2 publications (default: {})'.format(PUBLISH_INTERVAL_S))
+    ingest_parser.add_argument('--queue-lines', type=int, default=QUEUE_LINES, help='Lines buffered per stream before backpressure, then dropping (default: {})'.format(QUEUE_LINES))
+    ingest_parser.add_argument('--duration', type=float, help='Stops after this number of seconds')
+    replay_parser = sub_parsers.add_parser('replay', help='Fake JVM writer: replays a gc log file into a FIFO or Unix domain socket')
+    replay_parser.add_argument('gclog_file', help='gc log file to replay')
+    replay_parser.add_argument('path', help='FIFO or Unix domain socket to write to')
+    replay_parser.add_argument('--rate', type=float, help='Lines per second (default: as fast as possible)')
+    replay_parser.add_argument('--loops', type=int, default=1, help='Number of times the file is replayed (default: 1)')
+    args = arg_parser.parse_args(argv)
+
+    if args.command == 'replay':
+        replay(args.gclog_file, args.path, args.rate, args.loops)
+    elif args.command == 'ingest':
+        if not args.fifo and not args.socket:
+            print('Missing --fifo or --socket to ingest')
+            ingest_parser.print_usage()
+            sys.exit(1)
+        gc_analyzer.info_output = sys.stderr
+        ingestion = LiveIngestion(args.fifo, args.socket, args.gc, publish_interval=args.publish_interval,
+                                  queue_lines=args.queue_lines)
+        try:
+            asyncio.run(ingestion.run(args.duration))
+        except KeyboardInterrupt:
+            pass
+    else:
+        arg_parser.print_usage()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
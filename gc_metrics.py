@@ -0,0 +1,228 @@
+import argparse
+import bisect
+import os
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import gc_analyzer
+
+DEFAULT_PORT = 9400
+POLL_INTERVAL_S = 0.2  # wait at the end of the log before reading it again
+READ_SIZE = 64 * 1024
+# upper bounds of the pause histogram buckets, in seconds
+PAUSE_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+METRIC_PREFIX = 'gclog_'
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+def format_value(value):
+    return repr(float(value))
+
+
+class PauseHistogram(object):
+    """Pause counts per bucket, cumulated only when rendered"""
+    def __init__(self):
+        self.counts = [0] * (len(PAUSE_BUCKETS) + 1)
+        self.count = 0
+        self.sum_s = 0.0
+
+    def add(self, pause_s):
+        self.counts[bisect.bisect_left(PAUSE_BUCKETS, pause_s)] += 1
+        self.count += 1
+        self.sum_s += pause_s
+
+    def render(self, name, kind, lines):
+        cumulated = 0
+        for bound, count in zip(PAUSE_BUCKETS, self.counts):
+            cumulated += count
+            lines.append('{}_bucket{{kind="{}",le="{}"}} {}'.format(name, kind, bound, cumulated))
+        lines.append('{}_bucket{{kind="{}",le="+Inf"}} {}'.format(name, kind, self.count))
+        lines.append('{}_count{{kind="{}"}} {}'.format(name, kind, self.count))
+        lines.append('{}_sum{{kind="{}"}} {}'.format(name, kind, format_value(self.sum_s)))
+
+
+class GCMetrics(object):
+    """Counters updated by each GCEvent, rendered as OpenMetrics text
+
+    A scrape does not depend on the number of events: the text is rendered from the counters (a fixed number of
+    buckets per event kind), and cached until the next event.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.stopped_s = 0.0
+        self.allocated_mb = 0.0
+        # allocation of the logs followed before the current one (rotated or truncated)
+        self.allocated_base_mb = 0.0
+        self.heap_after_mb = None
+        self.gc_name = None
+        self.log_format = None
+        self.text = None
+
+    def add_event(self, event):
+        with self.lock:
+            histogram = self.histograms.get(event.kind)
+            if histogram is None:
+                histogram = PauseHistogram()
+                self.histograms[event.kind] = histogram
+            pause_s = event.pause_ms / 1000.0
+            histogram.add(pause_s)
+            self.stopped_s += pause_s
+            if event.heap_after_mb is not None:
+                self.heap_after_mb = event.heap_after_mb
+            self.text = None
+
+    def update_parser(self, parser):
+        # allocation is accumulated by the parser across records, not carried by the events
+        if parser is None:
+            return
+        with self.lock:
+            allocated_mb = self.allocated_base_mb + parser.total_allocated
+            if allocated_mb != self.allocated_mb or self.gc_name != parser.GC_NAME:
+                self.allocated_mb = allocated_mb
+                self.gc_name = parser.GC_NAME
+                self.log_format = gc_analyzer.LOG_FORMAT_NAMES.get(parser.log_format)
+                self.text = None
+
+    def end_parser(self, parser):
+        # the log is rotated or truncated: the next one gets its own parser, counters keep growing
+        if parser is None:
+            return
+        with self.lock:
+            self.allocated_base_mb += parser.total_allocated
+
+    def render(self):
+        with self.lock:
+            if self.text is None:
+                self.text = self.build_text()
+            return self.text
+
+    def build_text(self):
+        lines = []
+        if self.gc_name is not None:
+            name = METRIC_PREFIX + 'parser'
+            lines.append('# TYPE {} info'.format(name))
+            lines.append('# HELP {} GC algorithm and log format of the parsed log.'.format(name))
+            lines.append('{}_info{{gc="{}",format="{}"}} 1'.format(name, self.gc_name, self.log_format))
+        name = METRIC_PREFIX + 'pause_seconds'
+        lines.append('# TYPE {} histogram'.format(name))
+        lines.append('# UNIT {} seconds'.format(name))
+        lines.append('# HELP {} GC pause durations per event kind.'.format(name))
+        for kind in sorted(self.histograms):
+            self.histograms[kind].render(name, kind, lines)
+        name = METRIC_PREFIX + 'stopped_seconds'
+        lines.append('# TYPE {} counter'.format(name))
+        lines.append('# UNIT {} seconds'.format(name))
+        lines.append('# HELP {} Total time the application was stopped by GC pauses.'.format(name))
+        lines.append('{}_total {}'.format(name, format_value(self.stopped_s)))
+        name = METRIC_PREFIX + 'allocated_bytes'
+        lines.append('# TYPE {} counter'.format(name))
+        lines.append('# UNIT {} bytes'.format(name))
+        lines.append('# HELP {} Bytes allocated in the heap, measured between collections.'.format(name))
+        lines.append('{}_total {}'.format(name, format_value(self.allocated_mb * 1024 * 1024)))
+        if self.heap_after_mb is not None:
+            name = METRIC_PREFIX + 'heap_after_gc_bytes'
+            lines.append('# TYPE {} gauge'.format(name))
+            lines.append('# UNIT {} bytes'.format(name))
+            lines.append('# HELP {} Heap occupancy after the last GC.'.format(name))
+            lines.append('{} {}'.format(name, format_value(self.heap_after_mb * 1024 * 1024)))
+        lines.append('# EOF\n')
+        return '\n'.join(lines).encode('utf-8')
+
+
+def follow(gclog_filename, metrics, gc=None, stop=None):
+    """Tail parse of a gc log until stop (threading.Event) is set, reopening it when rotated or truncated
+
+    A reopened log may be written by another JVM (restarted, or with another GC): it is parsed by a new parser.
+    """
+    incremental = None
+    partial_line = ''
+    gclog_file = None
+    idle = False
+    while stop is None or not stop.is_set():
+        if gclog_file is None:
+            try:
+                gclog_file = open(gclog_filename, 'r', errors='replace')
+            except (IOError, OSError):
+                time.sleep(POLL_INTERVAL_S)
+                continue
+            incremental = gc_analyzer.IncrementalParser(gc, listener=metrics.add_event)
+        lines = gclog_file.readlines(READ_SIZE)
+        if lines:
+            # the last line may still be written
+            lines[0] = partial_line + lines[0]
+            partial_line = '' if lines[-1].endswith('\n') else lines.pop()
+            for line in lines:
+                incremental.feed(line)
+            metrics.update_parser(incremental.parser)
+            idle = False
+            continue
+        if idle:
+            # no line written since the previous poll: the pending JDK8 record is complete
+            metrics.update_parser(incremental.flush())
+        try:
+            rotated = os.stat(gclog_filename).st_ino != os.fstat(gclog_file.fileno()).st_ino or \
+                      os.path.getsize(gclog_filename) < gclog_file.tell()
+        except (IOError, OSError):
+            rotated = False  # being rotated, the new file is opened once it exists
+        if rotated:
+            metrics.end_parser(incremental.finish())
+            gclog_file.close()
+            gclog_file = None
+            partial_line = ''
+            continue
+        idle = True
+        time.sleep(POLL_INTERVAL_S)
+    if gclog_file is not None:
+        gclog_file.close()
+
+
+def create_server(metrics, host='127.0.0.1', port=DEFAULT_PORT):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render()
+            self.send_response(200)
+            self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            gc_analyzer.info(format % args)
+
+    return ThreadingHTTPServer((host, port), MetricsHandler)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='gc_metrics', description='Tails a gc log and serves GC pause histograms, stopped time, allocation & heap after GC as OpenMetrics on http://host:port/metrics')
+    arg_parser.add_argument('gclog_file', help='gc log file to follow, from its start')
+    arg_parser.add_argument('-t', '--gc', help='Force to recognize gc logs file as specific GC algorithm. Supported values: Parallel, CMS, G1, Shenandoah')
+    arg_parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    arg_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on (default: {})'.format(DEFAULT_PORT))
+    args = arg_parser.parse_args(argv)
+
+    gc_analyzer.info_output = sys.stderr
+    metrics = GCMetrics()
+    stop = threading.Event()
+    follower = threading.Thread(target=follow, args=(args.gclog_file, metrics, args.gc, stop), name='gclog-follower')
+    follower.daemon = True
+    follower.start()
+    server = create_server(metrics, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        follower.join()
+
+
+if __name__ == '__main__':
+    main()
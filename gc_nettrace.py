@@ -0,0 +1,362 @@
+import calendar
+import collections
+import os
+import struct
+
+import gc_analyzer
+
+# nettrace file: magic, then FastSerialization objects (Trace, then MetadataBlock, StackBlock, EventBlock & SPBlock)
+NETTRACE_MAGIC = b'Nettrace'
+SERIALIZATION_SIGNATURE = b'!FastSerialization.1'
+NULL_REFERENCE_TAG = 1
+BEGIN_PRIVATE_OBJECT_TAG = 5
+END_OBJECT_TAG = 6
+# versions of the Trace object read: 4 (.NET Core 3.0+), 5 (.NET 5+, only the metadata params differ)
+MIN_TRACE_VERSION = 4
+MAX_TRACE_VERSION = 5
+
+# event blocks header flags
+COMPRESSED_HEADERS_FLAG = 1
+# compressed event header flags
+METADATA_ID_FLAG = 1 << 0
+CAPTURE_THREAD_AND_SEQUENCE_FLAG = 1 << 1
+THREAD_ID_FLAG = 1 << 2
+STACK_ID_FLAG = 1 << 3
+ACTIVITY_ID_FLAG = 1 << 4
+RELATED_ACTIVITY_ID_FLAG = 1 << 5
+DATA_LENGTH_FLAG = 1 << 7
+TIMESTAMP_MASK = (1 << 64) - 1
+# uncompressed event header: size, metadata id, sequence, thread id, capture thread id, processor, stack id, timestamp,
+# activity id, related activity id, payload size
+UNCOMPRESSED_HEADER = struct.Struct('<iiiqqiiq16s16si')
+
+RUNTIME_PROVIDER = 'Microsoft-Windows-DotNETRuntime'
+# GC events of the runtime provider (GC keyword 0x1, informational level)
+GC_START_EVENT = 1
+GC_END_EVENT = 2
+GC_RESTART_EE_END_EVENT = 3
+GC_HEAP_STATS_EVENT = 4
+GC_SUSPEND_EE_BEGIN_EVENT = 9
+GC_EVENT_IDS = frozenset([GC_START_EVENT, GC_END_EVENT, GC_RESTART_EE_END_EVENT, GC_HEAP_STATS_EVENT,
+                          GC_SUSPEND_EE_BEGIN_EVENT])
+# GCStart type
+NON_CONCURRENT_GC = 0
+BACKGROUND_GC = 1
+FOREGROUND_GC = 2
+# GCHeapStats_V2 adds the pinned object heap size, after the 8 sizes of gen0-3, finalization, counts & clr instance
+HEAP_STATS_POH_OFFSET = 94
+
+# decoded event, time in seconds since epoch, payload as bytes
+TraceEvent = collections.namedtuple('TraceEvent', ['provider', 'event_id', 'version', 'time', 'thread_id', 'payload'])
+
+# a .NET GC, from a nettrace or a PerfView CSV export: start_time (seconds since epoch) is the start of its first pause,
+# pause2_ms the final mark pause of background GCs, heap sizes (in bytes) are measured at heap_time, after the GC
+DotnetGC = collections.namedtuple('DotnetGC', ['number', 'generation', 'gc_type', 'reason', 'start_time', 'pause_ms',
+                                               'pause2_ms', 'heap_time', 'gen0_before_bytes', 'gen0_after_bytes',
+                                               'gen0_bytes', 'gen1_bytes', 'gen2_bytes', 'loh_bytes', 'poh_bytes'])
+
+
+def is_nettrace(filename):
+    # trace.nettrace, trace.nettrace.gz, ...
+    return '.nettrace' in os.path.basename(filename)
+
+
+def read_varuint(data, pos):
+    # LEB128, returns the value and the position after it
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def read_utf16(data, pos):
+    # null terminated UTF-16 string, returns the string and the position after it
+    end = pos
+    while data[end:end + 2] != b'\x00\x00':
+        end += 2
+    return data[pos:end].decode('utf-16-le'), end + 2
+
+
+class NettraceReader(object):
+    """Streaming reader of the EventPipe nettrace format written by dotnet-trace
+
+    The trace is read block by block: only the events of the providers & ids asked are decoded and kept until the next
+    sequence point, where they are sorted by time (events of a block are only sorted per thread).
+    """
+    def __init__(self, stream, events=None):
+        # events: provider name => event ids to decode, all when None
+        self.stream = stream
+        self.events = events
+        self.offset = 0
+        self.metadata = {}
+        self.sync_time = None
+        self.sync_timestamp = None
+        self.timestamp_frequency = None
+        self.process_id = None
+        self.processor_count = None
+
+    def read(self, size):
+        data = self.stream.read(size)
+        if len(data) < size:
+            raise EOFError('Truncated nettrace at offset {}'.format(self.offset))
+        self.offset += size
+        return data
+
+    def read_tag(self, expected=None):
+        tag = self.read(1)[0]
+        if expected is not None and tag != expected:
+            raise ValueError('Invalid nettrace tag {} at offset {}, expected {}'.format(tag, self.offset - 1, expected))
+        return tag
+
+    def read_header(self):
+        if self.read(len(NETTRACE_MAGIC)) != NETTRACE_MAGIC:
+            raise ValueError('Not a nettrace file (EventPipe format 4+ written by dotnet-trace)')
+        length = struct.unpack('<i', self.read(4))[0]
+        if self.read(length) != SERIALIZATION_SIGNATURE:
+            raise ValueError('Unsupported nettrace serialization')
+
+    def read_object_type(self):
+        # type of an object: itself an object, with a null type
+        self.read_tag(BEGIN_PRIVATE_OBJECT_TAG)
+        self.read_tag(NULL_REFERENCE_TAG)
+        version, min_reader_version, name_length = struct.unpack('<iii', self.read(12))
+        name = self.read(name_length).decode('ascii')
+        self.read_tag(END_OBJECT_TAG)
+        return name, version, min_reader_version
+
+    def read_trace(self, version, min_reader_version):
+        if version < MIN_TRACE_VERSION or min_reader_version > MAX_TRACE_VERSION:
+            raise ValueError('Unsupported nettrace version {}'.format(version))
+        # SYSTEMTIME of the sync point (UTC) & its timestamp (QPC ticks)
+        year, month, day_of_week, day, hour, minute, second, millisecond = struct.unpack('<8H', self.read(16))
+        self.sync_time = calendar.timegm((year, month, day, hour, minute, second)) + millisecond / 1000.0
+        self.sync_timestamp, self.timestamp_frequency, pointer_size, self.process_id, self.processor_count, \
+            sampling_rate = struct.unpack('<qqiiii', self.read(32))
+
+    def read_block(self):
+        size = struct.unpack('<i', self.read(4))[0]
+        # block content is aligned on 4 bytes from the start of the file
+        padding = -self.offset % 4
+        if padding:
+            self.read(padding)
+        return self.read(size)
+
+    def time(self, timestamp):
+        return self.sync_time + float(timestamp - self.sync_timestamp) / self.timestamp_frequency
+
+    @staticmethod
+    def iter_block_events(block):
+        # (metadata id, thread id, timestamp, payload start, payload end) of each event of a metadata or event block
+        header_size, flags = struct.unpack_from('<hh', block)
+        compressed = flags & COMPRESSED_HEADERS_FLAG
+        pos = header_size
+        end = len(block)
+        # compressed headers only hold the fields changed since the previous event of the block
+        metadata_id = thread_id = timestamp = payload_size = 0
+        while pos < end:
+            if compressed:
+                flags = block[pos]
+                pos += 1
+                if flags & METADATA_ID_FLAG:
+                    metadata_id, pos = read_varuint(block, pos)
+                if flags & CAPTURE_THREAD_AND_SEQUENCE_FLAG:
+                    sequence_delta, pos = read_varuint(block, pos)
+                    capture_thread_id, pos = read_varuint(block, pos)
+                    processor, pos = read_varuint(block, pos)
+                if flags & THREAD_ID_FLAG:
+                    thread_id, pos = read_varuint(block, pos)
+                if flags & STACK_ID_FLAG:
+                    stack_id, pos = read_varuint(block, pos)
+                # threads are written one after the other: the delta wraps around when going back in time
+                timestamp_delta, pos = read_varuint(block, pos)
+                timestamp = (timestamp + timestamp_delta) & TIMESTAMP_MASK
+                if flags & ACTIVITY_ID_FLAG:
+                    pos += 16
+                if flags & RELATED_ACTIVITY_ID_FLAG:
+                    pos += 16
+                if flags & DATA_LENGTH_FLAG:
+                    payload_size, pos = read_varuint(block, pos)
+                yield metadata_id, thread_id, timestamp, pos, pos + payload_size
+                pos += payload_size
+            else:
+                fields = UNCOMPRESSED_HEADER.unpack_from(block, pos)
+                metadata_id = fields[1] & 0x7fffffff  # high bit: sorted flag
+                thread_id = fields[3]
+                timestamp = fields[7]
+                payload_size = fields[10]
+                pos += UNCOMPRESSED_HEADER.size
+                yield metadata_id, thread_id, timestamp, pos, pos + payload_size
+                pos += payload_size
+                pos += -pos % 4
+
+    def read_metadata(self, block):
+        for metadata_id, thread_id, timestamp, start, end in self.iter_block_events(block):
+            payload = block[start:end]
+            defined_id = struct.unpack_from('<i', payload)[0]
+            provider, pos = read_utf16(payload, 4)
+            event_id = struct.unpack_from('<i', payload, pos)[0]
+            event_name, pos = read_utf16(payload, pos + 4)
+            keywords, version, level = struct.unpack_from('<qii', payload, pos)
+            if self.events is None or event_id in self.events.get(provider, ()):
+                self.metadata[defined_id] = (provider, event_id, version)
+
+    def read_events(self, block, pending_events):
+        metadata = self.metadata
+        for metadata_id, thread_id, timestamp, start, end in self.iter_block_events(block):
+            event_type = metadata.get(metadata_id)
+            if event_type is not None:
+                pending_events.append((timestamp, event_type, thread_id, block[start:end]))
+
+    def sorted_events(self, pending_events):
+        pending_events.sort(key=lambda event: event[0])
+        for timestamp, (provider, event_id, version), thread_id, payload in pending_events:
+            yield TraceEvent(provider, event_id, version, self.time(timestamp), thread_id, payload)
+        del pending_events[:]
+
+    def __iter__(self):
+        self.read_header()
+        pending_events = []
+        try:
+            while self.read_tag() != NULL_REFERENCE_TAG:
+                name, version, min_reader_version = self.read_object_type()
+                if name == 'Trace':
+                    self.read_trace(version, min_reader_version)
+                elif name == 'EventBlock':
+                    self.read_events(self.read_block(), pending_events)
+                elif name == 'MetadataBlock':
+                    self.read_metadata(self.read_block())
+                elif name == 'SPBlock':
+                    # all the events before the sequence point have been written
+                    self.read_block()
+                    for event in self.sorted_events(pending_events):
+                        yield event
+                else:
+                    self.read_block()  # StackBlock
+                self.read_tag(END_OBJECT_TAG)
+        except EOFError as e:
+            # trace still written, or dotnet-trace stopped abruptly: the complete blocks are kept
+            gc_analyzer.info(str(e))
+        for event in self.sorted_events(pending_events):
+            yield event
+
+
+class PendingGC(object):
+    def __init__(self, number, generation, gc_type, reason, start_time):
+        self.number = number
+        self.generation = generation
+        self.gc_type = gc_type
+        self.reason = reason
+        self.start_time = start_time
+        self.pauses_ms = []
+        self.ended = False
+        self.heap_stats = None
+        self.heap_time = None
+
+    def to_dotnet_gc(self):
+        pause_ms = round(self.pauses_ms[0], 3) if self.pauses_ms else None
+        pause2_ms = round(sum(self.pauses_ms[1:]), 3) if len(self.pauses_ms) > 1 else None
+        gen0 = gen1 = gen2 = loh = poh = None
+        if self.heap_stats is not None:
+            gen0, gen1, gen2, loh, poh = self.heap_stats
+        # gen0 size before the GC is not traced
+        return DotnetGC(self.number, self.generation, self.gc_type, self.reason, self.start_time, pause_ms, pause2_ms,
+                        self.heap_time, None, gen0, gen0, gen1, gen2, loh, poh)
+
+
+def iter_gcs(events):
+    """Assembles the GCs from the runtime GC events (TraceEvent) sorted by time, yielded as DotnetGC once complete
+
+    A pause lasts from SuspendEEBegin to RestartEEEnd. It belongs to the GC started during the suspension, or else to
+    the background GC in progress (final mark). GCs are complete with their GCHeapStats and their last pause.
+    """
+    gcs = {}
+    suspend_time = None
+    suspended_gc = None
+    background_gc = None
+    last_ended_gc = None
+    for event in events:
+        event_id = event.event_id
+        if event_id == GC_SUSPEND_EE_BEGIN_EVENT:
+            suspend_time = event.time
+            suspended_gc = None
+        elif event_id == GC_START_EVENT:
+            number, generation, reason, gc_type = struct.unpack_from('<IIII', event.payload)
+            gc = PendingGC(number, generation, gc_type, reason,
+                           suspend_time if suspend_time is not None else event.time)
+            gcs[number] = gc
+            if gc_type == BACKGROUND_GC:
+                background_gc = gc
+            if suspend_time is not None:
+                suspended_gc = gc
+        elif event_id == GC_END_EVENT:
+            number = struct.unpack_from('<I', event.payload)[0]
+            gc = gcs.get(number)
+            if gc is not None:
+                gc.ended = True
+                last_ended_gc = gc
+                if gc is background_gc:
+                    background_gc = None
+        elif event_id == GC_HEAP_STATS_EVENT:
+            gc = last_ended_gc
+            if gc is None or gc.heap_stats is not None:
+                continue
+            # size & promoted size of each generation
+            gen0, gen1, gen2, loh = struct.unpack_from('<Q8xQ8xQ8xQ', event.payload)
+            poh = 0
+            if len(event.payload) >= HEAP_STATS_POH_OFFSET + 8:
+                poh = struct.unpack_from('<Q', event.payload, HEAP_STATS_POH_OFFSET)[0]
+            gc.heap_stats = (gen0, gen1, gen2, loh, poh)
+            gc.heap_time = event.time
+            if gc is not suspended_gc:
+                # background GC, ended while the application runs
+                del gcs[gc.number]
+                yield gc.to_dotnet_gc()
+        elif event_id == GC_RESTART_EE_END_EVENT:
+            if suspend_time is None:
+                continue  # suspended before the start of the trace
+            gc = suspended_gc if suspended_gc is not None else background_gc
+            if gc is not None:
+                gc.pauses_ms.append((event.time - suspend_time) * 1000)
+                if gc.ended and gc.heap_stats is not None:
+                    del gcs[gc.number]
+                    yield gc.to_dotnet_gc()
+            suspend_time = None
+            suspended_gc = None
+    # GCs without heap stats at the end of the trace
+    for number in sorted(gcs):
+        if gcs[number].ended:
+            yield gcs[number].to_dotnet_gc()
+
+
+def iter_nettrace_gcs(stream):
+    """Lazily yields the DotnetGC of a nettrace binary stream"""
+    return iter_gcs(NettraceReader(stream, {RUNTIME_PROVIDER: GC_EVENT_IDS}))
+
+
+def iter_events(path_or_stream):
+    """Lazily yields the GCEvent of a nettrace file (path or binary stream), kinds gen0, gen1 & gen2
+
+    The pause of a background GC is the sum of its initial & final mark pauses.
+    """
+    if isinstance(path_or_stream, str):
+        stream = gc_analyzer.open_file(path_or_stream, 'rb')
+    else:
+        stream = path_or_stream
+    try:
+        for gc in iter_nettrace_gcs(stream):
+            if gc.pause_ms is None:
+                continue
+            heap_after_mb = None
+            if gc.gen0_bytes is not None:
+                heap_after_mb = (gc.gen0_bytes + gc.gen1_bytes + gc.gen2_bytes + gc.loh_bytes + gc.poh_bytes) \
+                    / (1024.0 * 1024)
+            yield gc_analyzer.GCEvent('gen{}'.format(gc.generation), int(gc.start_time * 1000),
+                                      gc.pause_ms + (gc.pause2_ms or 0), heap_after_mb)
+    finally:
+        if stream is not path_or_stream:
+            stream.close()
@@ -0,0 +1,379 @@
+import array
+import bisect
+import math
+
+from gc_stats_engine import numpy
+
+# replay resolution, also the time a concurrent cycle is given to complete before the old gen fills up
+STEP_MS = 60000
+# eden share of the young gen (SurvivorRatio=8: 2 survivors of 1/10th)
+EDEN_FRACTION = 0.8
+# old gen occupancy starting a concurrent cycle: G1 InitiatingHeapOccupancyPercent (of the heap),
+# CMSInitiatingOccupancyFraction (of the old gen)
+G1_INITIATING_HEAP_OCCUPANCY = 0.45
+CMS_INITIATING_OCCUPANCY = 0.92
+CONCURRENT_GCS = ('CMS', 'G1')
+# GCs whose log has no heap before the collections: no allocation to replay
+NO_ALLOCATION_GCS = ('Shenandoah',)
+# full GC pause per GB of live set when the log has no full GC to measure it from
+FULL_GC_MS_PER_GB = 1000.0
+# default grid: heaps as multiples of the max live set x young gens as fractions of the heap
+HEAP_LIVE_FACTORS = [1.5, 2, 2.5, 3, 4, 5, 6, 8, 10, 12]
+YOUNG_FRACTIONS = [0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4, 0.45, 0.5, 0.55]
+HEAP_ROUND_MB = 64
+# events reclaiming the old gen: their heap after is the live set
+RECLAIM_KINDS = ('fullgc', 'mixed')
+# concurrent cycles: remark ends the marking, sweeping/cleanup frees the old gen until the next cycle starts
+CYCLE_START_KINDS = ('initialmark',)
+CYCLE_REMARK_KINDS = ('finalremark',)
+# pauses estimating a young GC of the replay, and the pauses of a concurrent cycle: its start (a young GC of G1 too),
+# remark, cleanup and the mixed GCs reclaiming the old gen after it
+YOUNG_KINDS = ('minorgc',)
+CYCLE_PAUSE_KINDS = CYCLE_START_KINDS + CYCLE_REMARK_KINDS + ('cleanup', 'mixed')
+# old gen free space below which collections are counted as back to back
+MIN_HEADROOM_MB = 1.0
+RISK_LEVELS = ['none', 'low', 'high', 'certain']
+# recommended: smallest heap losing at most that many throughput points to the best candidate
+RECOMMENDED_THROUGHPUT_LOSS = 1.0
+
+
+class SizingAnalyzer(object):
+    """Allocation, promotion & live set of the GCs replayed against candidate heap and young gen sizes
+
+    Per step of the log: allocated MB (heap before a GC minus heap after the previous one), promoted MB (growth of
+    the heap after between young GCs), live set (heap after the old gen reclaims: full GCs, mixed GCs, lowest heap
+    after the young GCs sweeping a concurrent cycle, interpolated between them; the heap after the young GCs, an upper
+    bound, when the log has none). The replay fills eden with the allocation to count young GCs and the old gen with
+    the promotion, collected down to the live set when reaching its threshold: full GCs for Parallel, concurrent cycles
+    for CMS & G1, failing to full GCs when a step promotes more than the old gen free space. Promotion does not depend
+    on the young gen size: pessimistic for the larger ones.
+    """
+    def __init__(self):
+        self.times_ms = array.array('d')
+        self.kind_indexes = array.array('b')
+        self.kinds = []
+        self.pause_ms = array.array('d')
+        self.heap_after_mb = array.array('d')
+        self.allocated_mb = array.array('d')
+
+    def add_event(self, kind, time_ms, pause_ms, heap_after_mb):
+        if kind not in self.kinds:
+            self.kinds.append(kind)
+        self.times_ms.append(time_ms)
+        self.kind_indexes.append(self.kinds.index(kind))
+        self.pause_ms.append(pause_ms)
+        self.heap_after_mb.append(heap_after_mb if heap_after_mb is not None else float('nan'))
+        self.allocated_mb.append(0.0)
+
+    def add_allocation(self, allocated_mb):
+        # allocated since the previous GC, computed after the event it belongs to
+        if self.allocated_mb:
+            self.allocated_mb[-1] += allocated_mb
+
+    def observed_pauses(self):
+        # mean pause of young GCs, of the pauses of a concurrent cycle, and full GC ms per MB of live set
+        young = [0, 0.0]
+        cycle = [0, 0.0]
+        full_ms = 0.0
+        full_mb = 0.0
+        full_count = 0
+        for kind_index, pause_ms, heap_after_mb in zip(self.kind_indexes, self.pause_ms, self.heap_after_mb):
+            kind = self.kinds[kind_index]
+            if kind == 'fullgc':
+                full_count += 1
+                if heap_after_mb == heap_after_mb and heap_after_mb > 0:
+                    full_ms += pause_ms
+                    full_mb += heap_after_mb
+            elif kind in YOUNG_KINDS:
+                young[0] += 1
+                young[1] += pause_ms
+            elif kind in CYCLE_PAUSE_KINDS:
+                if kind in CYCLE_REMARK_KINDS:
+                    cycle[0] += 1
+                cycle[1] += pause_ms
+        young_pause_ms = young[1] / young[0] if young[0] else 0.0
+        cycle_pause_ms = cycle[1] / cycle[0] if cycle[0] else young_pause_ms
+        full_ms_per_mb = full_ms / full_mb if full_mb > 0 else FULL_GC_MS_PER_GB / 1024
+        return {
+            'young_gcs': young[0],
+            'young_pause_ms': young_pause_ms,
+            'cycles': cycle[0],
+            'cycle_pause_ms': cycle_pause_ms,
+            'full_gcs': full_count,
+            'full_gc_ms_per_gb': full_ms_per_mb * 1024,
+            'full_gc_measured': full_mb > 0,
+            'pause_ms': sum(self.pause_ms)
+        }
+
+    def build_series(self, step_ms=STEP_MS):
+        # (allocated, promoted, live) MB per step
+        times_ms = self.times_ms
+        start_ms = times_ms[0]
+        steps = int((times_ms[-1] - start_ms) // step_ms) + 1
+        allocated = [0.0] * steps
+        promoted = [0.0] * steps
+        last_heap = [None] * steps
+        anchors_ms = []
+        anchors_mb = []
+        sweep = [None, None]  # (time_ms, heap after) of the lowest young GC since the last remark
+        sweeping = False
+        previous = None
+
+        def close_sweep():
+            if sweep[0] is not None:
+                anchors_ms.append(sweep[0])
+                anchors_mb.append(sweep[1])
+            sweep[0] = sweep[1] = None
+
+        for idx in range(len(times_ms)):
+            time_ms = times_ms[idx]
+            step = int((time_ms - start_ms) // step_ms)
+            allocated[step] += self.allocated_mb[idx]
+            kind = self.kinds[self.kind_indexes[idx]]
+            if kind in CYCLE_START_KINDS or kind in RECLAIM_KINDS:
+                close_sweep()
+                sweeping = False
+            elif kind in CYCLE_REMARK_KINDS:
+                close_sweep()
+                sweeping = True
+            heap_after_mb = self.heap_after_mb[idx]
+            if heap_after_mb != heap_after_mb:
+                continue
+            if kind in RECLAIM_KINDS:
+                anchors_ms.append(time_ms)
+                anchors_mb.append(heap_after_mb)
+            else:
+                if previous is not None and heap_after_mb > previous:
+                    promoted[step] += heap_after_mb - previous
+                if sweeping and (sweep[1] is None or heap_after_mb < sweep[1]):
+                    sweep[0] = time_ms
+                    sweep[1] = heap_after_mb
+            previous = heap_after_mb
+            last_heap[step] = heap_after_mb
+        close_sweep()
+        live = [0.0] * steps
+        if anchors_ms:
+            for step in range(steps):
+                time_ms = start_ms + (step + 0.5) * step_ms
+                idx = bisect.bisect_right(anchors_ms, time_ms)
+                if idx == 0:
+                    live[step] = anchors_mb[0]
+                elif idx == len(anchors_ms):
+                    live[step] = anchors_mb[-1]
+                else:
+                    span_ms = anchors_ms[idx] - anchors_ms[idx - 1]
+                    ratio = (time_ms - anchors_ms[idx - 1]) / span_ms if span_ms > 0 else 1.0
+                    live[step] = anchors_mb[idx - 1] + (anchors_mb[idx] - anchors_mb[idx - 1]) * ratio
+        else:
+            value = next((heap for heap in last_heap if heap is not None), 0.0)
+            for step in range(steps):
+                if last_heap[step] is not None:
+                    value = last_heap[step]
+                live[step] = value
+        return allocated, promoted, live
+
+    def simulate(self, gc_name, heap_sizes_mb=None, young_sizes_mb=None, young_fractions=None, step_ms=STEP_MS):
+        """Replays the log against each (heap, young gen) candidate, returns the report dict (None without allocation)
+
+        Heaps default to multiples of the max live set, young gens to fractions of the heap (HEAP_LIVE_FACTORS x
+        YOUNG_FRACTIONS). Young GC pauses are estimated with the mean young pause of the log, concurrent cycles with
+        the mean pauses of a cycle, full GCs with the pause per GB of live set of the log (else FULL_GC_MS_PER_GB).
+        """
+        if not self.times_ms or sum(self.allocated_mb) <= 0:
+            return None
+        allocated, promoted, live = self.build_series(step_ms)
+        live_max_mb = max(live)
+        if not heap_sizes_mb:
+            heap_sizes_mb = sorted(set(math.ceil(live_max_mb * factor / HEAP_ROUND_MB) * HEAP_ROUND_MB
+                                       for factor in HEAP_LIVE_FACTORS))
+        if not young_sizes_mb and not young_fractions:
+            young_fractions = YOUNG_FRACTIONS
+        heaps_mb = []
+        youngs_mb = []
+        for heap_mb in heap_sizes_mb:
+            candidates = [round(heap_mb * fraction) for fraction in young_fractions or []] + list(young_sizes_mb or [])
+            for young_mb in sorted(set(candidates)):
+                if 0 < young_mb < heap_mb:
+                    heaps_mb.append(float(heap_mb))
+                    youngs_mb.append(float(young_mb))
+        if not heaps_mb:
+            return None
+        concurrent = gc_name in CONCURRENT_GCS
+        replay = numpy_replay if numpy is not None else python_replay
+        young_gcs, cycles, full_gcs, full_live_mb = replay(allocated, promoted, live, heaps_mb, youngs_mb, gc_name)
+        observed = self.observed_pauses()
+        duration_ms = self.times_ms[-1] - self.times_ms[0] + step_ms
+        peak_promoted_mb = max(promoted)
+        result = []
+        for idx in range(len(heaps_mb)):
+            old_mb = heaps_mb[idx] - youngs_mb[idx]
+            young_pause_ms = young_gcs[idx] * observed['young_pause_ms']
+            cycle_pause_ms = cycles[idx] * observed['cycle_pause_ms'] if concurrent else 0.0
+            full_pause_ms = full_live_mb[idx] * observed['full_gc_ms_per_gb'] / 1024
+            pause_ms = young_pause_ms + cycle_pause_ms + full_pause_ms
+            if live_max_mb >= old_mb:
+                risk = 'certain'
+            elif full_gcs[idx] > 0 and (concurrent or old_mb - live_max_mb < peak_promoted_mb):
+                risk = 'high'
+            elif full_gcs[idx] > 0:
+                risk = 'low'
+            else:
+                risk = 'none'
+            result.append({
+                'heap_mb': heaps_mb[idx],
+                'young_mb': youngs_mb[idx],
+                'young_gcs': int(young_gcs[idx]),
+                'young_gc_interval_ms': duration_ms / young_gcs[idx] if young_gcs[idx] else None,
+                'young_pause_ms': young_pause_ms,
+                'cycles': int(cycles[idx]) if concurrent else 0,
+                'cycle_pause_ms': cycle_pause_ms,
+                'full_gcs': int(full_gcs[idx]),
+                'full_pause_ms': full_pause_ms,
+                'pause_ms': pause_ms,
+                'throughput': 100.0 * (1 - pause_ms / duration_ms),
+                'full_gc_risk': risk
+            })
+        return {
+            'gc': gc_name,
+            'step_ms': step_ms,
+            'steps': len(allocated),
+            'duration_ms': duration_ms,
+            'allocation_rate': sum(allocated) * 1000 / duration_ms,
+            'promotion_rate': sum(promoted) * 1000 / duration_ms,
+            'live_avg_mb': sum(live) / len(live),
+            'live_max_mb': live_max_mb,
+            'observed': observed,
+            'candidates': result,
+            'recommended': recommend(result)
+        }
+
+
+def initiating_occupancy(gc_name, heap_mb, old_mb):
+    # old gen occupancy collecting it: concurrent cycle start, or full GC when the old gen is full
+    if gc_name == 'G1':
+        return heap_mb * G1_INITIATING_HEAP_OCCUPANCY
+    if gc_name == 'CMS':
+        return old_mb * CMS_INITIATING_OCCUPANCY
+    return old_mb
+
+
+def numpy_replay(allocated, promoted, live, heaps_mb, youngs_mb, gc_name):
+    # all candidates stepped together: (young GCs, concurrent cycles, full GCs, live MB collected by full GCs)
+    heap = numpy.array(heaps_mb)
+    young = numpy.array(youngs_mb)
+    eden = young * EDEN_FRACTION
+    old_capacity = heap - young
+    threshold = numpy.minimum(initiating_occupancy(gc_name, heap, old_capacity), old_capacity)
+    concurrent = gc_name in CONCURRENT_GCS
+    count = len(heap)
+    eden_used = numpy.zeros(count)
+    old = numpy.full(count, live[0])
+    young_gcs = numpy.zeros(count)
+    cycles = numpy.zeros(count)
+    full_gcs = numpy.zeros(count)
+    full_live_mb = numpy.zeros(count)
+    for step in range(len(allocated)):
+        live_mb = live[step]
+        eden_used += allocated[step]
+        young_count = numpy.floor(eden_used / eden)
+        eden_used -= young_count * eden
+        young_gcs += young_count
+        # the old gen holds at least the live set: growth missed by the heap after deltas is promoted too
+        old = numpy.maximum(old + promoted[step], live_mb)
+        # old gen collections in the step, at most one per young GC (promotions fill it)
+        limit = numpy.maximum(young_count, 1)
+        full_headroom = numpy.maximum(old_capacity - live_mb, MIN_HEADROOM_MB)
+        full_over = old - old_capacity
+        full = numpy.where(full_over >= 0, numpy.minimum(1 + numpy.floor(full_over / full_headroom), limit), 0)
+        full_gcs += full
+        full_live_mb += full * live_mb
+        if concurrent:
+            headroom = numpy.maximum(threshold - live_mb, MIN_HEADROOM_MB)
+            over = old - threshold
+            cycles += numpy.where(over >= 0, numpy.minimum(1 + numpy.floor(over / headroom), limit), 0)
+        else:
+            headroom = full_headroom
+            over = full_over
+        old = numpy.where(over >= 0, live_mb + numpy.mod(numpy.maximum(over, 0), headroom), old)
+    return young_gcs.tolist(), cycles.tolist(), full_gcs.tolist(), full_live_mb.tolist()
+
+
+def python_replay(allocated, promoted, live, heaps_mb, youngs_mb, gc_name):
+    # numpy_replay, one candidate after the other
+    concurrent = gc_name in CONCURRENT_GCS
+    result = ([], [], [], [])
+    steps = range(len(allocated))
+    for heap_mb, young_mb in zip(heaps_mb, youngs_mb):
+        eden = young_mb * EDEN_FRACTION
+        old_capacity = heap_mb - young_mb
+        threshold = min(initiating_occupancy(gc_name, heap_mb, old_capacity), old_capacity)
+        eden_used = 0.0
+        old = live[0]
+        young_gcs = 0.0
+        cycles = 0.0
+        full_gcs = 0.0
+        full_live_mb = 0.0
+        for step in steps:
+            live_mb = live[step]
+            eden_used += allocated[step]
+            young_count = math.floor(eden_used / eden)
+            eden_used -= young_count * eden
+            young_gcs += young_count
+            old = max(old + promoted[step], live_mb)
+            limit = max(young_count, 1)
+            full_headroom = max(old_capacity - live_mb, MIN_HEADROOM_MB)
+            full_over = old - old_capacity
+            if full_over >= 0:
+                full = min(1 + math.floor(full_over / full_headroom), limit)
+                full_gcs += full
+                full_live_mb += full * live_mb
+            if concurrent:
+                headroom = max(threshold - live_mb, MIN_HEADROOM_MB)
+                over = old - threshold
+                if over >= 0:
+                    cycles += min(1 + math.floor(over / headroom), limit)
+            else:
+                headroom = full_headroom
+                over = full_over
+            if over >= 0:
+                old = live_mb + math.fmod(over, headroom)
+        for values, value in zip(result, (young_gcs, cycles, full_gcs, full_live_mb)):
+            values.append(value)
+    return result
+
+
+def recommend(candidates, throughput_loss=RECOMMENDED_THROUGHPUT_LOSS):
+    # among the candidates without full GC predicted (else of low risk): the smallest heap within throughput_loss of
+    # the best throughput, then the lowest pause total
+    for risk in RISK_LEVELS[:2]:
+        eligible = [candidate for candidate in candidates if candidate['full_gc_risk'] == risk]
+        if eligible:
+            min_throughput = max(candidate['throughput'] for candidate in eligible) - throughput_loss
+            return min((candidate for candidate in eligible if candidate['throughput'] >= min_throughput),
+                       key=lambda candidate: (candidate['heap_mb'], candidate['pause_ms']))
+    return None
+
+
+def format_simulation(report):
+    observed = report['observed']
+    lines = ['{} replay: {} steps of {} s, allocation rate: {} MB/s promotion rate: {} MB/s live set: avg={} MB max={} MB'.format(
+                 report['gc'], report['steps'], report['step_ms'] / 1000.0, round(report['allocation_rate'], 3),
+                 round(report['promotion_rate'], 3), round(report['live_avg_mb'], 1), round(report['live_max_mb'], 1)),
+             'observed: young GCs={} (avg pause {} ms) concurrent cycles={} full GCs={} pauses total={} ms, full GC pause per GB of live set: {} ms{}'.format(
+                 observed['young_gcs'], round(observed['young_pause_ms'], 3), observed['cycles'], observed['full_gcs'],
+                 round(observed['pause_ms'], 3), round(observed['full_gc_ms_per_gb'], 1),
+                 '' if observed['full_gc_measured'] else ' (default)'),
+             '{:>9} {:>9} {:>10} {:>12} {:>8} {:>8} {:>14} {:>11} {:>8}'.format(
+                 'heap MB', 'young MB', 'young GCs', 'interval s', 'cycles', 'full GCs', 'pauses ms', 'throughput', 'risk')]
+    for candidate in report['candidates']:
+        interval_ms = candidate['young_gc_interval_ms']
+        lines.append('{:>9} {:>9} {:>10} {:>12} {:>8} {:>8} {:>14} {:>11} {:>8}'.format(
+            int(candidate['heap_mb']), int(candidate['young_mb']), candidate['young_gcs'],
+            round(interval_ms / 1000.0, 1) if interval_ms is not None else '-', candidate['cycles'],
+            candidate['full_gcs'], round(candidate['pause_ms'], 1), round(candidate['throughput'], 3),
+            candidate['full_gc_risk']))
+    recommended = report['recommended']
+    if recommended is not None:
+        lines.append('recommended: heap={} MB young={} MB (full GC risk {}, smallest heap within {} throughput points of the best)'.format(
+            int(recommended['heap_mb']), int(recommended['young_mb']), recommended['full_gc_risk'], RECOMMENDED_THROUGHPUT_LOSS))
+    return '\n'.join(lines)
@@ -0,0 +1,103 @@
+import array
+import math
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DEFAULT_PERCENTILES = [10, 20, 30, 40, 50, 60, 70, 80, 90, 95, 99]
+
+# aggregate of all pause kinds
+ALL_PAUSES = 'all'
+
+
+def percentile_indexes(count, percentiles):
+    # nearest rank (lower) index of each percentile in the sorted values
+    return [min(int(count * percentile / 100.0), count - 1) for percentile in percentiles]
+
+
+def numpy_stats(values, percentiles):
+    values = numpy.frombuffer(values, dtype=numpy.float64) if not isinstance(values, numpy.ndarray) else values
+    count = len(values)
+    indexes = percentile_indexes(count, percentiles)
+    partitioned = numpy.partition(values, sorted(set(indexes)))
+    return {
+        'count': count,
+        'total': float(values.sum()),
+        'mean': float(values.mean()),
+        'stddev': float(values.std()),
+        'min': float(values.min()),
+        'max': float(values.max()),
+        'percentiles': [(percentile, float(partitioned[idx])) for percentile, idx in zip(percentiles, indexes)]
+    }
+
+
+def python_stats(values, percentiles):
+    count = len(values)
+    total = math.fsum(values)
+    mean = total / count
+    sorted_values = sorted(values)
+    return {
+        'count': count,
+        'total': total,
+        'mean': mean,
+        'stddev': math.sqrt(math.fsum((value - mean) ** 2 for value in values) / count),
+        'min': sorted_values[0],
+        'max': sorted_values[-1],
+        'percentiles': [(percentile, sorted_values[idx])
+                        for percentile, idx in zip(percentiles, percentile_indexes(count, percentiles))]
+    }
+
+
+class StatsEngine(object):
+    """Pause durations (ms) per event kind stored in typed arrays, stats computed vectorized when numpy is present"""
+    def __init__(self):
+        self.pauses = {}
+        self.first_ms = None
+        self.last_ms = None
+        self.last_pause_ms = 0
+
+    def add_event(self, kind, time_ms, pause_ms):
+        values = self.pauses.get(kind)
+        if values is None:
+            values = array.array('d')
+            self.pauses[kind] = values
+        values.append(pause_ms)
+        if self.first_ms is None:
+            self.first_ms = time_ms
+        self.last_ms = time_ms
+        self.last_pause_ms = pause_ms
+
+    def span_ms(self):
+        # wall clock time covered by the events
+        if self.first_ms is None:
+            return 0
+        return self.last_ms + self.last_pause_ms - self.first_ms
+
+    def kind_stats(self, values, percentiles):
+        if numpy is not None:
+            return numpy_stats(values, percentiles)
+        return python_stats(values, percentiles)
+
+    def compute(self, percentiles=None, total_allocated_mb=None, total_promoted_mb=None):
+        if percentiles is None:
+            percentiles = DEFAULT_PERCENTILES
+        stats = {'span_ms': self.span_ms(), 'kinds': {}}
+        for kind, values in self.pauses.items():
+            stats['kinds'][kind] = self.kind_stats(values, percentiles)
+        if self.pauses:
+            if numpy is not None:
+                all_values = numpy.concatenate([numpy.frombuffer(values, dtype=numpy.float64) for values in self.pauses.values()])
+            else:
+                all_values = array.array('d')
+                for values in self.pauses.values():
+                    all_values.extend(values)
+            stats[ALL_PAUSES] = self.kind_stats(all_values, percentiles)
+        else:
+            stats[ALL_PAUSES] = None
+        span_s = stats['span_ms'] / 1000.0
+        total_pause_ms = stats[ALL_PAUSES]['total'] if stats[ALL_PAUSES] else 0
+        stats['throughput'] = 100.0 * (1 - total_pause_ms / stats['span_ms']) if stats['span_ms'] > 0 else None
+        stats['allocation_rate'] = total_allocated_mb / span_s if span_s > 0 and total_allocated_mb is not None else None
+        stats['promotion_rate'] = total_promoted_mb / span_s if span_s > 0 and total_promoted_mb is not None else None
+        return stats
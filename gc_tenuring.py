@@ -0,0 +1,85 @@
+import array
+
+# object ages are stored on 4 bits in the object header
+MAX_AGE = 15
+
+# survival rate from one age to the next above which objects are considered long lived
+LONG_LIVED_SURVIVAL = 0.8
+
+
+class TenuringAnalyzer(object):
+    """Age tables of young collections aggregated incrementally: memory does not grow with the number of GCs
+
+    Bytes of age a+1 at a GC survived from bytes of age a at the previous GC, when a was below its tenuring threshold.
+    """
+    def __init__(self):
+        self.previous = array.array('q', [0] * (MAX_AGE + 1))
+        self.current = array.array('q', [0] * (MAX_AGE + 1))
+        self.previous_threshold = None
+        # per age: bytes of age a at a GC, and those of them found at age a+1 at the next GC
+        self.entered = array.array('q', [0] * (MAX_AGE + 1))
+        self.survived = array.array('q', [0] * (MAX_AGE + 1))
+        self.table_count = 0
+        self.threshold_sum = 0
+        self.threshold_min = None
+        self.max_threshold = None
+        self.overflow_count = 0
+
+    def add_table(self, ages, threshold, max_threshold, desired_survivor_bytes):
+        # ages: (age, bytes) of a GC, returns the survival rate of each age since the previous GC as (age, rate)
+        current = self.current
+        for age in range(MAX_AGE + 1):
+            current[age] = 0
+        total = 0
+        for age, age_bytes in ages:
+            if 0 < age <= MAX_AGE:
+                current[age] = age_bytes
+                total += age_bytes
+        rates = []
+        if self.previous_threshold is not None:
+            previous = self.previous
+            for age in range(1, min(self.previous_threshold, MAX_AGE)):
+                if previous[age] > 0:
+                    survived = min(current[age + 1], previous[age])
+                    self.entered[age] += previous[age]
+                    self.survived[age] += survived
+                    rates.append((age, survived / previous[age]))
+        self.table_count += 1
+        self.threshold_sum += threshold
+        self.threshold_min = threshold if self.threshold_min is None else min(self.threshold_min, threshold)
+        self.max_threshold = max_threshold
+        if desired_survivor_bytes is not None and total > desired_survivor_bytes:
+            self.overflow_count += 1
+        self.previous, self.current = self.current, self.previous
+        self.previous_threshold = threshold
+        return rates
+
+    def reset(self):
+        # survivors are emptied (Full GC) or a young GC was missed: next table has no previous one
+        self.previous_threshold = None
+
+    def survival_rates(self):
+        return [(age, self.survived[age] / self.entered[age]) for age in range(1, MAX_AGE + 1) if self.entered[age] > 0]
+
+    def recommended_threshold(self):
+        # first age from which objects mostly keep surviving: copying them again in survivors is wasted
+        rates = self.survival_rates()
+        if not rates:
+            return None
+        for age, rate in rates:
+            if rate >= LONG_LIVED_SURVIVAL:
+                return age
+        return self.max_threshold
+
+    def summary(self):
+        if self.table_count == 0:
+            return None
+        return {
+            'tables': self.table_count,
+            'threshold_avg': self.threshold_sum / self.table_count,
+            'threshold_min': self.threshold_min,
+            'max_threshold': self.max_threshold,
+            'survivor_overflows': self.overflow_count,
+            'survival_rates': self.survival_rates(),
+            'recommended_threshold': self.recommended_threshold()
+        }
@@ -0,0 +1,122 @@
+import array
+import calendar
+import json
+import os
+import re
+
+TILE_POINTS = 4096  # max points of a tile file
+TILE_FACTOR = 8  # tiles of a level covered by one tile of the next (coarser) level
+
+POINT_TIME_RE = re.compile(r'\[(?:Date\.UTC\((\d+),(\d+),(\d+),(\d+),(\d+),(\d+),(\d+)\)\+)?(\d+),')
+
+
+def point_time_ms(point):
+    # x of a '[x,y],\n' chart point, x being either ms or a javascript Date.UTC(...)+offset
+    match = POINT_TIME_RE.match(point)
+    if match.group(1) is None:
+        return int(match.group(8))
+    year = int(match.group(1))
+    month = int(match.group(2))  # 0 based as in javascript, overflowing to the next year
+    year += month // 12
+    month %= 12
+    return calendar.timegm((year, month + 1, int(match.group(3)), int(match.group(4)), int(match.group(5)),
+                            int(match.group(6)))) * 1000 + int(match.group(7)) + int(match.group(8))
+
+
+def point_value(point):
+    # y of a '[x,y],\n' chart point
+    return float(point[point.rindex(',', 0, -3) + 1:-3])
+
+
+def tiles_dir_name(data_filename):
+    # data.js or data.js.gz => data_tiles, next to the data file
+    name = os.path.basename(data_filename)
+    return name.split('.', 1)[0] + '_tiles'
+
+
+class TileWriter(object):
+    """Writes the series with more than TILE_POINTS points as tile files per zoom level, loaded on demand by charts
+
+    Level 0 tiles hold the points as is, TILE_POINTS per tile. A tile of level n covers TILE_FACTOR tiles of level
+    n-1 keeping only the min & max points of each bucket of 2 * TILE_FACTOR ** n points: peaks & pauses outliers
+    stay visible at every level. The top level is a single tile covering the whole serie.
+    """
+    def __init__(self, data_filename):
+        self.dir_name = tiles_dir_name(data_filename)
+        self.tiles_dir = os.path.join(os.path.dirname(data_filename), self.dir_name)
+        self.series = {}
+        # var name => (lows, highs) of each level, shared by the series stacked on a chart
+        self.stacked_levels = {}
+
+    def stack_series(self, var_names, series):
+        # series stacked on a chart keep the points of the same indexes, the min & max of their sum: decimated one
+        # by one, a level would stack points of different times. Series of different lengths are decimated one by one
+        count = len(series[0]) if series else 0
+        if count <= TILE_POINTS or any(len(points) != count for points in series):
+            return
+        values = array.array('d', [0.0]) * count
+        for points in series:
+            for idx, point in enumerate(points):
+                values[idx] += point_value(point)
+        levels = self.levels(values)
+        for var_name in var_names:
+            self.stacked_levels[var_name] = levels
+
+    def write_serie(self, var_name, points):
+        # returns whether the serie has been written as tiles
+        count = len(points)
+        if count <= TILE_POINTS:
+            return False
+        if not os.path.isdir(self.tiles_dir):
+            os.makedirs(self.tiles_dir)
+        for tile, idx in enumerate(range(0, count, TILE_POINTS)):
+            self.write_tile(var_name, 0, tile, points[idx:idx + TILE_POINTS])
+        levels = self.stacked_levels.pop(var_name, None)
+        if levels is None:
+            levels = self.levels(array.array('d', (point_value(point) for point in points)))
+        bucket_count = TILE_POINTS // 2
+        for level, (lows, highs) in enumerate(levels, 1):
+            for tile, idx in enumerate(range(0, len(lows), bucket_count)):
+                tile_points = []
+                for low, high in zip(lows[idx:idx + bucket_count], highs[idx:idx + bucket_count]):
+                    tile_points.append(points[min(low, high)])
+                    if low != high:
+                        tile_points.append(points[max(low, high)])
+                self.write_tile(var_name, level, tile, tile_points)
+        self.series[var_name] = {
+            'count': count,
+            'levels': len(levels),
+            'starts': [point_time_ms(points[idx]) for idx in range(0, count, TILE_POINTS)]
+        }
+        return True
+
+    @staticmethod
+    def levels(values):
+        # (lows, highs) indexes of the min & max points of the buckets of each level from 1, up to a single tile
+        lows, highs = TileWriter.buckets(values, range(len(values)), range(len(values)), 2 * TILE_FACTOR)
+        levels = [(lows, highs)]
+        while len(lows) > TILE_POINTS // 2:
+            lows, highs = TileWriter.buckets(values, lows, highs, TILE_FACTOR)
+            levels.append((lows, highs))
+        return levels
+
+    @staticmethod
+    def buckets(values, lows, highs, group):
+        # indexes of the min & max points of each group of buckets
+        value = values.__getitem__
+        new_lows = []
+        new_highs = []
+        for idx in range(0, len(lows), group):
+            new_lows.append(min(lows[idx:idx + group], key=value))
+            new_highs.append(max(highs[idx:idx + group], key=value))
+        return new_lows, new_highs
+
+    def write_tile(self, var_name, level, tile, points):
+        with open(os.path.join(self.tiles_dir, '{}_{}_{}.js'.format(var_name, level, tile)), 'w') as tile_file:
+            tile_file.write("gcTile('{}', {}, {}, [".format(var_name, level, tile))
+            tile_file.write(''.join(points))
+            tile_file.write('])\n')
+
+    def write_index(self, data_file):
+        data_file.write('var tiles = {}\n'.format(json.dumps(
+            {'dir': self.dir_name, 'factor': TILE_FACTOR, 'series': self.series}, sort_keys=True)))
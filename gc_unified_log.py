@@ -0,0 +1,85 @@
+import collections
+import time
+
+# JDK9+ unified logging (-Xlog:gc*:file=...:<decorators>) line: [decorator]...[decorator] message
+# decorators are printed in a fixed order: time, utctime, uptime, timemillis, uptimemillis, timenanos, uptimenanos,
+# hostname, pid, tid, level, tags. A line is recognized by its first decorator, one of the time ones.
+DECORATED_LINE_START_PATTERN = r'\[(?:\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}|\d+[.,]\d+s\]|\d+[mn]s\])'
+
+LOG_LEVELS = frozenset(['trace', 'debug', 'info', 'warning', 'error'])
+
+# timemillis (ms since epoch) and uptimemillis both end with ms: epochs have at least that many digits
+EPOCH_MS_MIN_DIGITS = 12
+
+# timestamp (YYYY-MM-DDTHH:MM:SS.mmm) of a line, from its time/utctime decorator, else timemillis, else its uptime
+# counted from the epoch (1970-01-01T00:00:00.000 is the JVM start). zone is the +hhmm suffix of the time/utctime
+# decorator, None for the UTC ones. gc_id is the n of a GC(n) prefix, removed from the message as the trailing newline.
+UnifiedLogLine = collections.namedtuple('UnifiedLogLine', ['timestamp', 'zone', 'uptime_ms', 'level', 'tags', 'gc_id',
+                                                           'message'])
+
+
+def format_epoch_ms(epoch_ms):
+    epoch_ms = int(epoch_ms)
+    return '{}.{:03d}'.format(time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(epoch_ms // 1000)), epoch_ms % 1000)
+
+
+def split_decorators(line):
+    """Splits a unified logging line into its decorators, GC(n) id & message with string operations only
+
+    Returns None for a line not starting with a time decorator (JDK8 line, continuation line).
+    """
+    if not line.startswith('['):
+        return None
+    # decorators never contain ']': the first '] ' ends them
+    end = line.find('] ')
+    if end == -1:
+        end = line.rstrip().rfind(']')  # no message
+    values = line[1:end].split('][')
+    if not values[0][:1].isdigit():
+        return None
+    timestamp = None
+    zone = None
+    epoch_ms = None
+    uptime_ms = None
+    uptime_ns = None
+    level = None
+    tags = None
+    for value in values:
+        if value[:1].isdigit():
+            if len(value) >= 23 and value[4] == '-' and value[10] == 'T':
+                if timestamp is None:  # time, then utctime
+                    timestamp = value[:23]
+                    zone = value[23:] or None
+            elif value.endswith('ms'):
+                if len(value) - 2 >= EPOCH_MS_MIN_DIGITS:
+                    epoch_ms = int(value[:-2])
+                else:
+                    uptime_ms = int(value[:-2])
+            elif value.endswith('ns'):
+                uptime_ns = int(value[:-2])  # timenanos, then uptimenanos
+            elif value.endswith('s'):
+                uptime_ms = int(round(float(value[:-1].replace(',', '.')) * 1000))
+            # else pid or tid
+        else:
+            # level & tags are padded with spaces
+            value = value.rstrip()
+            if value in LOG_LEVELS:
+                level = value
+            else:
+                tags = value  # last decorator, hostname when tags are not decorated
+    if uptime_ms is None and uptime_ns is not None:
+        uptime_ms = uptime_ns / 1000000.0
+    if timestamp is None:
+        if epoch_ms is None:
+            if uptime_ms is None:
+                return None  # first decorator is a pid or tid
+            epoch_ms = uptime_ms
+        timestamp = format_epoch_ms(epoch_ms)
+    pos = end + 2
+    gc_id = None
+    if line.startswith('GC(', pos):
+        close = line.find(') ', pos + 3)
+        if close != -1 and line[pos + 3:close].isdigit():
+            gc_id = line[pos + 3:close]
+            pos = close + 2
+    return UnifiedLogLine(timestamp, zone, uptime_ms, level, tags, gc_id, line[pos:].rstrip('\r\n'))
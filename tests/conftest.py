@@ -0,0 +1,11 @@
+import os
+import sys
+
+# the modules are at the root of the repository, not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def data_path(name):
+    return os.path.join(DATA_DIR, name)
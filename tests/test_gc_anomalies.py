@@ -0,0 +1,129 @@
+import random
+
+import pytest
+
+import gc_anomalies
+
+MINUTE_MS = 60 * 1000
+HOUR_MS = 60 * MINUTE_MS
+
+
+def noisy(generator, mean, count, stddev=1.0):
+    return [generator.gauss(mean, stddev) for idx in range(count)]
+
+
+def feed(detector, values, interval_ms=10000, start_ms=0):
+    for idx, value in enumerate(values):
+        detector.add(start_ms + idx * interval_ms, value)
+    return detector.finish()
+
+
+@pytest.mark.parametrize('before, after, level, direction', [
+    (10.0, 30.0, gc_anomalies.WARNING, 'up'),
+    (30.0, 10.0, gc_anomalies.INFO, 'down'),
+])
+def test_step_change(before, after, level, direction):
+    generator = random.Random(1)
+    findings = feed(gc_anomalies.ChangePointDetector('minorgc'),
+                    noisy(generator, before, 200) + noisy(generator, after, 200))
+    assert len(findings) == 1
+    finding = findings[0]
+    assert finding.level == level
+    assert finding.title == 'minorgc pause regime change'
+    assert 'went {}'.format(direction) in finding.message
+    # detected within a few pauses of the step
+    assert 200 * 10000 <= finding.start_ms <= 210 * 10000
+    assert finding.score > 0
+
+
+def test_stable_pauses():
+    # false alarms are rare: the stddev is learnt from the warmup pauses only
+    alarms = 0
+    for seed in range(20):
+        generator = random.Random(seed)
+        if feed(gc_anomalies.ChangePointDetector('minorgc'), noisy(generator, 10.0, 300)):
+            alarms += 1
+    assert alarms <= 2
+
+
+def test_warmup_suppresses_early_alarms():
+    # a step within the warmup is learnt as the regime, not reported
+    generator = random.Random(3)
+    values = noisy(generator, 10.0, 20) + noisy(generator, 30.0, 300)
+    assert feed(gc_anomalies.ChangePointDetector('minorgc', warmup=5), values)
+    findings = feed(gc_anomalies.ChangePointDetector('minorgc', warmup=30), values)
+    assert all(finding.start_ms >= 30 * 10000 for finding in findings)
+
+
+def sawtooth(floor_start_mb, floor_growth_mb_h, hours, amplitude_mb=500.0):
+    # heap after GC of a GC per minute, rising from the floor over 20 GCs
+    points = []
+    for minute in range(int(hours * 60)):
+        floor_mb = floor_start_mb + floor_growth_mb_h * minute / 60.0
+        points.append((minute * MINUTE_MS, floor_mb + amplitude_mb * (minute % 20) / 20.0))
+    return points
+
+
+@pytest.mark.parametrize('growth_mb_h, level', [(100.0, gc_anomalies.WARNING), (500.0, gc_anomalies.CRITICAL)])
+def test_rising_heap_floor(growth_mb_h, level):
+    detector = gc_anomalies.HeapFloorDetector()
+    for time_ms, heap_after_mb in sawtooth(1000.0, growth_mb_h, 10):
+        detector.add(time_ms, heap_after_mb)
+    slope, intercept, r2 = detector.regression()
+    assert slope == pytest.approx(growth_mb_h, rel=0.01)
+    assert r2 > 0.99
+    findings = detector.finish()
+    assert len(findings) == 1
+    assert findings[0].level == level
+    assert findings[0].title == 'rising heap floor'
+    (start_ms, start_mb), (end_ms, end_mb) = detector.trend()
+    assert start_mb == pytest.approx(1000.0, rel=0.01)
+    assert end_mb - start_mb == pytest.approx(growth_mb_h * (end_ms - start_ms) / HOUR_MS, rel=0.01)
+
+
+def test_flat_heap_floor():
+    detector = gc_anomalies.HeapFloorDetector()
+    for time_ms, heap_after_mb in sawtooth(1000.0, 0.0, 10):
+        detector.add(time_ms, heap_after_mb)
+    assert detector.finish() == []
+    # not enough windows for a regression
+    detector = gc_anomalies.HeapFloorDetector()
+    for time_ms, heap_after_mb in sawtooth(1000.0, 500.0, 1):
+        detector.add(time_ms, heap_after_mb)
+    assert detector.regression() is None
+    assert detector.finish() == []
+
+
+def test_full_gc_burst():
+    detector = gc_anomalies.BurstDetector('Full GC burst', 3, 10 * MINUTE_MS)
+    # spread full GCs, then a burst of 5 within 8 minutes, then spread again
+    times_ms = [0, 20 * MINUTE_MS, 40 * MINUTE_MS] + [60 * MINUTE_MS + idx * 2 * MINUTE_MS for idx in range(5)] + \
+               [100 * MINUTE_MS, 130 * MINUTE_MS]
+    for time_ms in times_ms:
+        detector.add(time_ms)
+    findings = detector.finish()
+    assert len(findings) == 1
+    assert findings[0].level == gc_anomalies.CRITICAL
+    assert findings[0].score == 5
+    assert (findings[0].start_ms, findings[0].end_ms) == (60 * MINUTE_MS, 68 * MINUTE_MS)
+
+
+def test_ranked_findings():
+    analyzer = gc_anomalies.AnomalyAnalyzer()
+    generator = random.Random(4)
+    time_ms = 0
+    # young pauses stepping up with a heap floor rising by 100MB/h, then a degenerated GC storm
+    for idx, pause_ms in enumerate(noisy(generator, 10.0, 300) + noisy(generator, 20.0, 300)):
+        time_ms = idx * MINUTE_MS
+        analyzer.add_event('minorgc', time_ms, pause_ms, 1000.0 + 100.0 * idx / 60 + 200.0 * (idx % 20) / 20.0)
+    for idx in range(6):
+        analyzer.add_event('degenerated', time_ms + idx * 30000, 500.0)
+    findings = analyzer.finish()
+    assert findings[0].level == gc_anomalies.CRITICAL
+    assert findings[0].title == 'degenerated GC storm'
+    assert findings[0].score == 6
+    assert sorted((finding.level, finding.title) for finding in findings[1:]) == [
+        (gc_anomalies.WARNING, 'minorgc pause regime change'), (gc_anomalies.WARNING, 'rising heap floor')]
+    # most severe first, then the highest score
+    assert [finding.rank() for finding in findings] == sorted((finding.rank() for finding in findings), reverse=True)
+    assert len(analyzer.heap_floor_trend()) == 2
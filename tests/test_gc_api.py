@@ -0,0 +1,61 @@
+import gc
+import io
+
+import pytest
+
+import gc_analyzer
+from conftest import data_path
+
+GCLOG = data_path('parallel_jdk8.log')
+
+
+def read_bytes():
+    with open(GCLOG, 'rb') as gclog_file:
+        return gclog_file.read()
+
+
+@pytest.fixture(params=['binary file', 'BytesIO', 'text file', 'StringIO'])
+def stream(request):
+    if request.param == 'binary file':
+        stream = open(GCLOG, 'rb')
+    elif request.param == 'text file':
+        stream = open(GCLOG, 'r')
+    elif request.param == 'BytesIO':
+        stream = io.BytesIO(read_bytes())
+    else:
+        stream = io.StringIO(read_bytes().decode('ascii'))
+    yield stream
+    stream.close()
+
+
+def test_iter_events_leaves_the_stream_open(stream):
+    events = list(gc_analyzer.iter_events(stream))
+    assert events == list(gc_analyzer.iter_events(GCLOG))
+    # the wrapper of a binary stream would close it when garbage collected
+    gc.collect()
+    assert not stream.closed
+    stream.seek(0)
+    assert stream.readline()
+
+
+def test_iter_events_stopped_early(stream):
+    events = gc_analyzer.iter_events(stream)
+    assert next(events).kind == 'minorgc'
+    events.close()
+    gc.collect()
+    assert not stream.closed
+
+
+def test_analyze_leaves_the_stream_open(stream):
+    stats = gc_analyzer.analyze(stream)
+    assert stats['pauses']['count'] == 40
+    gc.collect()
+    assert not stream.closed
+
+
+def test_path_closed():
+    events = gc_analyzer.iter_events(GCLOG)
+    next(events)
+    gclog_file = events.gi_frame.f_locals['gclog_file']
+    events.close()
+    assert gclog_file.closed
@@ -0,0 +1,89 @@
+import re
+
+import gc_analyzer
+from conftest import data_path
+
+# CMS JDK8 log (+0100): ParNews, a whole concurrent cycle, a promotion failed ParNew, then a concurrent cycle
+# aborted by a concurrent mode failure, its concurrent mark ending within the Full GC record
+GCLOG = data_path('cms_jdk8.log')
+
+PARNEW_END_RE = re.compile(r'^: (\d+)K->(\d+)K\(\d+K\), [\d.]+ secs\] (\d+)K->(\d+)K\(\d+K\), (\d+\.\d+) secs\]')
+
+
+def parse_file(path):
+    with open(path) as gclog_file:
+        return gc_analyzer.parse(gclog_file)
+
+
+def time_ms(timestamp):
+    return gc_analyzer.parse_timestamp(timestamp)[0]
+
+
+def parnews(path):
+    # brute force: (young before, young after, heap before, heap after) in K & pause ms of the ParNew records
+    with open(path) as gclog_file:
+        return [(tuple(int(value) for value in match.groups()[:4]), float(match.group(5)) * 1000)
+                for match in (PARNEW_END_RE.match(line) for line in gclog_file) if match]
+
+
+def test_parnew():
+    records = parnews(GCLOG)
+    assert len(records) == 9
+    parser = parse_file(GCLOG)
+    events = [event for event in gc_analyzer.iter_events(GCLOG) if event.kind == 'minorgc']
+    assert [event.pause_ms for event in events] == [pause_ms for sizes, pause_ms in records]
+    assert [event.heap_after_mb for event in events] == [sizes[3] / 1024 for sizes, pause_ms in records]
+    promoted_k = sum(max((young_before - young_after) - (heap_before - heap_after), 0)
+                     for (young_before, young_after, heap_before, heap_after), pause_ms in records)
+    assert parser.total_promoted == promoted_k / 1024
+    # young & old before/after the first ParNew, in GB
+    (young_before, young_after, heap_before, heap_after), pause_ms = records[0]
+    assert parser.data['young_occupancy'][:2] == [
+        '[Date.UTC(2019,2,1,10,0,5,824)+0,{}],\n'.format(round(young_before / 1024 / 1024, 3)),
+        '[Date.UTC(2019,2,1,10,0,5,824)+26,{}],\n'.format(round(young_after / 1024 / 1024, 3))]
+    assert parser.data['old_occupancy'][1] == \
+        '[Date.UTC(2019,2,1,10,0,5,824)+26,{}],\n'.format(round((heap_after - young_after) / 1024 / 1024, 3))
+
+
+def test_promotion_failed():
+    parser = parse_file(GCLOG)
+    fullgcs = [event for event in gc_analyzer.iter_events(GCLOG) if event.kind == 'fullgc']
+    assert fullgcs[0] == gc_analyzer.GCEvent('fullgc', time_ms('2019-03-01T10:10:38.871'), 2600.0, 400000 / 1024)
+    # the old generation & metaspace of the CMS collection after the failed ParNew
+    assert '[Date.UTC(2019,2,1,10,10,38,871)+2600,{}],\n'.format(round(400000 / 1024 / 1024, 3)) in parser.data['old_occupancy']
+    assert parser.data['metaspace_occupancy'][0] == '[Date.UTC(2019,2,1,10,10,38,871)+0,{}],\n'.format(
+        round(30000 / 1024 / 1024, 3))
+    findings = [finding for finding in parser.findings if finding.title == 'promotion failed']
+    assert [finding.start_ms for finding in findings] == [time_ms('2019-03-01T10:10:38.871')]
+
+
+def test_concurrent_mode_failure():
+    parser = parse_file(GCLOG)
+    fullgcs = [event for event in gc_analyzer.iter_events(GCLOG) if event.kind == 'fullgc']
+    assert fullgcs[1] == gc_analyzer.GCEvent('fullgc', time_ms('2019-03-01T10:20:49.883'), 3000.0, 500000 / 1024)
+    findings = [finding for finding in parser.findings if finding.title == 'concurrent mode failure']
+    assert [finding.start_ms for finding in findings] == [time_ms('2019-03-01T10:20:49.883')]
+    concurrent = dict(parser.compute_stats([50])['concurrent'])
+    # the interrupted concurrent mark ends within the Full GC record
+    assert concurrent['mark']['count'] == 2
+    assert concurrent['mark']['max'] == 1100.0
+    # the aborted cycle is not a cycle
+    assert concurrent['cycle']['count'] == 1
+
+
+def test_concurrent_phases():
+    parser = parse_file(GCLOG)
+    stats = parser.compute_stats([50])['concurrent']
+    assert [name for name, phase_stats in stats] == ['mark', 'preclean', 'abortable-preclean', 'sweep', 'reset', 'cycle']
+    assert dict((name, phase_stats['total']) for name, phase_stats in stats) == {
+        'mark': 800.0 + 1100.0, 'preclean': 50.0, 'abortable-preclean': 5000.0, 'sweep': 400.0, 'reset': 10.0,
+        # from the initial mark to the end of the reset
+        'cycle': time_ms('2019-03-01T10:01:57.013') + 10 - time_ms('2019-03-01T10:01:50.753')}
+    # the pauses of the cycles
+    kinds = [event.kind for event in gc_analyzer.iter_events(GCLOG) if event.kind != 'minorgc']
+    assert kinds == ['initialmark', 'finalremark', 'fullgc', 'initialmark', 'fullgc']
+
+
+def test_event_filter_keeps_the_concurrent_mode_failure():
+    events = list(gc_analyzer.iter_events(GCLOG, events=['fullgc']))
+    assert [event.time_ms for event in events] == [time_ms('2019-03-01T10:10:38.871'), time_ms('2019-03-01T10:20:49.883')]
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+import gc_cpu
+
+
+def random_pauses(count, seed=1):
+    # (kind, time_ms, user_ms, sys_ms, real_ms) with the 10ms resolution of JDK8 cpu times
+    generator = random.Random(seed)
+    pauses = []
+    for idx in range(count):
+        kind = generator.choice(['minorgc', 'minorgc', 'minorgc', 'fullgc'])
+        real_ms = generator.randint(2, 40) * 10.0
+        threads = 8 if kind == 'minorgc' else 3
+        user_ms = round(real_ms * threads * generator.uniform(0.5, 1.0), -1)
+        sys_ms = round(real_ms * generator.uniform(0, 0.5), -1)
+        pauses.append((kind, idx * 1000, user_ms, sys_ms, real_ms))
+    return pauses
+
+
+def expected_blocked(pauses, expected_parallelism):
+    # blocked time of each pause, computed from all of them
+    return [(max(real_ms - user_ms / expected_parallelism[kind], 0.0), kind, time_ms)
+            for kind, time_ms, user_ms, sys_ms, real_ms in pauses if user_ms + sys_ms > 0]
+
+
+def test_summary_matches_the_pauses():
+    pauses = random_pauses(20000)
+    analyzer = gc_cpu.CpuAnalyzer(top=5)
+    for pause in pauses:
+        analyzer.add_times(*pause)
+    summary = analyzer.summary()
+
+    parallelisms = dict((kind, sorted((user_ms + sys_ms) / real_ms for pause_kind, time_ms, user_ms, sys_ms, real_ms
+                                      in pauses if pause_kind == kind)) for kind in ('minorgc', 'fullgc'))
+    for kind, values in parallelisms.items():
+        p90 = values[int(len(values) * 0.9)]
+        assert summary['expected_parallelism'][kind] == pytest.approx(p90, abs=gc_cpu.PARALLELISM_RESOLUTION)
+    all_values = sorted(parallelisms['minorgc'] + parallelisms['fullgc'])
+    assert summary['parallelism']['count'] == len(pauses)
+    assert summary['parallelism']['mean'] == pytest.approx(sum(all_values) / len(all_values))
+    assert summary['parallelism']['min'] == all_values[0]
+    assert summary['parallelism']['max'] == all_values[-1]
+
+    blocked = expected_blocked(pauses, summary['expected_parallelism'])
+    total_blocked_ms = sum(blocked_ms for blocked_ms, kind, time_ms in blocked)
+    assert summary['blocked_ms'] == pytest.approx(total_blocked_ms, rel=0.01)
+    top = sorted(blocked, key=lambda pause: (-pause[0], pause[2]))[:5]
+    assert [(pause['kind'], pause['time_ms']) for pause in summary['top_blocked']] == \
+        [(kind, time_ms) for blocked_ms, kind, time_ms in top]
+    assert [pause['blocked_ms'] for pause in summary['top_blocked']] == \
+        pytest.approx([blocked_ms for blocked_ms, kind, time_ms in top])
+
+
+def test_memory_bounded():
+    analyzer = gc_cpu.CpuAnalyzer(top=3)
+    for pause in random_pauses(50000, seed=2):
+        analyzer.add_times(*pause)
+    for kind_times in analyzer.kinds.values():
+        assert len(kind_times.candidates) == 3 * gc_cpu.TOP_CANDIDATES_FACTOR
+        # 8 threads at most: bins of parallelism & user/real below 8 / resolution
+        assert len(kind_times.parallelism_bins) <= 8 / gc_cpu.PARALLELISM_RESOLUTION
+        assert len(kind_times.ratio_times) <= 8 / gc_cpu.PARALLELISM_RESOLUTION
+
+
+def test_short_pauses_not_judged():
+    analyzer = gc_cpu.CpuAnalyzer()
+    assert analyzer.add_times('minorgc', 0, 10.0, 0.0, 10.0) is None
+    assert analyzer.summary() is None
+    assert analyzer.add_times('minorgc', 1000, 60.0, 20.0, 40.0) == (2.0, 0.25)
+    assert analyzer.summary()['unjudged_pauses'] == 1
@@ -0,0 +1,138 @@
+import re
+
+import pytest
+
+import gc_analyzer
+from conftest import data_path
+from gc_stats_engine import StatsEngine
+
+# JDK8 records with the per worker Min/Avg/Max blocks, JDK9+ gc+phases lines (info: serial, debug: per worker)
+G1_JDK8_LOG = data_path('g1_jdk8.log')
+G1_JDK9_LOG = data_path('g1_jdk9_phases.log')
+PERCENTILES = [50, 90, 100]
+
+JDK8_PAUSE_RE = re.compile(r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3})\+\d{4}: [\d.]+: \[GC pause ')
+JDK8_SERIAL_PHASE_RE = re.compile(r'^ {3}\[([A-Z][\w ]*): (\d+\.\d+) ms\]$')
+JDK8_WORKER_PHASE_RE = re.compile(r'^ {6}\[([A-Z][\w ]*) \(ms\): Min: [\d.]+, Avg: (\d+\.\d+), Max: (\d+\.\d+)')
+JDK9_PHASE_RE = re.compile(r'^\[([^\]]+)\]\[\w+\]\[gc,phases *\] GC\((\d+)\) +([A-Z][\w ]*?)(?: \(ms\))?: +'
+                           r'(?:(\d+\.\d+)ms$|Min: +[\d.]+, Avg: +(\d+\.\d+), Max: +(\d+\.\d+))')
+
+
+def jdk8_phases(path):
+    # brute force: [(timestamp, [(name, avg_ms, max_ms)])] of the GC pauses, line by line
+    pauses = []
+    with open(path) as gclog_file:
+        for line in gclog_file:
+            match = JDK8_PAUSE_RE.match(line)
+            if match:
+                pauses.append((match.group(1), []))
+                continue
+            match = JDK8_SERIAL_PHASE_RE.match(line.rstrip('\n'))
+            if match:
+                pauses[-1][1].append((match.group(1), float(match.group(2)), None))
+                continue
+            match = JDK8_WORKER_PHASE_RE.match(line)
+            if match:
+                pauses[-1][1].append((match.group(1), float(match.group(2)), float(match.group(3))))
+    return pauses
+
+
+def jdk9_phases(path):
+    pauses = {}
+    with open(path) as gclog_file:
+        for line in gclog_file:
+            match = JDK9_PHASE_RE.match(line.rstrip('\n'))
+            if match:
+                timestamp, gc_id, name, time_ms, avg_ms, max_ms = match.groups()
+                phases = pauses.setdefault(gc_id, (timestamp[:23], []))[1]
+                if time_ms is not None:
+                    phases.append((name, float(time_ms), None))
+                else:
+                    phases.append((name, float(avg_ms), float(max_ms)))
+    return [pauses[gc_id] for gc_id in sorted(pauses, key=int)]
+
+
+def without_ignored(pauses):
+    return [(timestamp, [phase for phase in phases if phase[0] not in gc_analyzer.G1GCLineParser.IGNORED_PHASES])
+            for timestamp, phases in pauses]
+
+
+def parse_file(path):
+    with open(path) as gclog_file:
+        return gc_analyzer.parse(gclog_file)
+
+
+def serie_point(parser, timestamp, value):
+    match_timestamp = parser.timestamp_re.match(timestamp)
+    return '[{},{}],\n'.format(gc_analyzer.GCLineParser.format_timestamp(match_timestamp), round(value, 3))
+
+
+def expected_stats(pauses):
+    # per phase engines fed with the brute force phases
+    phase_stats = StatsEngine()
+    phase_max_stats = StatsEngine()
+    for timestamp, phases in pauses:
+        time_ms = gc_analyzer.parse_timestamp(timestamp)[0]
+        for name, avg_ms, max_ms in phases:
+            phase_stats.add_event(name, time_ms, avg_ms)
+            if max_ms is not None:
+                phase_max_stats.add_event(name, time_ms, max_ms)
+    return phase_stats.compute(PERCENTILES)['kinds'], phase_max_stats.compute(PERCENTILES)['kinds']
+
+
+def test_jdk8_worker_blocks():
+    pauses = jdk8_phases(G1_JDK8_LOG)
+    # the young & mixed pauses, not the remark & cleanup
+    assert len(pauses) == 22
+    assert all(name in [phase[0] for phase in pauses[0][1]] for name in gc_analyzer.G1GCLineParser.IGNORED_PHASES)
+    pauses = without_ignored(pauses)
+    parser = parse_file(G1_JDK8_LOG)
+    assert parser.phase_names == [name for name, avg_ms, max_ms in pauses[0][1]]
+    # the top level lines of the block only, not their details
+    assert 'Processed Buffers' not in parser.phase_names and 'Ref Proc' not in parser.phase_names
+    assert 'Parallel Time' not in parser.phase_names
+    # every phase stacked, the average of the workers per pause
+    for name in parser.phase_names:
+        assert parser.data[gc_analyzer.phase_serie_key(name)] == [
+            serie_point(parser, timestamp, avg_ms) for timestamp, phases in pauses for phase_name, avg_ms, max_ms in phases
+            if phase_name == name]
+    # the object copy avg varies per pause
+    assert len(set(parser.data['phase_object_copy'])) == len(pauses)
+
+
+def test_jdk9_phases():
+    pauses = without_ignored(jdk9_phases(G1_JDK9_LOG))
+    assert len(pauses) == 3
+    parser = parse_file(G1_JDK9_LOG)
+    assert parser.phase_names == ['Pre Evacuate Collection Set', 'Evacuate Collection Set', 'Ext Root Scanning',
+                                  'Object Copy', 'Post Evacuate Collection Set', 'Other']
+    # the per worker (debug) phases are details of Evacuate Collection Set: in the stats, not stacked
+    assert 'phase_object_copy' not in parser.data
+    assert parser.data['phase_evacuate_collection_set'] == [serie_point(parser, timestamp, avg_ms) for timestamp, avg_ms in [
+        ('2018-11-14T07:00:10.209', 8.0), ('2018-11-14T07:00:20.500', 16.0), ('2018-11-14T07:00:30.750', 24.0)]]
+    # the remark of GC(2) has no phases: 3 points per phase serie for 4 pauses
+    assert [event.kind for event in gc_analyzer.iter_events(G1_JDK9_LOG)] == ['minorgc', 'minorgc', 'finalremark', 'minorgc']
+
+
+@pytest.mark.parametrize('path, jdk_phases', [(G1_JDK8_LOG, jdk8_phases), (G1_JDK9_LOG, jdk9_phases)])
+def test_phase_percentiles(path, jdk_phases):
+    phase_stats, phase_max_stats = expected_stats(without_ignored(jdk_phases(path)))
+    parser = parse_file(path)
+    stats = parser.compute_stats(PERCENTILES)['phases']
+    assert [name for name, pause_stats, max_stats in stats] == parser.phase_names
+    for name, pause_stats, max_stats in stats:
+        assert pause_stats == phase_stats[name]
+        assert max_stats == phase_max_stats.get(name)
+
+
+def test_jdk9_worker_percentiles():
+    stats = dict((name, (pause_stats, max_stats))
+                 for name, pause_stats, max_stats in parse_file(G1_JDK9_LOG).compute_stats(PERCENTILES)['phases'])
+    pause_stats, max_stats = stats['Object Copy']
+    assert (pause_stats['count'], pause_stats['mean'], pause_stats['max']) == (2, 9.0, 12.0)
+    assert (max_stats['mean'], max_stats['max']) == (11.0, 15.0)
+    pause_stats, max_stats = stats['Evacuate Collection Set']
+    assert pause_stats['count'] == 3
+    assert dict(pause_stats['percentiles'])[50] == 16.0
+    assert max_stats is None
+    assert not any(name in stats for name in gc_analyzer.G1GCLineParser.IGNORED_PHASES)
@@ -0,0 +1,138 @@
+import io
+import re
+
+import pytest
+
+import gc_analyzer
+from conftest import data_path
+
+G1_JDK8_LOG = data_path('g1_jdk8.log')
+G1_JDK9_LOG = data_path('g1_jdk9_phases.log')
+PARALLEL_LOG = data_path('parallel_jdk8.log')
+CMS_LOG = data_path('cms_jdk8.log')
+# stacked on the chart, metaspace is off heap on its own axis
+HEAP_GENERATIONS = ['young', 'old', 'humongous']
+
+G1_JDK8_SIZES_RE = re.compile(r'^   \[Eden: ([\d.]+[BKMG])\([\d.]+[BKMG]\)->([\d.]+[BKMG])\([\d.]+[BKMG]\) '
+                              r'Survivors: ([\d.]+[BKMG])->([\d.]+[BKMG]) Heap: ([\d.]+[BKMG])\([\d.]+[BKMG]\)->([\d.]+[BKMG])')
+PARALLEL_SIZES_RE = re.compile(r'\[PSYoungGen: (\d+)K->(\d+)K\(\d+K\)\] (\d+)K->(\d+)K\(\d+K\)')
+JDK9_PAUSE_RE = re.compile(r'^\[[^\]]+\]\[info\]\[gc +\] GC\((\d+)\) Pause Young .* [\d.]+ms$')
+JDK9_SPACE_RE = re.compile(r'^\[[^\]]+\]\[info\]\[gc,(?:heap|metaspace) *\] GC\((\d+)\) (\w+)(?: regions)?: (\d+)K?->(\d+)K?')
+
+
+def to_m(size):
+    return gc_analyzer.GCLineParser.heap_occupancy_to_M(size)
+
+
+def parse_file(path):
+    with open(path) as gclog_file:
+        return gc_analyzer.parse(gclog_file)
+
+
+def serie_values(serie):
+    # (time, GB) of the points of a serie
+    return [tuple(point.lstrip('[').rstrip('],\n').rsplit(',', 1)) for point in serie]
+
+
+def occupancy_gb(parser, generation):
+    return [float(value) for time, value in serie_values(parser.data[generation + '_occupancy'])]
+
+
+def expected_gb(sizes_mb):
+    return [round(size_mb / 1024, 3) for before_mb, after_mb in sizes_mb for size_mb in (before_mb, after_mb)]
+
+
+def test_g1_jdk8_young_old():
+    # young = eden + survivors, old = the rest of the heap
+    young, old = [], []
+    with open(G1_JDK8_LOG) as gclog_file:
+        for match in (G1_JDK8_SIZES_RE.match(line) for line in gclog_file):
+            if match:
+                eden_before, eden_after, survivor_before, survivor_after, heap_before, heap_after = \
+                    [to_m(size) for size in match.groups()]
+                young.append((eden_before + survivor_before, eden_after + survivor_after))
+                old.append((heap_before - young[-1][0], heap_after - young[-1][1]))
+    assert len(young) == 22
+    parser = parse_file(G1_JDK8_LOG)
+    assert occupancy_gb(parser, 'young') == expected_gb(young)
+    assert occupancy_gb(parser, 'old') == expected_gb(old)
+    # no Full GC: no metaspace, no humongous regions in JDK8 logs
+    assert 'metaspace_occupancy' not in parser.data
+    assert 'humongous_occupancy' not in parser.data
+
+
+def test_parallel_young_old():
+    young, old = [], []
+    with open(PARALLEL_LOG) as gclog_file:
+        for match in (PARALLEL_SIZES_RE.search(line) for line in gclog_file):
+            if match:
+                young_before, young_after, heap_before, heap_after = [int(size) / 1024 for size in match.groups()]
+                young.append((young_before, young_after))
+                old.append((heap_before - young_before, heap_after - young_after))
+    parser = parse_file(PARALLEL_LOG)
+    assert occupancy_gb(parser, 'young') == expected_gb(young)
+    assert occupancy_gb(parser, 'old') == expected_gb(old)
+
+
+def test_g1_jdk9_regions_and_metaspace():
+    # regions of 1M summed per generation, the metaspace in K
+    spaces = {}
+    pauses = []
+    with open(G1_JDK9_LOG) as gclog_file:
+        for line in gclog_file:
+            match = JDK9_SPACE_RE.match(line)
+            if match:
+                gc_id, space, before, after = match.groups()
+                generation = gc_analyzer.JDK9_SPACE_GENERATIONS[space]
+                unit = 1024 if space == 'Metaspace' else 1
+                before_mb, after_mb = spaces.setdefault(gc_id, {}).get(generation, (0, 0))
+                spaces[gc_id][generation] = (before_mb + int(before) / unit, after_mb + int(after) / unit)
+            match = JDK9_PAUSE_RE.match(line)
+            if match:
+                pauses.append(match.group(1))
+    parser = parse_file(G1_JDK9_LOG)
+    last = {}
+    expected = dict((generation, []) for generation in gc_analyzer.GENERATIONS)
+    for gc_id in pauses:
+        for generation in gc_analyzer.GENERATIONS:
+            if generation in spaces.get(gc_id, {}):
+                before_mb, after_mb = spaces[gc_id][generation]
+            else:
+                # a pause without gc+heap lines keeps the last known occupancy
+                before_mb = after_mb = last[generation]
+            last[generation] = after_mb
+            expected[generation].append((before_mb, after_mb))
+    assert expected['young'][0] == (207, 3)
+    assert expected['humongous'][0] == (2, 1)
+    for generation in gc_analyzer.GENERATIONS:
+        assert occupancy_gb(parser, generation) == expected_gb(expected[generation])
+
+
+@pytest.mark.parametrize('path', [G1_JDK9_LOG, CMS_LOG, PARALLEL_LOG, G1_JDK8_LOG])
+def test_generations_share_their_times(path):
+    # a point at the same times in every heap generation for them to be stacked
+    parser = parse_file(path)
+    times = [[time for time, value in serie_values(parser.data[generation + '_occupancy'])]
+             for generation in HEAP_GENERATIONS if generation + '_occupancy' in parser.data]
+    assert len(times) >= 2
+    assert all(serie_times == times[0] for serie_times in times)
+
+
+def test_cms_metaspace():
+    # metaspace only logged by the Full GCs, then kept until the next one
+    parser = parse_file(CMS_LOG)
+    metaspace = occupancy_gb(parser, 'metaspace')
+    assert metaspace == [round(30000 / 1024 / 1024, 3)] * len(metaspace)
+    times = [time for time, value in serie_values(parser.data['metaspace_occupancy'])]
+    old_times = [time for time, value in serie_values(parser.data['old_occupancy'])]
+    assert times[0] == 'Date.UTC(2019,2,1,10,10,38,871)+0'
+    assert times == old_times[old_times.index(times[0]):]
+
+
+def test_generation_series_written():
+    reporter = parse_file(G1_JDK9_LOG).create_reporter()
+    data_file = io.StringIO()
+    reporter.write(data_file)
+    data = data_file.getvalue()
+    for generation in gc_analyzer.GENERATIONS:
+        assert 'var data_serie_{} = [[Date.UTC(2018,10,14,7,0,10,209)+0,'.format(generation) in data
@@ -0,0 +1,58 @@
+import array
+import io
+import os
+
+import gc_html
+
+CHART_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'chart')
+
+
+class UnclosedStringIO(io.StringIO):
+    def close(self):
+        pass
+
+
+def test_point_columns():
+    xs, ys = gc_html.point_columns(['[Date.UTC(2018,10,14,7,0,1,41)+0,12.5],\n', '[1500.25,3],\n'])
+    assert xs == [1542178801041.0, 1500.25]
+    assert ys == ['12.5', '3']
+
+
+def test_encode_column():
+    kind, column = gc_html.encode_column(array.array('d', [0, -5, 2 ** 31 - 1]))
+    assert kind == 'i4'
+    assert column.typecode == 'i'
+    kind, column = gc_html.encode_column(array.array('d', [0, 2 ** 31]))
+    assert kind == 'f8'
+    assert list(column) == [0, 2 ** 31]
+
+
+def test_write_serie_chunks():
+    # more points than a chunk, with fractional ms offsets: x in us
+    points = ['[{},{}],\n'.format(idx * 10 + 0.5, idx % 7 / 4.0) for idx in range(gc_html.COLUMN_CHUNK_POINTS + 10)]
+    writer = gc_html.EmbeddedSeriesWriter()
+    assert writer.write_serie('data_serie_minorgc', points)
+    assert not writer.write_serie('data_serie_fullgc', [])
+    serie = writer.series[gc_html.PAUSE_CHART][0]
+    assert serie['count'] == len(points)
+    assert serie['start'] == 500
+    assert serie['x'] == ['i4', 0, gc_html.X_FRACTION_SCALE]
+    # y of 2 decimals, after the 8 bytes aligned x
+    assert serie['y'] == ['i4', len(points) * 4 + len(points) * 4 % 8, 100]
+
+
+def test_html_report_streams_the_data_script():
+    output = UnclosedStringIO()
+    report = gc_html.HTMLReportFile(output, gc_html.EmbeddedSeriesWriter(), CHART_DIR)
+    report.write_head()
+    head = output.getvalue()
+    assert head.endswith('</script>\n<script>\n' + gc_html.inline_script(os.path.join(CHART_DIR, 'embedded.js')))
+    assert '<script src="jquery-3.1.1.min.js">' not in head
+    # '</script' split across writes is escaped too
+    report.write("var note = '</scr")
+    report.write("ipt>'\nvar data_serie_heap = []\n")
+    report.write_tail()
+    html = output.getvalue()
+    assert "var note = '<\\/script>'\nvar data_serie_heap = []\n</script>" in html
+    assert gc_html.SCRIPT_TAG_RE.search(html) is None
+    assert html.endswith('</html>\n')
@@ -0,0 +1,115 @@
+import gzip
+import os
+import shutil
+
+import pytest
+
+import gc_analyzer
+from conftest import data_path
+
+GCLOG = data_path('g1_jdk8.log')
+FROM_TIME = '2018-11-14T07:00:45'
+
+
+def parse_window(gclog_file, start_offset=0):
+    return list(gc_analyzer.iter_file_events(gclog_file, from_time=FROM_TIME, start_offset=start_offset))
+
+
+def full_parse(path):
+    return list(gc_analyzer.iter_events(path, from_time=FROM_TIME))
+
+
+def indexed_parse(path, interval=3):
+    # (index rebuilt, events from the offset looked up)
+    index = gc_analyzer.GCLogIndex(path)
+    rebuilt = not index.load()
+    if rebuilt:
+        index.build(interval)
+    start_offset = index.lookup(FROM_TIME)
+    gclog_file = index.open()
+    try:
+        return rebuilt, start_offset, parse_window(gclog_file, start_offset)
+    finally:
+        gclog_file.close()
+
+
+def write_log(path, lines):
+    with open(path, 'w') as gclog_file:
+        gclog_file.writelines(lines)
+
+
+@pytest.fixture
+def gclog_lines():
+    with open(GCLOG) as gclog_file:
+        return gclog_file.readlines()
+
+
+def test_index_lookup(tmp_path):
+    path = str(tmp_path / 'gc.log')
+    shutil.copyfile(GCLOG, path)
+    rebuilt, start_offset, events = indexed_parse(path)
+    assert rebuilt
+    assert os.path.exists(path + '.idx')
+    assert start_offset > 0
+    assert events == full_parse(path)
+    # loaded as is while the log does not change
+    rebuilt, loaded_offset, events = indexed_parse(path)
+    assert not rebuilt
+    assert loaded_offset == start_offset
+    assert events == full_parse(path)
+
+
+def test_index_rebuilt_when_the_log_grows(tmp_path, gclog_lines):
+    path = str(tmp_path / 'gc.log')
+    write_log(path, gclog_lines[:300])
+    assert indexed_parse(path)[0]
+    write_log(path, gclog_lines)
+    rebuilt, start_offset, events = indexed_parse(path)
+    assert rebuilt
+    assert events == full_parse(path)
+
+
+def test_index_rebuilt_when_the_head_changes(tmp_path, gclog_lines):
+    # same size & modification time, another head (e.g. rotated then rewritten within the same second)
+    path = str(tmp_path / 'gc.log')
+    write_log(path, gclog_lines)
+    assert indexed_parse(path)[0]
+    stat = os.stat(path)
+    write_log(path, [line.replace('2018-11-14T07:00:0', '2018-11-14T07:00:1', 1) if idx < 60 else line
+                     for idx, line in enumerate(gclog_lines)])
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.path.getsize(path) == stat.st_size
+    rebuilt, start_offset, events = indexed_parse(path)
+    assert rebuilt
+    assert events == full_parse(path)
+
+
+def test_index_rebuilt_when_the_version_changes(tmp_path):
+    path = str(tmp_path / 'gc.log')
+    shutil.copyfile(GCLOG, path)
+    indexed_parse(path)
+    with open(path + '.idx') as index_file:
+        lines = index_file.readlines()
+    lines[0] = 'gc_analyzer index v{}\n'.format(gc_analyzer.INDEX_VERSION - 1)
+    with open(path + '.idx', 'w') as index_file:
+        index_file.writelines(lines)
+    assert indexed_parse(path)[0]
+
+
+@pytest.mark.parametrize('zran', [False, True], ids=['inflate from start', 'zran checkpoints'])
+def test_gzip_index(tmp_path, monkeypatch, zran):
+    if zran:
+        pytest.importorskip('indexed_gzip')
+    else:
+        monkeypatch.setattr(gc_analyzer, 'indexed_gzip', None)
+    path = str(tmp_path / 'gc.log.gz')
+    with open(GCLOG, 'rb') as gclog_file, gzip.open(path, 'wb') as gzip_file:
+        shutil.copyfileobj(gclog_file, gzip_file)
+    rebuilt, start_offset, events = indexed_parse(path)
+    assert rebuilt
+    assert os.path.exists(path + '.zidx') == zran
+    assert start_offset > 0
+    assert events == full_parse(path)
+    rebuilt, start_offset, events = indexed_parse(path)
+    assert not rebuilt
+    assert events == full_parse(path)
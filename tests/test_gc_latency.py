@@ -0,0 +1,175 @@
+import calendar
+import io
+import json
+import random
+
+import pytest
+
+import gc_analyzer
+import gc_latency
+from conftest import data_path
+from gc_analyzer import GCEvent
+from gc_latency import LatencyCorrelator, LatencyHistogram
+
+# Parallel JDK8 log of zone +0100, its first pause at 07:00:09.359 for 171 ms
+PARALLEL_LOG = data_path('parallel_jdk8.log')
+FIRST_PAUSE_MS = calendar.timegm((2018, 11, 14, 7, 0, 9)) * 1000 + 359
+ZONE_OFFSET_MS = 3600 * 1000
+KINDS = ['minorgc', 'minorgc', 'minorgc', 'mixed', 'fullgc']
+
+
+@pytest.fixture(autouse=True)
+def reset_info_output(monkeypatch):
+    # main() sets the module wide info output
+    monkeypatch.setattr(gc_analyzer, 'info_output', None)
+
+
+def run_main(capsys, argv):
+    with pytest.raises(SystemExit) as exit_info:
+        gc_analyzer.main(argv)
+    assert exit_info.value.code == 0
+    return json.loads(capsys.readouterr().out)
+
+
+def random_pauses(generator, count, time_ms=FIRST_PAUSE_MS):
+    pauses = []
+    for idx in range(count):
+        time_ms += generator.uniform(50, 400)
+        # a tenth of the events without pause (concurrent phases)
+        pause_ms = 0.0 if generator.random() < 0.1 else generator.uniform(1, 300)
+        pauses.append(GCEvent(generator.choice(KINDS), time_ms, pause_ms, 100.0))
+    return pauses
+
+
+def random_requests(generator, count, first_ms, last_ms, max_request_ms):
+    # (logged, start, end) logged at their end, slightly out of order
+    ends = sorted(generator.uniform(first_ms, last_ms) for idx in range(count))
+    requests = []
+    for end_ms in ends:
+        end_ms += generator.uniform(0, max_request_ms / 2.0)
+        requests.append((end_ms, end_ms - generator.uniform(0, max_request_ms), end_ms))
+    return requests
+
+
+def brute_force_histogram(pauses, requests):
+    # every pause compared with every request
+    histogram = LatencyHistogram()
+    for logged_ms, start_ms, end_ms in requests:
+        overlaps = {}
+        for pause in pauses:
+            overlap_ms = min(pause.time_ms + pause.pause_ms, end_ms) - max(pause.time_ms, start_ms)
+            if overlap_ms > 0:
+                overlaps[pause.kind] = overlaps.get(pause.kind, 0.0) + overlap_ms
+        histogram.add(end_ms - start_ms, overlaps)
+    return histogram
+
+
+def assert_same_histogram(histogram, expected):
+    assert histogram.counts == expected.counts
+    assert histogram.paused_counts == expected.paused_counts
+    assert sorted(histogram.kind_counts) == sorted(expected.kind_counts)
+    for kind in expected.kind_counts:
+        assert histogram.kind_counts[kind] == expected.kind_counts[kind]
+        assert list(histogram.kind_ms[kind]) == pytest.approx(list(expected.kind_ms[kind]))
+
+
+def test_time_ms():
+    assert gc_latency.time_ms('2018-11-14T07:00:09.359') == FIRST_PAUSE_MS
+    assert gc_latency.time_ms('2018-11-14 07:00:09,35') == FIRST_PAUSE_MS - 9
+    assert gc_latency.time_ms('2018-11-14T07:00:09') == FIRST_PAUSE_MS - 359
+    # epochs are instants: shifted to the wall clock of the gc log, ISO timestamps are wall clock times already
+    epoch_ms = FIRST_PAUSE_MS - ZONE_OFFSET_MS
+    assert gc_latency.time_ms(str(epoch_ms), ZONE_OFFSET_MS) == FIRST_PAUSE_MS
+    assert gc_latency.time_ms('{}.359'.format(epoch_ms // 1000), ZONE_OFFSET_MS) == pytest.approx(FIRST_PAUSE_MS)
+    assert gc_latency.time_ms('2018-11-14T07:00:09.359', ZONE_OFFSET_MS) == FIRST_PAUSE_MS
+
+
+def test_iter_requests():
+    log_file = io.StringIO('2018-11-14T07:00:09.359 GET / 200 1.5\nnot a request\n[2018-11-14 07:00:10.000] GET / 2\n')
+    skipped = [0]
+    assert list(gc_latency.iter_requests(log_file, unit='s', skipped=skipped)) == [
+        (FIRST_PAUSE_MS, FIRST_PAUSE_MS - 1500, FIRST_PAUSE_MS),
+        (FIRST_PAUSE_MS + 641, FIRST_PAUSE_MS + 641 - 2000, FIRST_PAUSE_MS + 641)]
+    assert skipped == [1]
+    log_file.seek(0)
+    assert next(gc_latency.iter_requests(log_file, time_at_end=False)) == \
+        (FIRST_PAUSE_MS, FIRST_PAUSE_MS, FIRST_PAUSE_MS + 1.5)
+
+
+@pytest.mark.parametrize('seed', [1, 2])
+def test_overlaps_brute_force(seed):
+    # enough pauses for the window to be evicted & compacted, requests out of order by less than max_request_ms
+    generator = random.Random(seed)
+    max_request_ms = 2000
+    pauses = random_pauses(generator, 1500)
+    requests = random_requests(generator, 1500, pauses[0].time_ms - 1000, pauses[-1].time_ms + 1000, max_request_ms)
+    correlator = LatencyCorrelator(iter(pauses), max_request_ms)
+    compacted = False
+    for logged_ms, start_ms, end_ms in requests:
+        correlator.add_request(logged_ms, start_ms, end_ms)
+        compacted = compacted or (correlator.head == 0 and correlator.pause_count > 1024)
+    assert compacted
+    assert_same_histogram(correlator.histogram, brute_force_histogram(pauses, requests))
+    # pauses after the last request counted too
+    assert correlator.run([]).pause_count == sum(1 for pause in pauses if pause.pause_ms > 0)
+
+
+def test_request_spanning_an_eviction():
+    # 2000 pauses of 10 ms every 20 ms: the window is compacted while requests of max_request_ms overlap its head
+    max_request_ms = 1000
+    pauses = [GCEvent('minorgc', FIRST_PAUSE_MS + idx * 20.0, 10.0, 100.0) for idx in range(2000)]
+    requests = []
+    for idx in range(2, 40):
+        end_ms = FIRST_PAUSE_MS + idx * 1000.0 + 5
+        requests.append((end_ms, end_ms - max_request_ms, end_ms))
+        # logged before the previous one, still within the join window
+        requests.append((end_ms - 900, end_ms - 900 - max_request_ms, end_ms - 900))
+    correlator = LatencyCorrelator(iter(pauses), max_request_ms).run(requests)
+    assert_same_histogram(correlator.histogram, brute_force_histogram(pauses, requests))
+    # every request of 1s overlaps 50 pauses of 10 ms
+    assert sum(correlator.histogram.kind_ms['minorgc']) == pytest.approx(len(requests) * 500)
+
+
+def test_time_at_start_or_end():
+    pauses = [GCEvent('fullgc', FIRST_PAUSE_MS, 100.0, 100.0)]
+    # logged 50 ms after the start of the pause, 200 ms long
+    lines = '2018-11-14T07:00:09.409 200\n'
+    at_end = gc_latency.correlate(iter(pauses), [io.StringIO(lines)])
+    at_start = gc_latency.correlate(iter(pauses), [io.StringIO(lines)], time_at_end=False)
+    assert at_end['slow'][0]['pause_ms'] == pytest.approx(50.0)
+    assert at_start['slow'][0]['pause_ms'] == pytest.approx(50.0)
+    # logged 200 ms before the pause: overlapping it only if it starts there
+    lines = '2018-11-14T07:00:09.159 250\n'
+    assert gc_latency.correlate(iter(pauses), [io.StringIO(lines)])['paused_requests'] == 0
+    assert gc_latency.correlate(iter(pauses), [io.StringIO(lines)], time_at_end=False)['slow'][0]['pause_ms'] == \
+        pytest.approx(50.0)
+
+
+def test_merged_logs():
+    # several access logs, each sorted: the same report as their lines sorted in a single log
+    generator = random.Random(3)
+    pauses = random_pauses(generator, 300)
+    logs = []
+    for log_idx in range(3):
+        times = sorted(generator.uniform(pauses[0].time_ms, pauses[-1].time_ms) for idx in range(500))
+        logs.append(['{} {}\n'.format(int(time_ms), round(generator.uniform(1, 1000), 3)) for time_ms in times])
+    merged = sorted((line for lines in logs for line in lines), key=lambda line: int(line.split()[0]))
+    report = gc_latency.correlate(iter(pauses), [io.StringIO(''.join(lines)) for lines in logs])
+    assert report == gc_latency.correlate(iter(pauses), [io.StringIO(''.join(merged))])
+    assert report['requests'] == 1500
+    assert report['skipped_lines'] == 0
+
+
+@pytest.mark.parametrize('timestamp', [
+    '2018-11-14T07:00:09.400',
+    # instants: 06:00:09.400 UTC in seconds & ms
+    str((FIRST_PAUSE_MS - ZONE_OFFSET_MS + 41) / 1000.0),
+    str(FIRST_PAUSE_MS - ZONE_OFFSET_MS + 41),
+])
+def test_epoch_in_the_zone_of_the_gc_log(capsys, tmp_path, timestamp):
+    # a request of 50 ms ending 41 ms into the first pause
+    access_log = tmp_path / 'access.log'
+    access_log.write_text(u'{} GET / 50\n'.format(timestamp))
+    report = run_main(capsys, [PARALLEL_LOG, '--latency-log', str(access_log), '-f', 'json'])
+    assert report['paused_requests'] == 1
+    assert report['slow'][0]['kinds']['minorgc']['pause_ms'] == pytest.approx(41.0)
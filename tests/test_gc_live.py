@@ -0,0 +1,136 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+import gc_analyzer
+import gc_live
+from conftest import data_path
+
+GCLOG = data_path('parallel_jdk8.log')
+G1_GCLOG = data_path('g1_jdk8.log')
+TIMEOUT_S = 10
+
+
+def ingest_replay(path, fifos=(), sockets=()):
+    # replays GCLOG into the FIFO or socket ingested, returns (line count written, snapshots published)
+    snapshots = []
+    ingestion = gc_live.LiveIngestion(fifos, sockets, publish=snapshots.append, publish_interval=0.05)
+    expected_count = sum(1 for event in gc_analyzer.iter_events(GCLOG))
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(ingestion.run())
+        try:
+            while not os.path.exists(path):
+                await asyncio.sleep(0.01)
+            line_count = await loop.run_in_executor(None, gc_live.replay, GCLOG, path)
+            deadline = loop.time() + TIMEOUT_S
+            # the last JDK8 record is parsed once the writer is idle
+            while not snapshots or snapshots[-1]['events'] < expected_count:
+                assert loop.time() < deadline, 'events not received'
+                await asyncio.sleep(0.05)
+            return line_count
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    return asyncio.run(run()), snapshots
+
+
+def merged_buckets(snapshots):
+    # serie of the stream, the updates of a bucket replacing its previous ones
+    buckets = {}
+    for snapshot in snapshots:
+        for bucket in snapshot['serie']:
+            buckets[bucket[0]] = bucket
+    return [buckets[bucket_ms] for bucket_ms in sorted(buckets)]
+
+
+@pytest.mark.parametrize('kind', ['fifo', 'socket'])
+def test_replay_into_live_ingestion(tmp_path, kind):
+    path = str(tmp_path / 'gc.{}'.format(kind))
+    if kind == 'fifo':
+        line_count, snapshots = ingest_replay(path, fifos=[path])
+    else:
+        line_count, snapshots = ingest_replay(path, sockets=[path])
+    events = list(gc_analyzer.iter_events(GCLOG))
+
+    assert len(set(snapshot['stream'] for snapshot in snapshots)) == 1
+    last = snapshots[-1]
+    assert last['gc'] == 'Parallel'
+    assert last['format'] == 'JDK8'
+    assert last['lines'] == line_count == 42
+    assert last['events'] == len(events) == 40
+    assert last['dropped_lines'] == 0
+    assert not last['overloaded']
+
+    buckets = merged_buckets(snapshots)
+    assert sum(bucket[1] for bucket in buckets) == len(events)
+    assert max(bucket[2] for bucket in buckets) == max(event.pause_ms for event in events)
+    assert sum(bucket[3] for bucket in buckets) == pytest.approx(sum(event.pause_ms for event in events))
+    assert buckets[-1][4] == events[-1].heap_after_mb
+
+
+def ingest_slowly(lines, incremental, monkeypatch, feed_s=0.001):
+    # a consumer slower than the writer: backpressure, then overload & dropped lines
+    monkeypatch.setattr(gc_live, 'BACKPRESSURE_WINDOW_S', 0.05)
+    stream = gc_live.LiveStream('slow', queue_lines=10)
+    stream.incremental = incremental
+    incremental.listener = stream.add_event
+    feed = incremental.feed
+    transitions = []
+
+    def slow_feed(line):
+        time.sleep(feed_s)
+        feed(line)
+
+    def set_overloaded(overloaded):
+        set_overloaded.original(overloaded)
+        parser = incremental.parser
+        transitions.append((overloaded, stream.dropped_lines, list(parser.event_keywords) if parser.event_keywords is not None else None))
+
+    set_overloaded.original = stream.set_overloaded
+    monkeypatch.setattr(incremental, 'feed', slow_feed)
+    monkeypatch.setattr(stream, 'set_overloaded', set_overloaded)
+
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(''.join(lines).encode('utf-8'))
+        reader.feed_eof()
+        await asyncio.wait_for(gc_live.LiveIngestion().ingest(stream, reader), TIMEOUT_S)
+
+    asyncio.run(run())
+    return stream, transitions
+
+
+@pytest.mark.parametrize('events', [None, ['minorgc', 'mixed']])
+def test_slow_consumer(monkeypatch, events):
+    with open(G1_GCLOG) as gclog_file:
+        lines = gclog_file.readlines() * 2
+    incremental = gc_analyzer.IncrementalParser(events=events)
+    stream, transitions = ingest_slowly(lines, incremental, monkeypatch)
+    parser = incremental.parser
+    configured = gc_analyzer.create_parser(gc_analyzer.G1_GC, gc_analyzer.JDK8_FORMAT)
+    configured.set_event_filter(events)
+
+    assert stream.closed
+    # backpressure first: no line dropped before the stream is overloaded
+    assert transitions[0][:2] == (True, 0)
+    assert stream.dropped_lines > 0
+    assert stream.line_count + stream.dropped_lines == len(lines)
+    for overloaded, dropped_lines, event_keywords in transitions:
+        if overloaded:
+            # pause records only, of the configured kinds
+            assert not set(event_keywords) & set(parser.EVENT_COMPLEMENT_KEYWORDS)
+            if events is not None:
+                assert set(event_keywords) <= set(configured.event_keywords)
+        else:
+            # the configured filter is restored once the queue is half empty
+            assert event_keywords == configured.event_keywords
+    assert [overloaded for overloaded, dropped_lines, event_keywords in transitions[:2]] == [True, False]
+    assert not stream.overloaded
+    assert parser.event_keywords == configured.event_keywords
+    # the pauses parsed are those of the kinds configured
+    assert 0 < stream.event_count < 2 * len(list(gc_analyzer.iter_events(G1_GCLOG, events=events)))
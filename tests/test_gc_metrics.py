@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import gc_analyzer
+import gc_metrics
+from conftest import data_path
+
+GCLOG = data_path('parallel_jdk8.log')
+TIMEOUT_S = 10
+
+
+@pytest.fixture
+def server():
+    metrics = gc_metrics.GCMetrics()
+    server = gc_metrics.create_server(metrics, port=0)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        yield server, metrics, 'http://127.0.0.1:{}/metrics'.format(server.server_address[1])
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def scrape(url):
+    # (content type, text, samples as {'name{labels}': value})
+    with urllib.request.urlopen(url) as response:
+        content_type = response.headers['Content-Type']
+        text = response.read().decode('utf-8')
+    samples = {}
+    for line in text.splitlines():
+        if not line.startswith('#'):
+            sample, value = line.rsplit(' ', 1)
+            samples[sample] = float(value)
+    return content_type, text, samples
+
+
+def wait_samples(url, sample, value):
+    # the follower updates the metrics in its own thread
+    deadline = time.monotonic() + TIMEOUT_S
+    while True:
+        samples = scrape(url)[2]
+        if sample in samples and samples[sample] == pytest.approx(value):
+            return samples
+        assert time.monotonic() < deadline, '{} never reached {}, last scrape: {}'.format(sample, value, samples)
+        time.sleep(0.05)
+
+
+def parse_file(path):
+    with open(path) as gclog_file:
+        return gc_analyzer.parse(gclog_file)
+
+
+def test_scrape_openmetrics(server):
+    server, metrics, url = server
+    events = list(gc_analyzer.iter_events(GCLOG))
+    for event in events:
+        metrics.add_event(event)
+    metrics.update_parser(parse_file(GCLOG))
+
+    content_type, text, samples = scrape(url)
+    assert content_type == gc_metrics.OPENMETRICS_CONTENT_TYPE
+    assert text.endswith('\n# EOF\n')
+    assert text.count('# EOF') == 1
+    assert '# TYPE gclog_pause_seconds histogram' in text
+    assert samples['gclog_parser_info{gc="Parallel",format="JDK8"}'] == 1
+    assert samples['gclog_pause_seconds_count{kind="minorgc"}'] == len(events)
+    assert samples['gclog_pause_seconds_bucket{kind="minorgc",le="+Inf"}'] == len(events)
+    buckets = [samples['gclog_pause_seconds_bucket{{kind="minorgc",le="{}"}}'.format(bound)]
+               for bound in gc_metrics.PAUSE_BUCKETS]
+    assert buckets == sorted(buckets)
+    assert samples['gclog_stopped_seconds_total'] == pytest.approx(sum(event.pause_ms for event in events) / 1000.0)
+    assert samples['gclog_heap_after_gc_bytes'] == events[-1].heap_after_mb * 1024 * 1024
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(url.replace('/metrics', '/other'))
+    assert error.value.code == 404
+
+
+def test_follow_rotation(server, tmp_path):
+    server, metrics, url = server
+    with open(GCLOG) as gclog_file:
+        lines = gclog_file.readlines()
+    first_path = str(tmp_path / 'first.log')
+    second_path = str(tmp_path / 'second.log')
+    with open(first_path, 'w') as first_file:
+        first_file.writelines(lines[:22])
+    with open(second_path, 'w') as second_file:
+        second_file.writelines(lines[:2] + lines[22:])
+    first_count = sum(1 for event in gc_analyzer.iter_events(first_path))
+    second_count = sum(1 for event in gc_analyzer.iter_events(second_path))
+    allocated_mb = parse_file(first_path).total_allocated + parse_file(second_path).total_allocated
+
+    gclog_filename = str(tmp_path / 'gc.log')
+    stop = threading.Event()
+    follower = threading.Thread(target=gc_metrics.follow, args=(gclog_filename, metrics, None, stop))
+    follower.daemon = True
+    follower.start()
+    try:
+        # written in 2 steps, the first one ending in the middle of a line
+        with open(gclog_filename, 'w') as gclog_file:
+            gclog_file.write(''.join(lines[:12]) + lines[12][:40])
+            gclog_file.flush()
+            time.sleep(gc_metrics.POLL_INTERVAL_S * 2)
+            gclog_file.write(lines[12][40:] + ''.join(lines[13:22]))
+        wait_samples(url, 'gclog_pause_seconds_count{kind="minorgc"}', first_count)
+        # rotated: renamed, the JVM writing a new file
+        os.rename(gclog_filename, gclog_filename + '.1')
+        with open(gclog_filename, 'w') as gclog_file:
+            gclog_file.writelines(lines[:2] + lines[22:])
+        wait_samples(url, 'gclog_pause_seconds_count{kind="minorgc"}', first_count + second_count)
+        # allocation keeps growing across logs
+        wait_samples(url, 'gclog_allocated_bytes_total', allocated_mb * 1024 * 1024)
+    finally:
+        stop.set()
+        follower.join()
+    assert scrape(url)[1].endswith('\n# EOF\n')
@@ -0,0 +1,125 @@
+import gzip
+import shutil
+
+import pytest
+
+import gc_nettrace
+from conftest import data_path
+
+# synthetic traces of the same 30 GCs written by 3 threads, the events of each block grouped per thread (not in time
+# order), with StackBlocks, sequence points and events of another provider. One uses compressed event headers, the
+# other uncompressed ones.
+NETTRACES = ['gc_compressed_headers.nettrace', 'gc_uncompressed_headers.nettrace']
+# number, generation, pause_ms, pause2_ms (final mark of background GCs), heap size after (MB)
+EXPECTED_GCS = [
+    (1, 2, 1.685, None, 141),
+    (2, 1, 6.517, None, 94),
+    (3, 1, 3.185, None, 68),
+    (4, 0, 0.289, None, 111),
+    (5, 0, 5.875, None, 106),
+    (6, 0, 0.424, None, 112),
+    (7, 0, 4.55, None, 154),
+    (8, 0, 7.843, None, 129),
+    (9, 1, 5.488, None, 106),
+    (10, 0, 8.858, None, 101),
+    (11, 1, 9.768, None, 56),
+    (12, 2, 0.36, 0.4, 118),
+    (13, 0, 0.222, None, 136),
+    (14, 0, 3.139, None, 99),
+    (15, 0, 4.672, None, 108),
+    (16, 2, 0.36, 0.4, 118),
+    (17, 0, 0.222, None, 136),
+    (18, 0, 9.899, None, 126),
+    (19, 0, 6.425, None, 110),
+    (20, 1, 4.873, None, 86),
+    (21, 2, 8.022, None, 70),
+    (22, 2, 0.36, 0.4, 118),
+    (23, 0, 0.222, None, 136),
+    (24, 2, 8.939, None, 42),
+    (25, 0, 1.575, None, 94),
+    (26, 0, 7.051, None, 114),
+    (27, 0, 4.405, None, 73),
+    (28, 1, 2.621, None, 88),
+    (29, 0, 0.43, None, 53),
+    (30, 0, 6.821, None, 122),
+]
+BACKGROUND_GCS = [12, 16, 22]
+MB = 1024 * 1024
+
+
+def read_gcs(path):
+    with open(path, 'rb') as stream:
+        return list(gc_nettrace.iter_nettrace_gcs(stream))
+
+
+def heap_after_mb(gc):
+    return (gc.gen0_bytes + gc.gen1_bytes + gc.gen2_bytes + gc.loh_bytes + gc.poh_bytes) // MB
+
+
+@pytest.mark.parametrize('name', NETTRACES)
+def test_iter_nettrace_gcs(name):
+    gcs = read_gcs(data_path(name))
+    assert len(gcs) == len(EXPECTED_GCS)
+    by_number = dict((gc.number, gc) for gc in gcs)
+    for number, generation, pause_ms, pause2_ms, heap_mb in EXPECTED_GCS:
+        gc = by_number[number]
+        assert gc.generation == generation
+        # times are rebuilt from the QPC ticks as seconds since the epoch: the last decimal may differ
+        assert gc.pause_ms == pytest.approx(pause_ms, abs=0.002)
+        if pause2_ms is None:
+            assert gc.pause2_ms is None
+        else:
+            assert gc.pause2_ms == pytest.approx(pause2_ms, abs=0.002)
+        assert heap_after_mb(gc) == heap_mb
+    # the sync point is 2026-10-19T12:00:00.500Z, the first GC 1s after it
+    assert gcs[0].start_time == pytest.approx(1792411201.5, abs=0.01)
+
+
+@pytest.mark.parametrize('name', NETTRACES)
+def test_background_gcs(name):
+    gcs = read_gcs(data_path(name))
+    numbers = [gc.number for gc in gcs]
+    for number in BACKGROUND_GCS:
+        gc = gcs[numbers.index(number)]
+        assert gc.gc_type == gc_nettrace.BACKGROUND_GC
+        # the foreground GC run during the background one completes first
+        assert numbers.index(number + 1) < numbers.index(number)
+        assert gcs[numbers.index(number + 1)].gc_type == gc_nettrace.FOREGROUND_GC
+        # the heap is measured at the end of the background GC, after its final mark pause
+        assert gc.heap_time > gc.start_time + (gc.pause_ms + gc.pause2_ms) / 1000.0
+
+
+def test_events_sorted_across_threads():
+    reader = gc_nettrace.NettraceReader(open(data_path(NETTRACES[0]), 'rb'),
+                                        {gc_nettrace.RUNTIME_PROVIDER: gc_nettrace.GC_EVENT_IDS})
+    try:
+        events = list(reader)
+    finally:
+        reader.stream.close()
+    assert set(event.thread_id for event in events) == {1, 2, 3}
+    assert set(event.provider for event in events) == {gc_nettrace.RUNTIME_PROVIDER}
+    times = [event.time for event in events]
+    assert times == sorted(times)
+
+
+def test_iter_events_gzip(tmp_path):
+    path = str(tmp_path / 'trace.nettrace.gz')
+    with open(data_path(NETTRACES[0]), 'rb') as trace_file, gzip.open(path, 'wb') as gzip_file:
+        shutil.copyfileobj(trace_file, gzip_file)
+    events = list(gc_nettrace.iter_events(path))
+    assert len(events) == len(EXPECTED_GCS)
+    assert set(event.kind for event in events) == {'gen0', 'gen1', 'gen2'}
+    background = [event for event in events if event.pause_ms == pytest.approx(0.76, abs=0.002)]
+    assert len(background) == len(BACKGROUND_GCS)
+
+
+def test_truncated_nettrace(tmp_path):
+    # trace still written: the GCs of the complete blocks are kept
+    path = str(tmp_path / 'truncated.nettrace')
+    with open(data_path(NETTRACES[0]), 'rb') as trace_file:
+        data = trace_file.read()
+    with open(path, 'wb') as truncated_file:
+        truncated_file.write(data[:len(data) // 2])
+    gcs = read_gcs(path)
+    assert 0 < len(gcs) < len(EXPECTED_GCS)
+    assert [gc.number for gc in gcs][:5] == [1, 2, 3, 4, 5]
@@ -0,0 +1,65 @@
+import gzip
+import io
+
+import pytest
+
+import gc_analyzer
+from conftest import data_path
+
+GCLOGS = [data_path('parallel_jdk8.log'), data_path('g1_jdk8.log')]
+
+
+class JoinedSeriesReporter(object):
+    # reference: each serie joined in a single string, as written before the series were streamed
+    @staticmethod
+    def write_data_serie(reporter, data_file, var_name, data_name, tiled=True):
+        data_file.write('var {} = [{}]\n'.format(var_name, ''.join(reporter.data.get(data_name, []))))
+
+
+def parse_file(path):
+    with open(path) as gclog_file:
+        return gc_analyzer.parse(gclog_file)
+
+
+def write_data(reporter):
+    data_file = io.StringIO()
+    reporter.write(data_file)
+    data_file.write('var series = [{}]\n'.format(reporter.build_pause_series()))
+    return data_file.getvalue()
+
+
+@pytest.mark.parametrize('count', [0, 1, gc_analyzer.WRITE_CHUNK_POINTS, gc_analyzer.WRITE_CHUNK_POINTS * 2 + 3])
+def test_write_data_serie_chunks(count):
+    points = ['[{},{}],\n'.format(idx * 1000, idx % 17) for idx in range(count)]
+    reporter = gc_analyzer.JSReporter({'minorgc': points})
+    data_file = io.StringIO()
+    reporter.write_data_serie(data_file, 'data_serie_minorgc', 'minorgc')
+    expected = io.StringIO()
+    JoinedSeriesReporter.write_data_serie(reporter, expected, 'data_serie_minorgc', 'minorgc')
+    assert data_file.getvalue() == expected.getvalue()
+
+
+def test_has_data():
+    reporter = gc_analyzer.JSReporter({'minorgc': ['[0,1],\n'], 'fullgc': []})
+    assert reporter.has_data('minorgc')
+    assert not reporter.has_data('fullgc')
+    assert not reporter.has_data('mixed')
+
+
+@pytest.mark.parametrize('path', GCLOGS)
+def test_data_file_identical_to_joined_series(path, monkeypatch):
+    streamed = write_data(parse_file(path).create_reporter())
+    monkeypatch.setattr(gc_analyzer.JSReporter, 'write_data_serie', JoinedSeriesReporter.write_data_serie)
+    assert streamed == write_data(parse_file(path).create_reporter())
+
+
+@pytest.mark.parametrize('path', GCLOGS)
+def test_gzip_data_file(path, tmp_path, monkeypatch):
+    monkeypatch.setattr(gc_analyzer, 'info_output', None)
+    data_filename = str(tmp_path / 'data.js')
+    gc_analyzer.main([path, data_filename])
+    gc_analyzer.main([path, data_filename + '.gz'])
+    with open(data_filename) as data_file, gzip.open(data_filename + '.gz', 'rt') as gzip_file:
+        data = data_file.read()
+        assert gzip_file.read() == data
+    assert data == write_data(parse_file(path).create_reporter())
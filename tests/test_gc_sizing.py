@@ -0,0 +1,122 @@
+import json
+import math
+import random
+
+import pytest
+
+import gc_analyzer
+import gc_sizing
+from conftest import data_path
+
+PARALLEL_LOG = data_path('parallel_jdk8.log')
+
+
+def test_observed_pauses_by_kind():
+    sizing = gc_sizing.SizingAnalyzer()
+    # G1: young GCs, a concurrent cycle started by a young GC, then mixed GCs, all with a heap after
+    events = [('minorgc', 10.0, 100.0), ('minorgc', 20.0, 110.0), ('initialmark', 50.0, 120.0),
+              ('finalremark', 5.0, None), ('cleanup', 1.0, None), ('mixed', 80.0, 90.0), ('mixed', 60.0, 80.0),
+              ('fullgc', 500.0, 50.0)]
+    for time_ms, (kind, pause_ms, heap_after_mb) in enumerate(events):
+        sizing.add_event(kind, time_ms * 1000.0, pause_ms, heap_after_mb)
+    observed = sizing.observed_pauses()
+    assert observed['young_gcs'] == 2
+    assert observed['young_pause_ms'] == pytest.approx(15.0)
+    assert observed['cycles'] == 1
+    assert observed['cycle_pause_ms'] == pytest.approx(50.0 + 5.0 + 1.0 + 80.0 + 60.0)
+    assert observed['full_gcs'] == 1
+    assert observed['full_gc_ms_per_gb'] == pytest.approx(500.0 / 50.0 * 1024)
+    assert observed['pause_ms'] == pytest.approx(sum(pause_ms for kind, pause_ms, heap_after_mb in events))
+
+
+def steady_sizing(count=11, allocated_mb=1000.0, heap_after_mb=200.0):
+    # a young GC per minute allocating the same, nothing promoted: the live set is the heap after
+    sizing = gc_sizing.SizingAnalyzer()
+    for idx in range(count):
+        sizing.add_event('minorgc', idx * 60000.0, 10.0, heap_after_mb)
+        sizing.add_allocation(allocated_mb)
+    return sizing
+
+
+def test_simulate():
+    report = steady_sizing().simulate('Parallel', [1024, 300], [500, 100])
+    assert (report['steps'], report['live_max_mb']) == (11, 200.0)
+    assert report['allocation_rate'] == pytest.approx(11000.0 * 1000 / (11 * 60000))
+    candidates = dict(((candidate['heap_mb'], candidate['young_mb']), candidate) for candidate in report['candidates'])
+    # heaps x young gens smaller than the heap
+    assert sorted(candidates) == [(300.0, 100.0), (1024.0, 100.0), (1024.0, 500.0)]
+    candidate = candidates[(1024.0, 500.0)]
+    # 11000 MB allocated in an eden of 400 MB
+    assert (candidate['young_gcs'], candidate['full_gcs'], candidate['full_gc_risk']) == (27, 0, 'none')
+    assert candidate['young_pause_ms'] == pytest.approx(27 * 10.0)
+    assert candidate['throughput'] == pytest.approx(100.0 * (1 - 270.0 / (11 * 60000)))
+    # the live set filling the old gen
+    assert candidates[(300.0, 100.0)]['full_gc_risk'] == 'certain'
+    # the same heap within a throughput point: the lowest pause total
+    assert report['recommended'] is candidates[(1024.0, 500.0)]
+
+
+def test_simulate_default_candidates():
+    report = steady_sizing().simulate('G1')
+    heaps_mb = sorted(set(candidate['heap_mb'] for candidate in report['candidates']))
+    assert heaps_mb == sorted(set(math.ceil(200.0 * factor / gc_sizing.HEAP_ROUND_MB) * gc_sizing.HEAP_ROUND_MB
+                                  for factor in gc_sizing.HEAP_LIVE_FACTORS))
+    assert len(report['candidates']) == len(heaps_mb) * len(gc_sizing.YOUNG_FRACTIONS)
+    # nothing allocated: nothing to replay
+    assert steady_sizing(allocated_mb=0.0).simulate('G1') is None
+    assert gc_sizing.SizingAnalyzer().simulate('G1') is None
+
+
+def test_recommend():
+    def candidate(heap_mb, throughput, risk, pause_ms=0.0):
+        return {'heap_mb': heap_mb, 'throughput': throughput, 'full_gc_risk': risk, 'pause_ms': pause_ms}
+
+    # the smallest heap within a throughput point of the best, without full GC
+    candidates = [candidate(512, 99.9, 'high'), candidate(1024, 98.5, 'none'), candidate(2048, 99.2, 'none', 20.0),
+                  candidate(2048, 99.2, 'none', 10.0), candidate(4096, 99.6, 'none')]
+    assert gc_sizing.recommend(candidates) is candidates[3]
+    assert gc_sizing.recommend(candidates, throughput_loss=2.0) is candidates[1]
+    # else of low risk, none when all are at high risk
+    assert gc_sizing.recommend([candidate(512, 99.0, 'low'), candidate(256, 99.0, 'high')])['heap_mb'] == 512
+    assert gc_sizing.recommend([candidate(512, 99.0, 'certain'), candidate(256, 99.0, 'high')]) is None
+
+
+@pytest.mark.skipif(gc_sizing.numpy is None, reason='numpy not installed')
+@pytest.mark.parametrize('gc_name', ['Parallel', 'CMS', 'G1'])
+def test_numpy_replay_as_python_replay(gc_name):
+    generator = random.Random(gc_name)
+    steps = 500
+    allocated = [generator.uniform(0, 5000) for step in range(steps)]
+    # bursts of promotion, a live set growing & shrinking
+    promoted = [generator.choice([0.0, 0.0, generator.uniform(0, 50), generator.uniform(0, 400)]) for step in range(steps)]
+    live = [300 + 200 * math.sin(step / 50.0) + generator.uniform(0, 50) for step in range(steps)]
+    heaps_mb = []
+    youngs_mb = []
+    for heap_mb in [512.0, 1024.0, 2048.0, 4096.0, 8192.0]:
+        for fraction in gc_sizing.YOUNG_FRACTIONS:
+            heaps_mb.append(heap_mb)
+            youngs_mb.append(float(round(heap_mb * fraction)))
+    numpy_result = gc_sizing.numpy_replay(allocated, promoted, live, heaps_mb, youngs_mb, gc_name)
+    python_result = gc_sizing.python_replay(allocated, promoted, live, heaps_mb, youngs_mb, gc_name)
+    for numpy_values, python_values in zip(numpy_result, python_result):
+        assert numpy_values == pytest.approx(python_values)
+    young_gcs, cycles, full_gcs, full_live_mb = python_result
+    if gc_name == 'Parallel':
+        # the old gen collected more often in the smaller heaps
+        assert full_gcs[0] > full_gcs[-1] > 0
+    else:
+        # concurrent cycles preventing the full GCs of the larger heaps
+        assert sum(cycles) > 0
+        assert 0 < sum(1 for count in full_gcs if count > 0) < len(heaps_mb)
+
+
+def test_sizing_only_with_the_option(monkeypatch, capsys):
+    monkeypatch.setattr(gc_analyzer, 'info_output', None)
+    with open(PARALLEL_LOG) as gclog_file:
+        assert gc_analyzer.parse(gclog_file).sizing is None
+    with pytest.raises(SystemExit) as exit_info:
+        gc_analyzer.main([PARALLEL_LOG, '--sizing', '-f', 'json'])
+    assert exit_info.value.code == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report['gc'] == 'Parallel'
+    assert report['candidates']
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+import gc_stats_engine
+
+PERCENTILES = [0, 10, 50, 90, 99, 99.9, 100]
+
+
+def random_engine(seed=1, count=5000):
+    generator = random.Random(seed)
+    engine = gc_stats_engine.StatsEngine()
+    time_ms = 1542178802582
+    for idx in range(count):
+        kind = generator.choice(['minorgc', 'minorgc', 'minorgc', 'mixed', 'fullgc'])
+        time_ms += generator.randint(100, 20000)
+        engine.add_event(kind, time_ms, generator.lognormvariate(3, 1) if kind != 'fullgc' else generator.uniform(200, 900))
+    return engine
+
+
+def compute(engine, monkeypatch, with_numpy):
+    if not with_numpy:
+        monkeypatch.setattr(gc_stats_engine, 'numpy', None)
+    try:
+        return engine.compute(PERCENTILES, total_allocated_mb=123456.0, total_promoted_mb=2345.0)
+    finally:
+        monkeypatch.undo()
+
+
+def assert_same_kind_stats(numpy_stats, python_stats):
+    assert numpy_stats['count'] == python_stats['count']
+    for key in ('total', 'mean', 'stddev', 'min', 'max'):
+        assert numpy_stats[key] == pytest.approx(python_stats[key], rel=1e-9)
+    # nearest rank percentiles: the same values of the series
+    assert numpy_stats['percentiles'] == python_stats['percentiles']
+
+
+def test_python_stats():
+    values = [5.0, 1.0, 4.0, 2.0, 3.0]
+    stats = gc_stats_engine.python_stats(values, [0, 50, 90, 100])
+    assert stats['count'] == 5
+    assert stats['total'] == 15.0
+    assert stats['mean'] == 3.0
+    assert stats['stddev'] == pytest.approx(2 ** 0.5)
+    assert (stats['min'], stats['max']) == (1.0, 5.0)
+    assert stats['percentiles'] == [(0, 1.0), (50, 3.0), (90, 5.0), (100, 5.0)]
+
+
+def test_numpy_matches_python(monkeypatch):
+    pytest.importorskip('numpy')
+    engine = random_engine()
+    numpy_result = compute(engine, monkeypatch, True)
+    python_result = compute(engine, monkeypatch, False)
+    assert numpy_result['span_ms'] == python_result['span_ms']
+    assert numpy_result['kinds'].keys() == python_result['kinds'].keys()
+    for kind in numpy_result['kinds']:
+        assert_same_kind_stats(numpy_result['kinds'][kind], python_result['kinds'][kind])
+    assert_same_kind_stats(numpy_result[gc_stats_engine.ALL_PAUSES], python_result[gc_stats_engine.ALL_PAUSES])
+    for key in ('throughput', 'allocation_rate', 'promotion_rate'):
+        assert numpy_result[key] == pytest.approx(python_result[key], rel=1e-12)
+
+
+def test_rates(monkeypatch):
+    engine = gc_stats_engine.StatsEngine()
+    engine.add_event('minorgc', 0, 100.0)
+    engine.add_event('fullgc', 9000, 1000.0)
+    result = compute(engine, monkeypatch, False)
+    # 10s from the first pause start to the last pause end, 1.1s paused
+    assert result['span_ms'] == 10000
+    assert result['throughput'] == pytest.approx(89.0)
+    assert result['allocation_rate'] == pytest.approx(12345.6)
+    assert result['promotion_rate'] == pytest.approx(234.5)
+    empty = compute(gc_stats_engine.StatsEngine(), monkeypatch, False)
+    assert empty[gc_stats_engine.ALL_PAUSES] is None
+    assert (empty['throughput'], empty['allocation_rate'], empty['promotion_rate']) == (None, None, None)
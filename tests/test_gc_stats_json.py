@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+import gc_analyzer
+from conftest import data_path
+
+G1_LOG = data_path('g1_jdk8.log')
+PARALLEL_LOG = data_path('parallel_jdk8.log')
+KIND_STATS_KEYS = {'count', 'total', 'mean', 'stddev', 'min', 'max', 'percentiles'}
+
+
+@pytest.fixture(autouse=True)
+def reset_info_output(monkeypatch):
+    # main() sets the module wide info output
+    monkeypatch.setattr(gc_analyzer, 'info_output', None)
+
+
+def run_main(capsys, argv):
+    with pytest.raises(SystemExit) as exit_info:
+        gc_analyzer.main(argv)
+    captured = capsys.readouterr()
+    return exit_info.value.code, captured.out, captured.err
+
+
+def assert_kind_stats(kind_stats, percentiles):
+    assert set(kind_stats) == KIND_STATS_KEYS
+    assert set(kind_stats['percentiles']) == set('p{}'.format(percentile) for percentile in percentiles)
+    assert kind_stats['min'] <= kind_stats['percentiles']['p50'] <= kind_stats['max']
+
+
+def test_stats_json_schema(capsys):
+    code, out, err = run_main(capsys, [G1_LOG, '--stats', '-f', 'json', '-p', '50,99.9'])
+    assert code == 0
+    # a single JSON line in stdout, the detection messages in stderr
+    assert out.count('\n') == 1
+    assert 'Detected G1 GC' in err
+    stats = json.loads(out)
+    assert set(stats) == {'gclog_file', 'gc', 'log_format', 'span', 'event_counts', 'pauses', 'kinds',
+                          'total_allocated_mb', 'total_promoted_mb', 'allocation_rate_mb_s', 'promotion_rate_mb_s',
+                          'throughput_percent', 'phases', 'concurrent', 'tenuring', 'cpu', 'findings', 'parse'}
+    assert (stats['gclog_file'], stats['gc'], stats['log_format']) == (G1_LOG, 'G1', 'JDK8')
+    assert stats['span']['start'] == '2018-11-14T07:00:02.582'
+    assert stats['span']['end'] == '2018-11-14T07:01:20.338'
+    assert stats['event_counts'] == {'minorgc': 19, 'initialmark': 1, 'finalremark': 1, 'cleanup': 1, 'mixed': 2}
+    assert_kind_stats(stats['pauses'], [50, 99.9])
+    assert stats['pauses']['count'] == 24
+    for kind_stats in stats['kinds'].values():
+        assert_kind_stats(kind_stats, [50, 99.9])
+    for phase in stats['phases'].values():
+        assert set(phase) == {'pause', 'slowest_worker'}
+        assert_kind_stats(phase['pause'], [50, 99.9])
+    assert 0 < stats['throughput_percent'] < 100
+    assert set(stats['parse']) == {'time_s', 'records', 'chars', 'records_per_s', 'chars_per_s'}
+    # the 24 GCs and the head lines of the log
+    assert stats['parse']['records'] == 25
+    assert isinstance(stats['findings'], list)
+    # same object as the library entry point, parse time aside
+    analyzed = gc_analyzer.analyze(G1_LOG, percentiles=[50, 99.9])
+    for parse_stats in (stats, analyzed):
+        parse_stats.pop('parse')
+    assert analyzed == stats
+
+
+def test_stats_json_unrecognized(capsys, tmp_path):
+    path = str(tmp_path / 'app.log')
+    with open(path, 'w') as log_file:
+        log_file.write('not a gc log\n')
+    code, out, err = run_main(capsys, [path, '--stats', '-f', 'json'])
+    assert code == 1
+    assert json.loads(out) == {'gclog_file': path, 'error': 'Cannot recognize file format'}
+    assert 'ERROR: Cannot recognize file format!' in err
+
+
+def test_stats_text_info_in_stdout(capsys):
+    code, out, err = run_main(capsys, [PARALLEL_LOG, '--stats'])
+    assert code == 0
+    assert 'Detected Parallel GC' in out
+    assert '# pauses: 40' in out
+    assert err == ''
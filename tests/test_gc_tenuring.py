@@ -0,0 +1,121 @@
+import re
+
+import pytest
+
+import gc_analyzer
+from conftest import data_path
+from gc_tenuring import TenuringAnalyzer, MAX_AGE, LONG_LIVED_SURVIVAL
+
+# -XX:+PrintTenuringDistribution of ParNew (threshold 6) & gc+age=trace of G1 (threshold 15, survivors overflowing)
+CMS_AGE_LOG = data_path('cms_age.log')
+G1_AGE_LOG = data_path('g1_age_jdk9.log')
+
+DESIRED_RE = re.compile(r'Desired survivor size (\d+) bytes, new threshold (\d+) \(max(?: threshold)? (\d+)\)')
+AGE_RE = re.compile(r'- age +(\d+): +(\d+) bytes')
+
+
+def age_tables(path):
+    # brute force: [(threshold, max threshold, desired survivor bytes, {age: bytes})] in log order
+    tables = []
+    with open(path) as gclog_file:
+        for line in gclog_file:
+            match = DESIRED_RE.search(line)
+            if match:
+                desired, threshold, max_threshold = [int(value) for value in match.groups()]
+                tables.append((threshold, max_threshold, desired, {}))
+                continue
+            match = AGE_RE.search(line)
+            if match:
+                tables[-1][3][int(match.group(1))] = int(match.group(2))
+    return tables
+
+
+def survival_rates(tables):
+    # bytes of age a at a GC found at age a+1 at the next GC, for the ages below the previous threshold
+    entered = {}
+    survived = {}
+    for (threshold, max_threshold, desired, previous), (next_threshold, _, _, current) in zip(tables, tables[1:]):
+        for age in range(1, min(threshold, MAX_AGE)):
+            if previous.get(age, 0) > 0:
+                entered[age] = entered.get(age, 0) + previous[age]
+                survived[age] = survived.get(age, 0) + min(current.get(age + 1, 0), previous[age])
+    return [(age, survived[age] / entered[age]) for age in sorted(entered)]
+
+
+def parse_tenuring(path):
+    with open(path) as gclog_file:
+        parser = gc_analyzer.parse(gclog_file)
+    return parser, parser.compute_stats()['tenuring']
+
+
+@pytest.mark.parametrize('path, tables, threshold, overflows, recommended', [
+    (CMS_AGE_LOG, 30, 6, 0, 3),
+    (G1_AGE_LOG, 20, 15, 20, 15),
+])
+def test_age_table_log(path, tables, threshold, overflows, recommended):
+    expected_tables = age_tables(path)
+    assert len(expected_tables) == tables
+    parser, tenuring = parse_tenuring(path)
+    assert tenuring['tables'] == tables
+    assert (tenuring['threshold_min'], tenuring['threshold_avg'], tenuring['max_threshold']) == (threshold, threshold, threshold)
+    assert tenuring['survivor_overflows'] == overflows == \
+        sum(1 for table in expected_tables if sum(table[3].values()) > table[2])
+    rates = survival_rates(expected_tables)
+    assert [age for age, rate in tenuring['survival_rates']] == [age for age, rate in rates]
+    assert [rate for age, rate in tenuring['survival_rates']] == pytest.approx([rate for age, rate in rates])
+    assert tenuring['recommended_threshold'] == recommended
+    # a survival rate point per GC and age, from the second table on
+    assert len(parser.data['survival_age_1']) == tables - 1
+
+
+def test_cms_recommended_threshold():
+    # the first age surviving at 80% or more: older objects are copied between survivors for nothing
+    tenuring = parse_tenuring(CMS_AGE_LOG)[1]
+    rates = dict(tenuring['survival_rates'])
+    assert rates[1] == pytest.approx(0.3, abs=0.01)
+    assert rates[2] < LONG_LIVED_SURVIVAL <= rates[3]
+
+
+def test_survival_rates():
+    analyzer = TenuringAnalyzer()
+    assert analyzer.add_table([(1, 1000)], 15, 15, 10000) == []
+    # half of age 1 survives to age 2, then all of it to age 3
+    assert analyzer.add_table([(1, 1000), (2, 500)], 15, 15, 10000) == [(1, 0.5)]
+    assert analyzer.add_table([(1, 1000), (2, 500), (3, 500)], 15, 15, 10000) == [(1, 0.5), (2, 1.0)]
+    assert analyzer.survival_rates() == [(1, 0.5), (2, 1.0)]
+    assert analyzer.recommended_threshold() == 2
+    # more bytes at age a+1 than at age a at the previous GC: a survival of 100%, not more
+    analyzer = TenuringAnalyzer()
+    analyzer.add_table([(1, 100)], 15, 15, 10000)
+    assert analyzer.add_table([(2, 300)], 15, 15, 10000) == [(1, 1.0)]
+
+
+def test_threshold_bounds_the_rates():
+    # objects of the tenuring threshold age are promoted: not found in the next table
+    analyzer = TenuringAnalyzer()
+    analyzer.add_table([(1, 1000), (2, 800), (3, 600)], 3, 15, 10000)
+    assert [age for age, rate in analyzer.add_table([(1, 1000), (2, 500), (3, 400), (4, 300)], 3, 15, 10000)] == [1, 2]
+    summary = analyzer.summary()
+    assert (summary['threshold_min'], summary['threshold_avg'], summary['max_threshold']) == (3, 3, 15)
+
+
+def test_short_lived_recommends_max_threshold():
+    analyzer = TenuringAnalyzer()
+    for idx in range(5):
+        analyzer.add_table([(1, 1000), (2, 100), (3, 10)], 6, 6, 500)
+    assert analyzer.survival_rates() == [(1, 0.1), (2, 0.1), (3, 0.0)]
+    assert analyzer.recommended_threshold() == 6
+    # every table above the desired survivor size
+    assert analyzer.summary()['survivor_overflows'] == 5
+
+
+def test_reset():
+    # survivors emptied by a Full GC: the next table is not compared to the one before it
+    analyzer = TenuringAnalyzer()
+    analyzer.add_table([(1, 1000)], 15, 15, 10000)
+    analyzer.reset()
+    assert analyzer.add_table([(1, 1000), (2, 10)], 15, 15, 10000) == []
+    assert analyzer.survival_rates() == []
+    assert analyzer.recommended_threshold() is None
+    assert analyzer.summary()['tables'] == 2
+    assert TenuringAnalyzer().summary() is None
@@ -0,0 +1,168 @@
+import calendar
+import json
+import os
+import re
+
+import pytest
+
+import gc_analyzer
+import gc_tiles
+from gc_tiles import TileWriter, TILE_POINTS, TILE_FACTOR
+
+TILE_RE = re.compile(r"^gcTile\('(\w+)', (\d+), (\d+), \[(.*)\]\)\n$", re.DOTALL)
+PARALLEL_LINE = ('{time}+0100: {uptime}.000: [GC (Allocation Failure) [PSYoungGen: 4194304K->{young}K(4893696K)] '
+                 '{heap_before}K->{heap_after}K(16078848K), 0.0500000 secs] [Times: user=0.30 sys=0.01, real=0.05 secs] \n')
+
+
+def points(count, start=0):
+    # ms offsets from a Date.UTC, pseudo random values
+    return ['[Date.UTC(2018,10,14,7,0,0,0)+{},{}],\n'.format(start + idx * 10, idx * 7919 % 1000 / 10.0)
+            for idx in range(count)]
+
+
+def read_tiles(tiles_dir, var_name):
+    # {level: [points of the tiles in order]}
+    levels = {}
+    names = [name for name in os.listdir(tiles_dir) if name.startswith(var_name + '_')]
+    for name in sorted(names, key=lambda name: [int(part) for part in name[len(var_name) + 1:-3].split('_')]):
+        with open(os.path.join(tiles_dir, name)) as tile_file:
+            match = TILE_RE.match(tile_file.read())
+        tile_var_name, level, tile = match.group(1), int(match.group(2)), int(match.group(3))
+        assert (tile_var_name, tile) == (var_name, len(levels.get(level, [])))
+        tile_points = [point + '\n' for point in match.group(4).split('\n') if point != '']
+        assert len(tile_points) <= TILE_POINTS
+        levels.setdefault(level, []).append(tile_points)
+    return levels
+
+
+def level_one(serie):
+    # brute force: the first min & max points of each bucket, in time order
+    values = [gc_tiles.point_value(point) for point in serie]
+    expected = []
+    for idx in range(0, len(serie), 2 * TILE_FACTOR):
+        bucket = values[idx:idx + 2 * TILE_FACTOR]
+        low = idx + bucket.index(min(bucket))
+        high = idx + bucket.index(max(bucket))
+        expected.extend(serie[index] for index in sorted({low, high}))
+    return expected
+
+
+def test_point_time_ms():
+    assert gc_tiles.point_time_ms('[Date.UTC(2018,10,14,7,0,10,209)+26,1.5],\n') == \
+        calendar.timegm((2018, 11, 14, 7, 0, 10)) * 1000 + 209 + 26
+    # months are 0 based, overflowing to the next year
+    assert gc_tiles.point_time_ms('[Date.UTC(2018,12,1,0,0,0,0)+5,1],\n') == calendar.timegm((2019, 1, 1, 0, 0, 0)) * 1000 + 5
+    assert gc_tiles.point_time_ms('[Date.UTC(2018,25,1,0,0,0,0)+0,1],\n') == calendar.timegm((2020, 2, 1, 0, 0, 0)) * 1000
+    # ms points
+    assert gc_tiles.point_time_ms('[1500,3],\n') == 1500
+
+
+def test_point_value():
+    assert gc_tiles.point_value('[Date.UTC(2018,10,14,7,0,10,209)+26,1.5],\n') == 1.5
+    assert gc_tiles.point_value('[1500,3],\n') == 3.0
+
+
+def test_small_serie_not_tiled(tmp_path):
+    writer = TileWriter(str(tmp_path / 'data.js.gz'))
+    assert writer.dir_name == 'data_tiles'
+    assert not writer.write_serie('data_serie_heap', points(TILE_POINTS))
+    assert not os.path.exists(writer.tiles_dir)
+    assert writer.series == {}
+
+
+@pytest.mark.parametrize('count, tiles', [
+    (TILE_POINTS + 1, [2, 1]),
+    (TILE_POINTS * TILE_FACTOR + 1, [9, 2, 1]),
+    (TILE_POINTS * TILE_FACTOR ** 2 + 1, [65, 9, 2, 1]),
+])
+def test_tiles_per_level(tmp_path, count, tiles):
+    serie = points(count)
+    writer = TileWriter(str(tmp_path / 'data.js'))
+    assert writer.write_serie('data_serie_heap', serie)
+    levels = read_tiles(writer.tiles_dir, 'data_serie_heap')
+    assert [len(levels[level]) for level in sorted(levels)] == tiles
+    assert writer.series['data_serie_heap'] == {
+        'count': count,
+        'levels': len(tiles) - 1,
+        'starts': [gc_tiles.point_time_ms(serie[idx]) for idx in range(0, count, TILE_POINTS)]}
+    # level 0 as is, level 1 the min & max of each bucket
+    assert sum(levels[0], []) == serie
+    assert sum(levels[1], []) == level_one(serie)
+    # the peaks at every level, a single tile at the top one
+    values = [gc_tiles.point_value(point) for point in serie]
+    for level in levels:
+        level_points = sum(levels[level], [])
+        assert serie[values.index(max(values))] in level_points
+        assert serie[values.index(min(values))] in level_points
+        assert level_points == sorted(level_points, key=gc_tiles.point_time_ms)
+
+
+def test_stacked_series_share_their_points(tmp_path):
+    # the same times with values peaking at different points
+    young = points(TILE_POINTS * TILE_FACTOR + 1)
+    old = ['{},{}],\n'.format(point.rsplit(',', 1)[0], idx * 104729 % 997 / 10.0) for idx, point in enumerate(young)]
+    writer = TileWriter(str(tmp_path / 'data.js'))
+    writer.stack_series(['data_serie_young', 'data_serie_old'], [young, old])
+    assert writer.write_serie('data_serie_young', young)
+    assert writer.write_serie('data_serie_old', old)
+    young_levels = read_tiles(writer.tiles_dir, 'data_serie_young')
+    old_levels = read_tiles(writer.tiles_dir, 'data_serie_old')
+    assert writer.series['data_serie_young'] == writer.series['data_serie_old']
+    for level in young_levels:
+        assert [[gc_tiles.point_time_ms(point) for point in tile] for tile in young_levels[level]] == \
+            [[gc_tiles.point_time_ms(point) for point in tile] for tile in old_levels[level]]
+    # the min & max of the stacked total
+    total = [gc_tiles.point_value(young_point) + gc_tiles.point_value(old_point) for young_point, old_point in zip(young, old)]
+    assert young[total.index(max(total))] in sum(young_levels[1], [])
+    # decimated one by one, the series don't share their points
+    writer = TileWriter(str(tmp_path / 'unstacked.js'))
+    writer.write_serie('data_serie_young', young)
+    writer.write_serie('data_serie_old', old)
+    assert [gc_tiles.point_time_ms(point) for point in sum(read_tiles(writer.tiles_dir, 'data_serie_young')[1], [])] != \
+        [gc_tiles.point_time_ms(point) for point in sum(read_tiles(writer.tiles_dir, 'data_serie_old')[1], [])]
+
+
+def test_series_of_different_lengths_not_stacked(tmp_path):
+    writer = TileWriter(str(tmp_path / 'data.js'))
+    writer.stack_series(['data_serie_young', 'data_serie_old'], [points(TILE_POINTS + 1), points(TILE_POINTS + 2)])
+    assert writer.stacked_levels == {}
+
+
+def write_parallel_log(path, count):
+    # Parallel young GCs every second, young & old occupancies varying independently
+    with open(path, 'w') as gclog_file:
+        gclog_file.write('Java HotSpot(TM) 64-Bit Server VM (25.181-b13)\nCommandLine flags: -XX:+UseParallelGC\n')
+        for idx in range(count):
+            young = 65536 + idx * 7919 % 1000 * 100
+            old = 65536 + idx * 104729 % 997 * 100
+            gclog_file.write(PARALLEL_LINE.format(
+                time='2018-11-14T{:02d}:{:02d}:{:02d}.000'.format(7 + idx // 3600, idx // 60 % 60, idx % 60),
+                uptime=idx, young=young, heap_before=4194304 + old, heap_after=young + old))
+
+
+def test_main_tiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(gc_analyzer, 'info_output', None)
+    gclog_filename = str(tmp_path / 'gc.log')
+    data_filename = str(tmp_path / 'data.js')
+    # 2 points per GC
+    write_parallel_log(gclog_filename, TILE_POINTS // 2 + 1)
+    gc_analyzer.main([gclog_filename, data_filename, '--tiles'])
+    with open(gclog_filename) as gclog_file:
+        parser = gc_analyzer.parse(gclog_file)
+    with open(data_filename) as data_file:
+        data = data_file.read()
+    tiles = json.loads(re.search(r'^var tiles = (.*)$', data, re.MULTILINE).group(1))
+    assert (tiles['dir'], tiles['factor']) == ('data_tiles', TILE_FACTOR)
+    assert sorted(tiles['series']) == ['data_serie_heap', 'data_serie_old', 'data_serie_young']
+    for var_name, data_name in [('data_serie_heap', 'heap_occupancy'), ('data_serie_young', 'young_occupancy')]:
+        serie = parser.data[data_name]
+        assert tiles['series'][var_name] == {
+            'count': TILE_POINTS + 2, 'levels': 1,
+            'starts': [gc_tiles.point_time_ms(serie[0]), gc_tiles.point_time_ms(serie[TILE_POINTS])]}
+        assert 'var {} = []\n'.format(var_name) in data
+    # the series of fewer points in the data file
+    assert 'var data_serie_minorgc = [[' in data
+    # the stacked generations decimated at the same times
+    tiles_dir = str(tmp_path / 'data_tiles')
+    assert [gc_tiles.point_time_ms(point) for point in read_tiles(tiles_dir, 'data_serie_young')[1][0]] == \
+        [gc_tiles.point_time_ms(point) for point in read_tiles(tiles_dir, 'data_serie_old')[1][0]]
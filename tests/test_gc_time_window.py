@@ -0,0 +1,153 @@
+import pytest
+
+import gc_analyzer
+from conftest import data_path
+
+# G1 JDK8 log (+0100) of multi-line records, the second one with a PrintReferenceGC line starting with a timestamp
+GCLOG = data_path('g1_jdk8.log')
+TIMESTAMP_LINE_START_RE = gc_analyzer.compile_regex(gc_analyzer.TIMESTAMP_LINE_START_PATTERN)
+
+
+def wall_clock_ms(timestamp):
+    return gc_analyzer.parse_timestamp(timestamp)[0]
+
+
+def window_events(events, from_time=None, to_time=None):
+    # brute force: events whose wall clock time (log zone) is in [from_time, end of the to_time prefix)
+    start_ms = wall_clock_ms(from_time) if from_time is not None else None
+    end_ms = gc_analyzer.parse_timestamp(to_time)[1] if to_time is not None else None
+    return [event for event in events
+            if (start_ms is None or event.time_ms >= start_ms) and (end_ms is None or event.time_ms < end_ms)]
+
+
+def record_starts(path):
+    # (offset, line) of the record start lines
+    starts = []
+    offset = 0
+    with open(path, 'rb') as gclog_file:
+        for line in gclog_file:
+            text = line.decode('ascii')
+            if TIMESTAMP_LINE_START_RE.match(text) and '[SoftReference,' not in text:
+                starts.append((offset, text))
+            offset += len(line)
+    return starts
+
+
+def test_parse_timestamp():
+    assert gc_analyzer.parse_timestamp('2018-11-14T07:00:10.509') == \
+        (wall_clock_ms('2018-11-14T07:00:10.509'), wall_clock_ms('2018-11-14T07:00:10.509') + 1, None)
+    start, end, offset = gc_analyzer.parse_timestamp('2018-11-14T07:00')
+    assert end - start == 60000
+    assert offset is None
+    start, end, offset = gc_analyzer.parse_timestamp('2018-11-14T07:00:10.5+0100')
+    assert end - start == 100
+    assert offset == 3600000
+    assert gc_analyzer.parse_timestamp('2018-11-14Z')[2] == 0
+    assert gc_analyzer.parse_timestamp('2018-11-14T07-05:30')[2] == -(5 * 60 + 30) * 60000
+    with pytest.raises(ValueError):
+        gc_analyzer.parse_timestamp('14/11/2018')
+
+
+def test_time_window_zones():
+    # bounds without zone are in the zone of the log
+    window = gc_analyzer.TimeWindow('2018-11-14T07:00:20', '2018-11-14T07:00:30')
+    assert window.is_before(window.record_ms('2018-11-14T07:00:19.999+0100'))
+    assert not window.is_before(window.record_ms('2018-11-14T07:00:20.000+0100'))
+    # --to includes its whole prefix
+    assert not window.is_past(window.record_ms('2018-11-14T07:00:30.999+0100'))
+    assert window.is_past(window.record_ms('2018-11-14T07:00:31.000+0100'))
+    # bounds with a zone are instants, whatever the zone of the log
+    window = gc_analyzer.TimeWindow('2018-11-14T06:00:20Z')
+    assert window.is_before(window.record_ms('2018-11-14T07:00:19.999+0100'))
+    assert not window.is_before(window.record_ms('2018-11-14T07:00:20.000+0100'))
+    assert not window.is_before(window.record_ms('2018-11-14T08:00:20.000+0200'))
+    # records without zone (uptime decorated logs) are UTC
+    window = gc_analyzer.TimeWindow('1970-01-01T00:00:10+0000')
+    assert window.is_before(window.record_ms('1970-01-01T00:00:09.999'))
+
+
+@pytest.mark.parametrize('from_time, to_time, zoned_from_time, zoned_to_time', [
+    ('2018-11-14T07:00:20', None, '2018-11-14T06:00:20Z', None),
+    (None, '2018-11-14T07:00:48', None, '2018-11-14T08:00:48+0200'),
+    ('2018-11-14T07:00:31.930', '2018-11-14T07:01:01.959', '2018-11-14T06:00:31.930+0000',
+     '2018-11-14T07:01:01.959+0100'),
+    ('2018-11-14T07:00:40', '2018-11-14T07:00:41', None, None),
+])
+def test_from_to(from_time, to_time, zoned_from_time, zoned_to_time):
+    events = list(gc_analyzer.iter_events(GCLOG))
+    expected = window_events(events, from_time, to_time)
+    assert list(gc_analyzer.iter_events(GCLOG, from_time=from_time, to_time=to_time)) == expected
+    if zoned_from_time is not None or zoned_to_time is not None:
+        assert list(gc_analyzer.iter_events(GCLOG, from_time=zoned_from_time, to_time=zoned_to_time)) == expected
+
+
+def test_to_inclusive_prefix():
+    # the remark & cleanup at 07:01:01.959 are in the 07:01:01 second
+    events = list(gc_analyzer.iter_events(GCLOG, to_time='2018-11-14T07:01:01'))
+    assert [event.kind for event in events[-3:]] == ['minorgc', 'finalremark', 'cleanup']
+
+
+def test_stops_past_to():
+    with open(GCLOG) as gclog_file:
+        lines = gclog_file.readlines()
+    remaining = iter(lines)
+    events = list(gc_analyzer.iter_file_events(remaining, to_time='2018-11-14T07:00:20'))
+    assert len(events) == 5
+    # the lines past the first record after the time window are not read
+    assert len(list(remaining)) > len(lines) // 2
+
+
+@pytest.mark.parametrize('block_size', [64, 512, 4096, 64 * 1024])
+def test_find_record_offset(block_size):
+    starts = record_starts(GCLOG)
+    events = list(gc_analyzer.iter_events(GCLOG))
+    # one from time per record, between 2 records and past the last one
+    from_times = [gc_analyzer.record_timestamp(line)[:23] for offset, line in starts]
+    from_times += ['2018-11-14T07:00:05.000', '2018-11-14T07:00:05.710', '2018-11-14T07:01:30']
+    # (from time, same from time in the zone of the log)
+    from_times = [(from_time, from_time) for from_time in from_times] + [('2018-11-14T06:00:05.000Z', '2018-11-14T07:00:05.000')]
+    # the head of the log when the from time is in the first block
+    start_offsets = [0] + [offset for offset, line in starts]
+    for from_time, log_from_time in from_times:
+        offset = gc_analyzer.find_record_offset(GCLOG, from_time, block_size)
+        # always a record start, never one of its continuation lines (nor the PrintReferenceGC line)
+        assert offset in start_offsets
+        with open(GCLOG) as gclog_file:
+            assert list(gc_analyzer.iter_file_events(gclog_file, from_time=from_time, start_offset=offset)) == \
+                window_events(events, log_from_time)
+
+
+def test_find_record_offset_skips_the_head():
+    starts = record_starts(GCLOG)
+    offset = gc_analyzer.find_record_offset(GCLOG, '2018-11-14T07:01:20', 512)
+    assert offset > starts[len(starts) // 2][0]
+    assert gc_analyzer.find_record_offset(GCLOG, '2018-11-14T07:00:00', 512) == 0
+
+
+@pytest.mark.parametrize('events_arg, min_pause', [
+    (['initialmark', 'cleanup'], None),
+    (['minorgc'], 30.0),
+    (None, 40.0),
+    (['mixed', 'finalremark'], 10.0),
+])
+def test_event_filter(events_arg, min_pause):
+    events = list(gc_analyzer.iter_events(GCLOG))
+    expected = [event for event in events
+                if (events_arg is None or event.kind in events_arg) and (min_pause is None or event.pause_ms >= min_pause)]
+    assert list(gc_analyzer.iter_events(GCLOG, events=events_arg, min_pause=min_pause)) == expected
+    with open(GCLOG) as gclog_file:
+        parser = gc_analyzer.parse(gclog_file, events=events_arg, min_pause=min_pause)
+    assert parser.compute_stats()['kinds'].keys() == set(event.kind for event in expected)
+
+
+def test_prefilter():
+    starts = record_starts(GCLOG)
+    parser = gc_analyzer.create_parser(gc_analyzer.G1_GC, gc_analyzer.JDK8_FORMAT)
+    parser.set_event_filter(['cleanup'])
+    assert parser.prefilter(starts[17][1])
+    assert not parser.prefilter(starts[0][1])
+    assert not parser.last_event_accepted
+    # no event kinds: the min pause is checked on the parsed pause
+    parser = gc_analyzer.create_parser(gc_analyzer.G1_GC, gc_analyzer.JDK8_FORMAT)
+    parser.set_event_filter(None, 10.0)
+    assert parser.prefilter(starts[0][1])
@@ -0,0 +1,44 @@
+import io
+
+import pytest
+
+import gc_analyzer
+from gc_unified_log import split_decorators
+
+# G1 log of -Xlog:gc*:file=gc.log:time,uptime (no level nor tags decorators)
+UNTAGGED_G1_LOG = '''[2018-11-14T07:00:00.000+0100][0.100s] Using G1
+[2018-11-14T07:00:01.000+0100][1.100s] GC(0) Pause Young (Normal) (G1 Evacuation Pause)
+[2018-11-14T07:00:01.003+0100][1.103s] GC(0) Eden regions: 24->0(24)
+[2018-11-14T07:00:01.003+0100][1.103s] GC(0) Pause Young (Normal) (G1 Evacuation Pause) 24M->4M(256M) 3.123ms
+[2018-11-14T07:00:01.003+0100][1.103s] GC(0) User=0.01s Sys=0.00s Real=0.00s
+[2018-11-14T07:00:02.000+0100][2.100s] GC(1) Pause Young (Normal) (G1 Evacuation Pause)
+[2018-11-14T07:00:02.002+0100][2.102s] GC(1) Pause Young (Normal) (G1 Evacuation Pause) 28M->5M(256M) 2.500ms
+'''
+
+
+def test_split_decorators():
+    log_line = split_decorators('[2018-11-14T07:00:01.003+0100][1.103s][info][gc,heap     ] GC(0) Eden regions: 24->0(24)\n')
+    assert log_line.timestamp == '2018-11-14T07:00:01.003'
+    assert log_line.zone == '+0100'
+    assert log_line.uptime_ms == 1103
+    assert log_line.level == 'info'
+    assert log_line.tags == 'gc,heap'
+    assert log_line.gc_id == '0'
+    assert log_line.message == 'Eden regions: 24->0(24)'
+    log_line = split_decorators('[1.103s] GC(0) Pause Young (Normal) (G1 Evacuation Pause) 24M->4M(256M) 3.123ms\n')
+    assert log_line.timestamp == '1970-01-01T00:00:01.103'
+    assert log_line.zone is None
+    assert log_line.tags is None
+    assert split_decorators('2018-11-14T07:00:09.359+0100: 9.359: [GC (Allocation Failure)') is None
+
+
+@pytest.mark.parametrize('log', [UNTAGGED_G1_LOG, UNTAGGED_G1_LOG.replace('s] ', 's][host-01] ')],
+                         ids=['time,uptime', 'time,uptime,hostname'])
+def test_untagged_log(log):
+    events = list(gc_analyzer.iter_events(io.StringIO(log)))
+    assert [(event.kind, event.pause_ms, event.heap_after_mb) for event in events] == \
+        [('minorgc', 3.123, 4), ('minorgc', 2.5, 5)]
+    stats = gc_analyzer.analyze(io.StringIO(log))
+    assert stats['gc'] == 'G1'
+    assert stats['pauses']['count'] == 2
+    assert stats['total_allocated_mb'] == pytest.approx(48)